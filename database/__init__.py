@@ -1,3 +1,9 @@
 __all__ = [
+    "circuit_breaker",
     "database",
-]
\ No newline at end of file
+    "last_value_cache",
+    "line_protocol",
+    "single_flight",
+    "spool",
+    "write_buffer"
+]
@@ -0,0 +1,107 @@
+"""
+* circuit_breaker.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import threading
+import time
+
+from typing import Callable, Optional
+from utils.log import *
+from utils.metrics import *
+
+### CIRCUIT BREAKER macros ###
+
+CIRCUIT_BREAKER_STATE_CLOSED = 0
+CIRCUIT_BREAKER_STATE_OPEN = 1
+CIRCUIT_BREAKER_STATE_HALF_OPEN = 2
+
+CIRCUIT_BREAKER_METRIC_STATE = "_circuit_state"
+CIRCUIT_BREAKER_METRIC_OPENED = "_circuit_opened"
+CIRCUIT_BREAKER_METRIC_CLOSED = "_circuit_closed"
+CIRCUIT_BREAKER_METRIC_REJECTED = "_circuit_rejected"
+CIRCUIT_BREAKER_METRIC_PROBES = "_circuit_probes"
+CIRCUIT_BREAKER_METRIC_TRIALS = "_circuit_trials"
+
+### CIRCUIT BREAKER classes ###
+
+class CircuitOpenError(Exception):
+    pass
+
+class CircuitBreaker:
+
+    def __init__(self, name: str, failure_threshold: int, probe: Callable[[], None], probe_period_seconds: float, on_close: Optional[Callable[[], None]] = None, on_half_open: Optional[Callable[[], None]] = None) -> None:
+        # Init context.
+        self._name = name
+        self._failure_threshold = failure_threshold
+        self._probe = probe
+        self._probe_period_seconds = probe_period_seconds
+        self._on_close = on_close
+        self._on_half_open = on_half_open
+        self._lock = threading.Lock()
+        self._state = CIRCUIT_BREAKER_STATE_CLOSED
+        self._consecutive_failures = 0
+        self._trial_in_flight = False
+        metrics.register_gauge(self._name + CIRCUIT_BREAKER_METRIC_STATE, lambda: self._state)
+
+    def is_open(self) -> bool:
+        return (self._state != CIRCUIT_BREAKER_STATE_CLOSED)
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if (self._state == CIRCUIT_BREAKER_STATE_CLOSED):
+                return True
+            # Half-open circuit: a single real request is sent to confirm the probe result.
+            if (self._state == CIRCUIT_BREAKER_STATE_HALF_OPEN) and (self._trial_in_flight == False):
+                self._trial_in_flight = True
+                metrics.increment(self._name + CIRCUIT_BREAKER_METRIC_TRIALS)
+                return True
+        # Fail fast while the circuit is open (only the health probe accesses the server).
+        metrics.increment(self._name + CIRCUIT_BREAKER_METRIC_REJECTED)
+        return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+            if (self._state != CIRCUIT_BREAKER_STATE_HALF_OPEN):
+                return
+            # Trial request succeeded: close circuit.
+            self._state = CIRCUIT_BREAKER_STATE_CLOSED
+            self._trial_in_flight = False
+        Log.debug_print("[CIRCUIT BREAKER] * " + self._name + ": circuit closed")
+        metrics.increment(self._name + CIRCUIT_BREAKER_METRIC_CLOSED)
+        if self._on_close is not None:
+            self._on_close()
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            if (self._state == CIRCUIT_BREAKER_STATE_HALF_OPEN):
+                # Trial request failed: open circuit again.
+                self._trial_in_flight = False
+            elif (self._state == CIRCUIT_BREAKER_STATE_OPEN) or (self._consecutive_failures < self._failure_threshold):
+                return
+            self._state = CIRCUIT_BREAKER_STATE_OPEN
+        Log.debug_print("[CIRCUIT BREAKER] * " + self._name + ": circuit opened after " + str(self._consecutive_failures) + " consecutive failures")
+        metrics.increment(self._name + CIRCUIT_BREAKER_METRIC_OPENED)
+        threading.Thread(target=self._run_probe, name=(self._name + "_circuit_probe"), daemon=True).start()
+
+    def _run_probe(self) -> None:
+        # Probe server health periodically until it answers again.
+        while True:
+            time.sleep(self._probe_period_seconds)
+            metrics.increment(self._name + CIRCUIT_BREAKER_METRIC_PROBES)
+            try:
+                self._probe()
+                break
+            except Exception as e:
+                Log.debug_print("[CIRCUIT BREAKER] * " + self._name + ": health probe failed (" + str(e) + ")")
+        # Half-open circuit: the next request is the trial.
+        with self._lock:
+            self._trial_in_flight = False
+            self._state = CIRCUIT_BREAKER_STATE_HALF_OPEN
+        Log.debug_print("[CIRCUIT BREAKER] * " + self._name + ": circuit half-open")
+        if self._on_half_open is not None:
+            self._on_half_open()
@@ -6,11 +6,24 @@
 """
 
 import json
+import re
+import socket
+import threading
+import time
 
+from collections import OrderedDict
 from enum import Enum, auto
 from influxdb import InfluxDBClient
+from influxdb.exceptions import InfluxDBClientError
+from database.circuit_breaker import *
+from database.last_value_cache import *
+from database.line_protocol import *
+from database.single_flight import *
+from database.spool import *
+from database.write_buffer import *
 from utils.log import *
-from typing import List, Dict, Any
+from utils.metrics import *
+from typing import List, Dict, Any, Callable, Optional
 
 ### DATABASE public macros ###
 
@@ -277,6 +290,36 @@ DATABASE_LIST = {
 }
 
 DATABASE_RETENTION_POLICY_10_YEARS_NAME = "rp_10y"
+DATABASE_RETENTION_POLICY_10_YEARS_DURATION = "520w"
+
+DATABASE_DURATION_UNITS_SECONDS = {"w": 604800, "d": 86400, "h": 3600, "m": 60, "s": 1}
+
+DATABASE_PING_RETRY_DELAY_MIN_SECONDS = 0.1
+DATABASE_PING_RETRY_DELAY_MAX_SECONDS = 5.0
+
+# Per-database clients: bounded request time, persistent connections and a single attempt per request.
+DATABASE_CLIENT_CONNECT_TIMEOUT_SECONDS = 2.0
+DATABASE_CLIENT_READ_TIMEOUT_SECONDS = 10.0
+DATABASE_CLIENT_RETRIES = 1
+DATABASE_CLIENT_POOL_SIZE = 8
+DATABASE_CLIENT_SOCKET_OPTIONS = [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1), (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+
+# Circuit breaker.
+DATABASE_CIRCUIT_BREAKER_NAME = "database"
+DATABASE_SINGLE_FLIGHT_NAME = "database"
+DATABASE_CIRCUIT_BREAKER_FAILURE_THRESHOLD = 3
+DATABASE_CIRCUIT_BREAKER_PROBE_PERIOD_SECONDS = 5.0
+# Spool of the failed writes (when the write-ahead spool is disabled).
+DATABASE_DIVERTED_SPOOL_NAME = "database_diverted"
+
+# Last value cache.
+DATABASE_LAST_VALUE_CACHE_CAPACITY = 10000
+DATABASE_LAST_VALUE_CACHE_MAX_AGE_SECONDS = 3600
+DATABASE_LAST_VALUE_CACHE_NEGATIVE_MAX_AGE_SECONDS = 60
+
+# Time windows of the last value lookups (last day, last month, whole retention policy).
+DATABASE_READ_WINDOWS = [86400, 2592000, None]
+DATABASE_READ_WINDOW_MARGIN = 2
 
 DATABASE_JSON_KEY_TIME = "time"
 DATABASE_JSON_KEY_MEASUREMENT = "measurement"
@@ -285,6 +328,29 @@ DATABASE_JSON_KEY_TAGS = "tags"
 DATABASE_JSON_KEY_LATEST = "latest"
 DATABASE_JSON_KEY_NAME = "name"
 DATABASE_JSON_KEY_LAST = "last"
+DATABASE_JSON_KEY_DURATION = "duration"
+DATABASE_JSON_KEY_REPLICATION = "replicaN"
+DATABASE_JSON_KEY_DEFAULT = "default"
+
+# Maximum number of points per write request.
+DATABASE_WRITE_CHUNK_SIZE = 5000
+
+# Write status (rejected points are never retried, failed writes are retried later).
+DATABASE_WRITE_STATUS_SUCCESS = 0
+DATABASE_WRITE_STATUS_REJECTED = 1
+DATABASE_WRITE_STATUS_FAILED = 2
+
+# Number of points dropped by InfluxDB in a partial write.
+DATABASE_PARTIAL_WRITE_DROPPED_PATTERN = re.compile(r"dropped=(\d+)")
+
+DATABASE_METRIC_WRITE_REQUESTS = "database_write_requests"
+DATABASE_METRIC_POINTS_WRITTEN = "database_points_written"
+DATABASE_METRIC_STARTUP_CONNECT_TIME = "database_startup_connect_time"
+DATABASE_METRIC_STARTUP_DATABASES_TIME = "database_startup_databases_time"
+DATABASE_METRIC_STARTUP_RETENTION_POLICIES_TIME = "database_startup_retention_policies_time"
+DATABASE_METRIC_READ_QUERIES = "database_read_queries"
+DATABASE_METRIC_DIVERTED_POINTS = "database_diverted_points"
+DATABASE_METRIC_REJECTED_POINTS = "database_rejected_points"
 
 ### DATABASE classes ###
 
@@ -328,64 +394,139 @@ class Record:
 class Database:
     
     def __init__(self, database_host: str = "localhost", database_port: int = 8086) -> None:
-        # Local variables.
-        influxdb_version = 0
-        influxdb_found = False
-        database_found = False
-        retention_policy_found = False
-        retention_policy_infinite_found = False
         # Init context.
         self._influxdb_client = None
+        self._clients = {}
+        self._spool = None
+        self._write_buffer = None
+        self._encoder = LineProtocolEncoder()
+        self._write_listeners = []
+        # Identical concurrent queries share a single InfluxDB request.
+        self._single_flight = SingleFlight(DATABASE_SINGLE_FLIGHT_NAME)
+        self._last_value_cache = LastValueCache(DATABASE_LAST_VALUE_CACHE_CAPACITY, DATABASE_LAST_VALUE_CACHE_MAX_AGE_SECONDS, DATABASE_LAST_VALUE_CACHE_NEGATIVE_MAX_AGE_SECONDS)
+        # First time window of the last value lookups for each series.
+        self._read_windows_lock = threading.Lock()
+        self._read_windows = OrderedDict()
+        # Failed writes are diverted to an on-disk spool and replayed once InfluxDB is healthy again.
+        self._diverted_spool = None
+        self._circuit_breaker = CircuitBreaker(DATABASE_CIRCUIT_BREAKER_NAME, DATABASE_CIRCUIT_BREAKER_FAILURE_THRESHOLD, self._probe, DATABASE_CIRCUIT_BREAKER_PROBE_PERIOD_SECONDS, self._replay_diverted, self._replay_diverted)
+        # Startup phases.
+        start_time = time.monotonic()
+        self._influxdb_client = Database._create_client(database_host, database_port, None)
+        self._wait_influxdb()
+        # Each database has its own client (never switched), so that clients can be shared between threads.
+        for database in DATABASE_LIST:
+            self._clients[database] = Database._create_client(database_host, database_port, database)
+        connect_time = time.monotonic()
+        self._reconcile_databases()
+        databases_time = time.monotonic()
+        self._reconcile_retention_policies()
+        retention_policies_time = time.monotonic()
+        # Report startup time.
+        metrics.add_timing(DATABASE_METRIC_STARTUP_CONNECT_TIME, (connect_time - start_time))
+        metrics.add_timing(DATABASE_METRIC_STARTUP_DATABASES_TIME, (databases_time - connect_time))
+        metrics.add_timing(DATABASE_METRIC_STARTUP_RETENTION_POLICIES_TIME, (retention_policies_time - databases_time))
+        Log.debug_print("[DATABASE] * Startup time: connect=" + str(round((connect_time - start_time) * 1000.0, 1)) + "ms databases=" + str(round((databases_time - connect_time) * 1000.0, 1)) + "ms retention_policies=" + str(round((retention_policies_time - databases_time) * 1000.0, 1)) + "ms")
+
+    @staticmethod
+    def _create_client(database_host: str, database_port: int, database: Any) -> InfluxDBClient:
+        return InfluxDBClient(host=database_host,
+                              port=database_port,
+                              database=database,
+                              timeout=(DATABASE_CLIENT_CONNECT_TIMEOUT_SECONDS, DATABASE_CLIENT_READ_TIMEOUT_SECONDS),
+                              retries=DATABASE_CLIENT_RETRIES,
+                              pool_size=DATABASE_CLIENT_POOL_SIZE,
+                              gzip=True,
+                              socket_options=DATABASE_CLIENT_SOCKET_OPTIONS)
+
+    def _get_client(self, database: str) -> InfluxDBClient:
+        # Fail fast while InfluxDB is unhealthy.
+        if (self._circuit_breaker.allow_request() == False):
+            raise CircuitOpenError("InfluxDB circuit open")
+        return self._clients[database]
+
+    @staticmethod
+    def _is_rejected(error: Any) -> bool:
+        # Client errors (e.g. field type conflict) are permanent and do not mean that InfluxDB is unhealthy.
+        return (isinstance(error, InfluxDBClientError) and (error.code is not None) and (error.code < 500))
+
+    def _record_result(self, error: Any) -> None:
+        # Requests rejected by the circuit breaker were not sent.
+        if isinstance(error, CircuitOpenError):
+            return
+        if (error is None) or (Database._is_rejected(error) == True):
+            self._circuit_breaker.record_success()
+        else:
+            self._circuit_breaker.record_failure()
+
+    def _probe(self) -> None:
+        self._influxdb_client.ping()
+
+    def _wait_influxdb(self) -> None:
+        # Local variables.
+        retry_delay = DATABASE_PING_RETRY_DELAY_MIN_SECONDS
         # Wait for InfluxDB to be available.
         Log.debug_print("[DATABASE] * Creating client...")
-        while influxdb_found == False:
+        while True:
             try:
-                # Create client.
-                self._influxdb_client = InfluxDBClient(host=database_host, port=database_port)
-                # Ping database.
                 influxdb_version = self._influxdb_client.ping()
-                influxdb_found = True
                 Log.debug_print("[DATABASE] * Influx DB connection OK (" + str(influxdb_version) + ")")
                 Log.debug_print("")
-            except:
-                influxdb_found = False
-        # Get list of existing databases.
-        influxdb_database_list = self._influxdb_client.get_list_database()
-        # Check databases.
-        for database, retention_policy_duration in DATABASE_LIST.items():
-            # Reset flags.
-            database_found = False
-            retention_policy_found = False
-            retention_policy_infinite_found = False
-            # Check if database exists.
-            for influxdb_database in influxdb_database_list :
-                if (influxdb_database[DATABASE_JSON_KEY_NAME].find(database) >= 0) :
-                    Log.debug_print("[DATABASE] * " + database + " database found")
-                    database_found = True
-                    break
-            # Create database if not found.
-            if (database_found == False) :
+                return
+            except Exception:
+                # Exponential backoff while InfluxDB is starting.
+                time.sleep(retry_delay)
+                retry_delay = min(DATABASE_PING_RETRY_DELAY_MAX_SECONDS, (retry_delay * 2.0))
+
+    def _reconcile_databases(self) -> None:
+        # Create missing databases only.
+        influxdb_database_names = set(influxdb_database[DATABASE_JSON_KEY_NAME] for influxdb_database in self._influxdb_client.get_list_database())
+        for database in DATABASE_LIST:
+            if database in influxdb_database_names:
+                Log.debug_print("[DATABASE] * " + database + " database found")
+            else:
                 Log.debug_print("[DATABASE] * Creating database " + database)
                 self._influxdb_client.create_database(database)
-            # Check retention policy.
-            retention_policy_name = ("rp_" + database)
-            retention_policy_list = list(self._influxdb_client.query(f'SHOW RETENTION POLICIES ON "{database}"').get_points())
-            # Check if retention policy exists.
-            for rp in retention_policy_list:
-                if (rp.get(DATABASE_JSON_KEY_NAME) == retention_policy_name):
-                    Log.debug_print("[DATABASE] * " + retention_policy_name + " retention policy found")
-                    retention_policy_found = True
-                if (rp.get(DATABASE_JSON_KEY_NAME) == DATABASE_RETENTION_POLICY_10_YEARS_NAME):
-                    Log.debug_print("[DATABASE] * " + DATABASE_RETENTION_POLICY_10_YEARS_NAME + " retention policy found")
-                    retention_policy_infinite_found = True
-            # Create or modify database retention policy.
-            query_action = "CREATE" if (retention_policy_found == False) else "ALTER"
-            Log.debug_print("[DATABASE] * " + query_action + " retention policy " + retention_policy_name)
-            self._influxdb_client.query(f'{query_action} RETENTION POLICY "{retention_policy_name}" ON "{database}" DURATION {retention_policy_duration} REPLICATION 1 DEFAULT')
-            # Create or modify infinite retention policy.
-            query_action = "CREATE" if (retention_policy_infinite_found == False) else "ALTER"
-            Log.debug_print("[DATABASE] * " + query_action + " retention policy " + DATABASE_RETENTION_POLICY_10_YEARS_NAME)
-            self._influxdb_client.query(f'{query_action} RETENTION POLICY "{DATABASE_RETENTION_POLICY_10_YEARS_NAME}" ON "{database}" DURATION 520w REPLICATION 1')
+
+    @staticmethod
+    def _parse_duration(duration: str) -> int:
+        # Convert InfluxDB duration (e.g. "365d", "520w" or "8760h0m0s") to seconds.
+        duration_seconds = 0
+        for value, unit in re.findall(r"(\d+)([wdhms])", duration):
+            duration_seconds += int(value) * DATABASE_DURATION_UNITS_SECONDS[unit]
+        return duration_seconds
+
+    def _reconcile_retention_policies(self) -> None:
+        # Local variables.
+        statements = []
+        databases = list(DATABASE_LIST.keys())
+        # Read retention policies of all databases in a single request.
+        results = self._influxdb_client.query("; ".join([f'SHOW RETENTION POLICIES ON "{database}"' for database in databases]))
+        if not isinstance(results, list):
+            results = [results]
+        for database, result in zip(databases, results):
+            existing = {rp.get(DATABASE_JSON_KEY_NAME): rp for rp in result.get_points()}
+            # Desired state: limited retention policy (default) and 10 years retention policy.
+            desired = [
+                (("rp_" + database), DATABASE_LIST[database], True),
+                (DATABASE_RETENTION_POLICY_10_YEARS_NAME, DATABASE_RETENTION_POLICY_10_YEARS_DURATION, False)
+            ]
+            for retention_policy_name, duration, default in desired:
+                rp = existing.get(retention_policy_name)
+                default_clause = " DEFAULT" if default else ""
+                if rp is None:
+                    Log.debug_print("[DATABASE] * CREATE retention policy " + retention_policy_name + " on " + database)
+                    statements.append(f'CREATE RETENTION POLICY "{retention_policy_name}" ON "{database}" DURATION {duration} REPLICATION 1{default_clause}')
+                elif ((Database._parse_duration(str(rp.get(DATABASE_JSON_KEY_DURATION))) != Database._parse_duration(duration)) or
+                      (rp.get(DATABASE_JSON_KEY_REPLICATION) != 1) or
+                      ((default == True) and (rp.get(DATABASE_JSON_KEY_DEFAULT) != True))):
+                    Log.debug_print("[DATABASE] * ALTER retention policy " + retention_policy_name + " on " + database)
+                    statements.append(f'ALTER RETENTION POLICY "{retention_policy_name}" ON "{database}" DURATION {duration} REPLICATION 1{default_clause}')
+                else:
+                    Log.debug_print("[DATABASE] * " + retention_policy_name + " retention policy found on " + database)
+        # Apply required changes only.
+        if (len(statements) > 0):
+            self._influxdb_client.query("; ".join(statements), method="POST")
 
     @staticmethod      
     def _convert_integers_to_floats(dictionary: Dict[str, Any]) -> Dict[str, Any]:
@@ -402,67 +543,262 @@ class Database:
                 converted[name] = value
         return converted
                 
-    def write_record(self, record: Record):
+    @staticmethod
+    def build_point(record: Record) -> Any:
         # Check parameters.
         if not record:
-            return
+            return None
         if not record.database:
-            return
+            return None
         if not record.measurement:
-            return
+            return None
         if not record.fields or not isinstance(record.fields, Dict):
-            return
-        # Switch database.
-        Log.debug_print("[DATABASE] * Switching and writing database " + record.database)
-        self._influxdb_client.switch_database(record.database)
+            return None
         # Build point.
-        point = [{
+        point = {
             DATABASE_JSON_KEY_MEASUREMENT: record.measurement,
             DATABASE_JSON_KEY_FIELDS: record.fields
-        }]
+        }
         # Add tags.
         if (record.tags):
-            point[0][DATABASE_JSON_KEY_TAGS] = record.tags
+            point[DATABASE_JSON_KEY_TAGS] = record.tags
         # Add current timestamp if not provided.
         if (record.timestamp):
-            point[0][DATABASE_JSON_KEY_TIME] = record.timestamp
+            point[DATABASE_JSON_KEY_TIME] = record.timestamp
         else:
-            point[0][DATABASE_JSON_KEY_TIME] = int(time.time())
-        # Write data.
+            point[DATABASE_JSON_KEY_TIME] = int(time.time())
+        # Point is stored with its destination (database and retention policy).
+        retention_policy = None if (record.limited_retention == True) else DATABASE_RETENTION_POLICY_10_YEARS_NAME
+        return [record.database, retention_policy, point]
+
+    def _write_points(self, database: str, retention_policy: Any, points: List[Dict[str, Any]]) -> int:
+        # Local variables.
+        status = DATABASE_WRITE_STATUS_SUCCESS
+        # Encode points directly in line protocol (invalid points would be rejected by InfluxDB as well).
         try:
-            Log.debug_print("[DATABASE] * Writing point " + json.dumps(point))
-            # Check retention policy.
-            if (record.limited_retention == False):
-                Log.debug_print("[DATABASE] * Applying " + DATABASE_RETENTION_POLICY_10_YEARS_NAME + " retention policy")
-                self._influxdb_client.write_points(point, time_precision='s', retention_policy=DATABASE_RETENTION_POLICY_10_YEARS_NAME)
-            else:
-                Log.debug_print("[DATABASE] * Applying default retention policy")
-                self._influxdb_client.write_points(point, time_precision='s')
-        except:
-            return
+            lines = self._encoder.encode(points)
+        except Exception as e:
+            metrics.increment(DATABASE_METRIC_REJECTED_POINTS, len(points))
+            Log.debug_print("[DATABASE] * ERROR: " + str(len(points)) + " point(s) could not be encoded (" + str(e) + ")")
+            return DATABASE_WRITE_STATUS_REJECTED
+        Log.debug_print("[DATABASE] * Writing " + str(len(lines)) + " point(s) in " + database + " with " + ("default" if (retention_policy is None) else retention_policy) + " retention policy")
+        # Very large groups are split in several requests (bodies are gzip compressed by the client).
+        for idx in range(0, len(lines), DATABASE_WRITE_CHUNK_SIZE):
+            chunk = lines[idx:(idx + DATABASE_WRITE_CHUNK_SIZE)]
+            try:
+                self._get_client(database).write_points(chunk, time_precision='s', retention_policy=retention_policy, protocol='line')
+                self._record_result(None)
+                metrics.increment(DATABASE_METRIC_WRITE_REQUESTS)
+                metrics.increment(DATABASE_METRIC_POINTS_WRITTEN, len(chunk))
+            except Exception as e:
+                self._record_result(e)
+                # Server errors, timeouts and open circuit: the whole group is retried later.
+                if (Database._is_rejected(e) == False):
+                    Log.debug_print("[DATABASE] * ERROR: write failed on " + database + " (" + str(e) + ")")
+                    return DATABASE_WRITE_STATUS_FAILED
+                # Rejected points are dropped (the other points of a partial write are stored by InfluxDB).
+                dropped = DATABASE_PARTIAL_WRITE_DROPPED_PATTERN.search(str(e))
+                rejected_count = int(dropped.group(1)) if (dropped is not None) else len(chunk)
+                metrics.increment(DATABASE_METRIC_REJECTED_POINTS, rejected_count)
+                Log.debug_print("[DATABASE] * ERROR: " + str(rejected_count) + " point(s) rejected by " + database + " (" + str(e) + ")")
+                status = DATABASE_WRITE_STATUS_REJECTED
+        return status
 
-    def write_records(self, record_list: List[Record]) -> None:
-        # Measurements loop.
-        for record in record_list:
-            self.write_record(record)
-        
-    def read_field(self, database: str, where_clause: str, measurement: str, field: str, limited_retention: bool) -> tuple:
+    def _write_groups(self, batch: List[list]) -> List[list]:
+        # Local variables.
+        groups = {}
+        failed_batch = []
+        # Group points by destination.
+        for database, retention_policy, point in batch:
+            groups.setdefault((database, retention_policy), []).append(point)
+        # Write groups (rejected points are never retried).
+        for (database, retention_policy), points in groups.items():
+            if (self._write_points(database, retention_policy, points) == DATABASE_WRITE_STATUS_FAILED):
+                failed_batch.extend([[database, retention_policy, point] for point in points])
+        # Points which must be written again later.
+        return failed_batch
+
+    def _write_batch(self, batch: List[list]) -> bool:
+        # A failed batch is retried as a whole, which is idempotent for InfluxDB.
+        return (len(self._write_groups(batch)) == 0)
+
+    def _divert(self, batch: List[list]) -> bool:
+        # Hand failed writes off to the spool (points are only lost if no spool is enabled).
+        spool = self._spool if (self._spool is not None) else self._diverted_spool
+        if spool is None:
+            return False
+        spool.append(batch)
+        metrics.increment(DATABASE_METRIC_DIVERTED_POINTS, len(batch))
+        return True
+
+    def _replay_diverted(self) -> None:
+        # Called by the circuit breaker when half-open (the first replayed batch is the trial write) and closed.
+        for spool in [self._spool, self._diverted_spool]:
+            if spool is not None:
+                spool.resume()
+
+    def _write_batch_or_divert(self, batch: List[list]) -> bool:
+        # Only the groups which failed (InfluxDB unavailable) are diverted, rejected points are dropped.
+        failed_batch = self._write_groups(batch)
+        if (len(failed_batch) == 0):
+            return True
+        return self._divert(failed_batch)
+
+    def enable_spool(self, directory: str, max_size_bytes: int) -> None:
+        # Records are written to the on-disk spool and drained to InfluxDB in background.
+        self._spool = Spool(directory, max_size_bytes, self._write_batch)
+        Log.debug_print("[DATABASE] * Write-ahead spool enabled in " + directory)
+
+    def enable_diverted_spool(self, directory: str, max_size_bytes: int) -> None:
+        # Failed writes are persisted on disk and replayed in background.
+        self._diverted_spool = Spool(directory, max_size_bytes, self._write_batch, DATABASE_DIVERTED_SPOOL_NAME)
+        Log.debug_print("[DATABASE] * Diverted writes spool enabled in " + directory)
+
+    def enable_write_buffer(self, flush_size_points: int, max_latency_seconds: float, capacity_points: int) -> None:
+        # Points of several callbacks are aggregated and written together.
+        self._write_buffer = WriteBuffer(self._flush_write_buffer, flush_size_points, max_latency_seconds, capacity_points)
+        Log.debug_print("[DATABASE] * Write buffer enabled (" + str(flush_size_points) + " points or " + str(int(max_latency_seconds * 1000)) + " ms)")
+
+    def close(self) -> None:
+        # Flush write buffer.
+        if self._write_buffer is not None:
+            self._write_buffer.close()
+            self._write_buffer = None
+        # Stop spool (pending batches are replayed at next startup).
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+        if self._diverted_spool is not None:
+            self._diverted_spool.close()
+            self._diverted_spool = None
+
+    def write_record(self, record: Record) -> None:
+        self.write_records([record])
+
+    def write_records(self, record_list: List[Record]) -> bool:
         # Local variables.
-        result = None
-        timestamp = None
-        rp = "" if (limited_retention == True) else (DATABASE_RETENTION_POLICY_10_YEARS_NAME + ".")
-        # Build query.
-        query = ("SELECT last(" + field + ") FROM " + rp + measurement)
-        if where_clause:
-            query = (query + " WHERE " + where_clause)
-        # Switch database.
-        Log.debug_print("[DATABASE] * Switching and reading database " + database)
-        self._influxdb_client.switch_database(database)
+        batch = []
+        # Build points.
+        for record in record_list:
+            point = Database.build_point(record)
+            if point is not None:
+                batch.append(point)
+        return self.write_points(batch)
+
+    def write_points(self, batch: List[list]) -> bool:
+        # Write points already built with build_point (e.g. by another process).
+        if (len(batch) == 0):
+            return True
+        # Write data.
+        if self._spool is not None:
+            self._spool.append(batch)
+        elif self._write_buffer is not None:
+            # Last values are updated when the buffer is flushed.
+            return self._write_buffer.append(batch)
+        elif (self._write_batch_or_divert(batch) == False):
+            return False
+        self.update_last_values(batch)
+        return True
+
+    def _flush_write_buffer(self, batch: List[list]) -> bool:
+        if (self._write_batch_or_divert(batch) == False):
+            return False
+        self.update_last_values(batch)
+        return True
+
+    def update_last_values(self, batch: List[list], insert: bool = False) -> None:
+        # Last values are only updated once points are accepted (written, spooled or diverted).
+        self._last_value_cache.update(batch, insert)
+        for write_listener in self._write_listeners:
+            write_listener(batch)
+
+    def add_write_listener(self, write_listener: Callable[[List[list]], None]) -> None:
+        # Callback called with the points written by this client.
+        self._write_listeners.append(write_listener)
+
+    def _query(self, database: str, query: str) -> Any:
+        return self._single_flight.do((database, query), lambda: self._send_query(database, query))
+
+    def _send_query(self, database: str, query: str) -> Any:
         # Read data.
-        Log.debug_print("[DATABASE] * Sending query: " + query)
-        points = self._influxdb_client.query(query)
+        Log.debug_print("[DATABASE] * Sending query to " + database + ": " + query)
+        client = self._get_client(database)
+        try:
+            points = client.query(query)
+            self._record_result(None)
+        except Exception as e:
+            self._record_result(e)
+            raise
+        metrics.increment(DATABASE_METRIC_READ_QUERIES)
         Log.debug_print("[DATABASE] * Result: " + str(points))
-        for p in points.get_points():
-            result = p[DATABASE_JSON_KEY_LAST]
-            timestamp = p[DATABASE_JSON_KEY_TIME]
-        return result, timestamp
+        return points
+
+    def _get_first_read_window(self, key: tuple) -> int:
+        with self._read_windows_lock:
+            window_index = self._read_windows.get(key, 0)
+            if key in self._read_windows:
+                self._read_windows.move_to_end(key)
+        return window_index
+
+    def _set_first_read_window(self, key: tuple, timestamp: Any) -> None:
+        # Smallest window which contains the last point with some margin (approximation of the series reporting interval).
+        age_seconds = max(0.0, time.time() - LastValueCache.parse_time(timestamp))
+        window_index = len(DATABASE_READ_WINDOWS) - 1
+        for idx, window_seconds in enumerate(DATABASE_READ_WINDOWS):
+            if (window_seconds is not None) and ((age_seconds * DATABASE_READ_WINDOW_MARGIN) <= window_seconds):
+                window_index = idx
+                break
+        with self._read_windows_lock:
+            self._read_windows[key] = window_index
+            self._read_windows.move_to_end(key)
+            while (len(self._read_windows) > DATABASE_LAST_VALUE_CACHE_CAPACITY):
+                self._read_windows.popitem(last=False)
+
+    def read_fields(self, database: str, tags: Optional[Dict[str, str]], lookups: List[tuple]) -> Dict[tuple, tuple]:
+        # Local variables.
+        results = {}
+        pending = []
+        conditions = ["\"" + str(name) + "\"='" + str(value).replace("\\", "\\\\").replace("'", "\\'") + "'" for name, value in tags.items()] if tags else []
+        # Read last values from cache.
+        for measurement, field, limited_retention in lookups:
+            retention_policy = None if (limited_retention == True) else DATABASE_RETENTION_POLICY_10_YEARS_NAME
+            key = LastValueCache.build_key(database, retention_policy, measurement, tags, field)
+            cached = self._last_value_cache.get(key)
+            if cached is not None:
+                results[(measurement, field, limited_retention)] = cached
+            else:
+                rp = "" if (limited_retention == True) else (DATABASE_RETENTION_POLICY_10_YEARS_NAME + ".")
+                query = ("SELECT last(\"" + field + "\") FROM " + rp + "\"" + measurement + "\"")
+                pending.append([measurement, field, limited_retention, key, query, self._get_first_read_window(key)])
+        # Search in progressively wider time windows, so that only the most recent shards are opened in most cases.
+        while (len(pending) > 0):
+            # All the missing fields are read with a single multi-statement request.
+            statements = []
+            for measurement, field, limited_retention, key, query, window_index in pending:
+                window_seconds = DATABASE_READ_WINDOWS[window_index]
+                window_conditions = conditions if (window_seconds is None) else (conditions + ["time > now() - " + str(window_seconds) + "s"])
+                statements.append((query + " WHERE " + " AND ".join(window_conditions)) if window_conditions else query)
+            points_list = self._query(database, "; ".join(statements))
+            if not isinstance(points_list, list):
+                points_list = [points_list]
+            next_pending = []
+            for lookup, points in zip(pending, points_list):
+                measurement, field, limited_retention, key, query, window_index = lookup
+                result = None
+                timestamp = None
+                for p in points.get_points():
+                    result = p[DATABASE_JSON_KEY_LAST]
+                    timestamp = p[DATABASE_JSON_KEY_TIME]
+                if (timestamp is None) and (window_index < (len(DATABASE_READ_WINDOWS) - 1)):
+                    lookup[5] += 1
+                    next_pending.append(lookup)
+                    continue
+                if timestamp is not None:
+                    self._set_first_read_window(key, timestamp)
+                self._last_value_cache.put(key, result, timestamp)
+                results[(measurement, field, limited_retention)] = (result, timestamp)
+            pending = next_pending
+        return results
+
+    def read_field(self, database: str, tags: Optional[Dict[str, str]], measurement: str, field: str, limited_retention: bool) -> tuple:
+        return self.read_fields(database, tags, [(measurement, field, limited_retention)])[(measurement, field, limited_retention)]
@@ -0,0 +1,125 @@
+"""
+* last_value_cache.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import threading
+import time
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from utils.metrics import *
+
+### LAST VALUE CACHE macros ###
+
+LAST_VALUE_CACHE_JSON_KEY_MEASUREMENT = "measurement"
+LAST_VALUE_CACHE_JSON_KEY_FIELDS = "fields"
+LAST_VALUE_CACHE_JSON_KEY_TAGS = "tags"
+LAST_VALUE_CACHE_JSON_KEY_TIME = "time"
+
+LAST_VALUE_CACHE_METRIC_HITS = "last_value_cache_hits"
+LAST_VALUE_CACHE_METRIC_MISSES = "last_value_cache_misses"
+LAST_VALUE_CACHE_METRIC_UPDATES = "last_value_cache_updates"
+LAST_VALUE_CACHE_METRIC_EVICTIONS = "last_value_cache_evictions"
+LAST_VALUE_CACHE_METRIC_SIZE = "last_value_cache_size"
+
+### LAST VALUE CACHE classes ###
+
+class LastValueCache:
+
+    def __init__(self, capacity: int, max_age_seconds: float, negative_max_age_seconds: float) -> None:
+        # Init context.
+        self._capacity = capacity
+        self._max_age_seconds = max_age_seconds
+        self._negative_max_age_seconds = negative_max_age_seconds
+        self._lock = threading.Lock()
+        # Key (database, retention policy, measurement, tags filter, field) to [value, time in seconds, timestamp, load time].
+        self._entries = OrderedDict()
+        # Tags filters used by the readers for each (database, retention policy, measurement).
+        self._filters: Dict[tuple, set] = {}
+        metrics.register_gauge(LAST_VALUE_CACHE_METRIC_SIZE, lambda: len(self._entries))
+
+    @staticmethod
+    def build_key(database: str, retention_policy: Any, measurement: str, tags: Optional[Dict[str, Any]], field: str) -> tuple:
+        tags_filter = tuple(sorted((str(name), str(value)) for name, value in tags.items())) if tags else ()
+        return (database, retention_policy, measurement, tags_filter, field)
+
+    @staticmethod
+    def _format_time(time_seconds: int) -> str:
+        # Same format as the timestamps returned by InfluxDB queries.
+        return datetime.fromtimestamp(time_seconds, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    @staticmethod
+    def parse_time(timestamp: Any) -> float:
+        if timestamp is None:
+            return -1.0
+        return datetime.fromisoformat(str(timestamp).replace("Z", "+00:00")).timestamp()
+
+    def get(self, key: tuple) -> Optional[tuple]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                # Entries also written by other processes are reloaded from time to time.
+                max_age_seconds = self._negative_max_age_seconds if (entry[0] is None) else self._max_age_seconds
+                if ((time.monotonic() - entry[3]) < max_age_seconds):
+                    self._entries.move_to_end(key)
+                    metrics.increment(LAST_VALUE_CACHE_METRIC_HITS)
+                    return entry[0], entry[2]
+                del self._entries[key]
+        metrics.increment(LAST_VALUE_CACHE_METRIC_MISSES)
+        return None
+
+    def put(self, key: tuple, value: Any, timestamp: Any) -> None:
+        # Store a value read from InfluxDB (unless a newer value has been written in the meantime).
+        time_seconds = LastValueCache.parse_time(timestamp)
+        with self._lock:
+            self._filters.setdefault(key[:3], set()).add(tuple(name for name, _ in key[3]))
+            entry = self._entries.get(key)
+            if (entry is not None) and (entry[1] > time_seconds):
+                return
+            self._entries[key] = [value, time_seconds, timestamp, time.monotonic()]
+            self._entries.move_to_end(key)
+            # Evict least recently used entries.
+            while (len(self._entries) > self._capacity):
+                self._entries.popitem(last=False)
+                metrics.increment(LAST_VALUE_CACHE_METRIC_EVICTIONS)
+
+    def update(self, batch: List[list], insert: bool = False) -> None:
+        # Write-through: update the cached entries matching the written points.
+        with self._lock:
+            for database, retention_policy, point in batch:
+                tags = point.get(LAST_VALUE_CACHE_JSON_KEY_TAGS) or {}
+                time_seconds = point[LAST_VALUE_CACHE_JSON_KEY_TIME]
+                measurement = point[LAST_VALUE_CACHE_JSON_KEY_MEASUREMENT]
+                filters = set(self._filters.get((database, retention_policy, measurement), ()))
+                # Insert mode: the points are known to be the most recent ones (e.g. messages processed in chronological order), so the entries are created for the tags filters of the readers and the whole point tags.
+                if (insert == True):
+                    filters.add(tuple(sorted(str(name) for name in tags)))
+                for tags_names in filters:
+                    # Readers filter on a subset of the point tags.
+                    if any((name not in tags) for name in tags_names):
+                        continue
+                    tags_filter = tuple((name, str(tags[name])) for name in tags_names)
+                    for field, value in point[LAST_VALUE_CACHE_JSON_KEY_FIELDS].items():
+                        key = (database, retention_policy, measurement, tags_filter, field)
+                        entry = self._entries.get(key)
+                        if (entry is None) and (insert == True):
+                            self._entries[key] = [value, time_seconds, LastValueCache._format_time(time_seconds), time.monotonic()]
+                            metrics.increment(LAST_VALUE_CACHE_METRIC_UPDATES)
+                        # Older points (e.g. backfill) do not change the last value.
+                        elif (entry is not None) and (time_seconds >= entry[1]):
+                            entry[0] = value
+                            entry[1] = time_seconds
+                            entry[2] = LastValueCache._format_time(time_seconds)
+                            # Inserted values are known to be up to date.
+                            if (insert == True):
+                                entry[3] = time.monotonic()
+                                self._entries.move_to_end(key)
+                            metrics.increment(LAST_VALUE_CACHE_METRIC_UPDATES)
+            # Evict least recently used entries.
+            while (len(self._entries) > self._capacity):
+                self._entries.popitem(last=False)
+                metrics.increment(LAST_VALUE_CACHE_METRIC_EVICTIONS)
@@ -0,0 +1,84 @@
+"""
+* line_protocol.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+from typing import Any, Dict, List
+
+### LINE PROTOCOL macros ###
+
+LINE_PROTOCOL_SERIES_CACHE_MAX_SIZE = 10000
+
+LINE_PROTOCOL_JSON_KEY_TIME = "time"
+LINE_PROTOCOL_JSON_KEY_MEASUREMENT = "measurement"
+LINE_PROTOCOL_JSON_KEY_FIELDS = "fields"
+LINE_PROTOCOL_JSON_KEY_TAGS = "tags"
+
+### LINE PROTOCOL classes ###
+
+class LineProtocolEncoder:
+
+    def __init__(self) -> None:
+        # Escaped series key (measurement and sorted tags) of each measurement and tags set.
+        self._series_cache: Dict[tuple, str] = {}
+
+    @staticmethod
+    def _escape_measurement(measurement: str) -> str:
+        return measurement.replace(",", "\\,").replace(" ", "\\ ")
+
+    @staticmethod
+    def _escape_key(key: Any) -> str:
+        # Tag keys, tag values and field keys.
+        return str(key).replace("\\", "\\\\").replace(" ", "\\ ").replace(",", "\\,").replace("=", "\\=").replace("\n", "\\n")
+
+    @staticmethod
+    def _encode_field_value(value: Any) -> str:
+        # Bool must be checked before int.
+        if isinstance(value, bool):
+            return "true" if value else "false"
+        if isinstance(value, int):
+            return str(value) + "i"
+        if isinstance(value, float):
+            return repr(value)
+        return "\"" + str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") + "\""
+
+    def _get_series_key(self, measurement: str, tags: Dict[str, Any]) -> str:
+        # Tags of a given device are always built in the same order, so the cache does not need to sort them.
+        cache_key = (measurement, tuple(tags.items())) if tags else (measurement, None)
+        series_key = self._series_cache.get(cache_key)
+        if series_key is None:
+            series_key = LineProtocolEncoder._escape_measurement(measurement)
+            if tags:
+                for tag_key, tag_value in sorted(tags.items()):
+                    # Empty tag values are not allowed.
+                    if (tag_value is None) or (str(tag_value) == ""):
+                        continue
+                    series_key += ("," + LineProtocolEncoder._escape_key(tag_key) + "=" + LineProtocolEncoder._escape_key(tag_value))
+            # Bound memory usage.
+            if (len(self._series_cache) >= LINE_PROTOCOL_SERIES_CACHE_MAX_SIZE):
+                self._series_cache.clear()
+            self._series_cache[cache_key] = series_key
+        return series_key
+
+    def encode_point(self, point: Dict[str, Any]) -> str:
+        # Series key.
+        line = self._get_series_key(point[LINE_PROTOCOL_JSON_KEY_MEASUREMENT], point.get(LINE_PROTOCOL_JSON_KEY_TAGS))
+        # Fields.
+        fields = [(LineProtocolEncoder._escape_key(field_key) + "=" + LineProtocolEncoder._encode_field_value(field_value)) for field_key, field_value in sorted(point[LINE_PROTOCOL_JSON_KEY_FIELDS].items()) if (field_value is not None)]
+        if (len(fields) == 0):
+            return None
+        line += (" " + ",".join(fields))
+        # Timestamp.
+        if (point.get(LINE_PROTOCOL_JSON_KEY_TIME) is not None):
+            line += (" " + str(int(point[LINE_PROTOCOL_JSON_KEY_TIME])))
+        return line
+
+    def encode(self, points: List[Dict[str, Any]]) -> List[str]:
+        lines = []
+        for point in points:
+            line = self.encode_point(point)
+            if line is not None:
+                lines.append(line)
+        return lines
@@ -0,0 +1,71 @@
+"""
+* single_flight.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import threading
+import time
+
+from typing import Any, Callable, Dict, Hashable
+from utils.metrics import *
+
+### SINGLE FLIGHT macros ###
+
+SINGLE_FLIGHT_METRIC_CALLS = "_single_flight_calls"
+SINGLE_FLIGHT_METRIC_COLLAPSED = "_single_flight_collapsed"
+SINGLE_FLIGHT_METRIC_WAIT = "_single_flight_wait"
+SINGLE_FLIGHT_METRIC_COLLAPSE_RATIO = "_single_flight_collapse_ratio"
+
+### SINGLE FLIGHT classes ###
+
+class SingleFlightCall:
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+
+    def __init__(self, name: str) -> None:
+        # Init context.
+        self._name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, SingleFlightCall] = {}
+        metrics.register_gauge(self._name + SINGLE_FLIGHT_METRIC_COLLAPSE_RATIO, self.get_collapse_ratio)
+
+    def get_collapse_ratio(self) -> float:
+        # Ratio of the calls served by another identical call.
+        calls_count = metrics.get_counter(self._name + SINGLE_FLIGHT_METRIC_CALLS)
+        return (metrics.get_counter(self._name + SINGLE_FLIGHT_METRIC_COLLAPSED) / calls_count) if (calls_count > 0) else 0.0
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        metrics.increment(self._name + SINGLE_FLIGHT_METRIC_CALLS)
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if (leader == True):
+                call = SingleFlightCall()
+                self._calls[key] = call
+        # Identical call already in flight: wait for its result.
+        if (leader == False):
+            metrics.increment(self._name + SINGLE_FLIGHT_METRIC_COLLAPSED)
+            start_time = time.monotonic()
+            call.event.wait()
+            metrics.add_timing(self._name + SINGLE_FLIGHT_METRIC_WAIT, (time.monotonic() - start_time))
+            if call.error is not None:
+                raise call.error
+            return call.result
+        # Execute call and wake up waiters.
+        try:
+            call.result = function()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
@@ -0,0 +1,349 @@
+"""
+* spool.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import json
+import os
+import random
+import threading
+import time
+
+from typing import Any, Callable, Dict, List, Optional
+from utils.log import *
+from utils.metrics import *
+
+### SPOOL macros ###
+
+SPOOL_NAME_DEFAULT = "spool"
+
+SPOOL_SEGMENT_FILE_PREFIX = "spool_"
+SPOOL_SEGMENT_FILE_SUFFIX = ".log"
+SPOOL_CURSOR_FILE_NAME = "cursor.json"
+
+SPOOL_SEGMENT_MAX_SIZE_BYTES = (16 * 1024 * 1024)
+SPOOL_SEGMENTS_MIN_COUNT = 8
+SPOOL_FSYNC_PERIOD_SECONDS = 0.2
+SPOOL_RETRY_DELAY_MIN_SECONDS = 1.0
+SPOOL_RETRY_DELAY_MAX_SECONDS = 60.0
+# Batches written to InfluxDB in a single drain step.
+SPOOL_DRAIN_BATCHES_MAX = 64
+SPOOL_DRAIN_POINTS_MAX = 5000
+# Batches drained after the last cursor save are written again after a crash (which is idempotent for InfluxDB).
+SPOOL_CURSOR_SAVE_PERIOD_SECONDS = 1.0
+
+SPOOL_JSON_KEY_TIME = "time"
+SPOOL_JSON_KEY_POINTS = "points"
+SPOOL_JSON_KEY_SEGMENT = "segment"
+SPOOL_JSON_KEY_OFFSET = "offset"
+
+SPOOL_METRIC_DEPTH = "_depth"
+SPOOL_METRIC_SIZE = "_size_bytes"
+SPOOL_METRIC_AGE = "_age_seconds"
+SPOOL_METRIC_APPENDED = "_appended"
+SPOOL_METRIC_DRAINED = "_drained"
+SPOOL_METRIC_RETRIES = "_write_retries"
+SPOOL_METRIC_DROPPED = "_dropped"
+SPOOL_METRIC_CORRUPTED = "_corrupted"
+
+### SPOOL classes ###
+
+class Spool:
+
+    def __init__(self, directory: str, max_size_bytes: int, write_batch: Callable[[List[list]], bool], name: str = SPOOL_NAME_DEFAULT) -> None:
+        # Init context.
+        self._name = name
+        self._directory = directory
+        self._max_size_bytes = max_size_bytes
+        # Segments are small enough so that dropping the oldest one keeps the spool under its size limit.
+        self._segment_max_size_bytes = max(1, min(SPOOL_SEGMENT_MAX_SIZE_BYTES, (max_size_bytes // SPOOL_SEGMENTS_MIN_COUNT)))
+        self._write_batch = write_batch
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._running = True
+        self._resumed = False
+        # Segments state (sequence number -> number of pending batches and size).
+        self._segments_pending: Dict[int, int] = {}
+        self._segments_size: Dict[int, int] = {}
+        self._write_file = None
+        self._write_segment = 0
+        self._dirty = False
+        self._head_time = None
+        # Read cursor.
+        self._read_segment = 0
+        self._read_offset = 0
+        # Segment being drained (only accessed by the drain thread).
+        self._read_file = None
+        self._read_file_segment = 0
+        self._cursor_save_time = 0.0
+        # Recover previous state.
+        os.makedirs(self._directory, exist_ok=True)
+        self._recover()
+        # Always append to a new segment after a restart (the previous one may end with a partial line).
+        self._open_segment((max(self._segments_size) + 1) if self._segments_size else 1)
+        # Register metrics.
+        metrics.register_gauge(self._name + SPOOL_METRIC_DEPTH, self.get_depth)
+        metrics.register_gauge(self._name + SPOOL_METRIC_SIZE, self.get_size)
+        metrics.register_gauge(self._name + SPOOL_METRIC_AGE, self.get_age)
+        # Start threads.
+        self._drain_thread = threading.Thread(target=self._drain, name=(self._name + "_drain"), daemon=True)
+        self._drain_thread.start()
+        self._sync_thread = threading.Thread(target=self._sync, name=(self._name + "_sync"), daemon=True)
+        self._sync_thread.start()
+
+    def _get_segment_path(self, segment: int) -> str:
+        return os.path.join(self._directory, SPOOL_SEGMENT_FILE_PREFIX + f"{segment:012d}" + SPOOL_SEGMENT_FILE_SUFFIX)
+
+    def _recover(self) -> None:
+        # Read cursor.
+        try:
+            cursor_file = open(os.path.join(self._directory, SPOOL_CURSOR_FILE_NAME), "r")
+            cursor_json = json.load(cursor_file)
+            cursor_file.close()
+            self._read_segment = int(cursor_json[SPOOL_JSON_KEY_SEGMENT])
+            self._read_offset = int(cursor_json[SPOOL_JSON_KEY_OFFSET])
+        except:
+            self._read_segment = 0
+            self._read_offset = 0
+        # List segments.
+        for file_name in os.listdir(self._directory):
+            if not (file_name.startswith(SPOOL_SEGMENT_FILE_PREFIX) and file_name.endswith(SPOOL_SEGMENT_FILE_SUFFIX)):
+                continue
+            segment = int(file_name[len(SPOOL_SEGMENT_FILE_PREFIX):-len(SPOOL_SEGMENT_FILE_SUFFIX)])
+            segment_path = self._get_segment_path(segment)
+            # Remove segments already drained.
+            if (segment < self._read_segment):
+                os.remove(segment_path)
+                continue
+            # Count pending batches.
+            pending = 0
+            segment_file = open(segment_path, "rb")
+            if (segment == self._read_segment):
+                segment_file.seek(self._read_offset)
+            for line in segment_file:
+                if line.endswith(b"\n"):
+                    pending += 1
+            segment_file.close()
+            self._segments_pending[segment] = pending
+            self._segments_size[segment] = os.path.getsize(segment_path)
+        # Start reading from the oldest remaining segment.
+        if self._segments_size and (self._read_segment not in self._segments_size):
+            self._read_segment = min(self._segments_size)
+            self._read_offset = 0
+        if (self.get_depth() > 0):
+            Log.debug_print("[SPOOL] * Recovered " + str(self.get_depth()) + " pending batches from " + self._directory)
+
+    def _open_segment(self, segment: int) -> None:
+        # Close previous segment.
+        if self._write_file is not None:
+            self._write_file.flush()
+            os.fsync(self._write_file.fileno())
+            self._write_file.close()
+        self._write_segment = segment
+        self._write_file = open(self._get_segment_path(segment), "ab")
+        self._segments_pending.setdefault(segment, 0)
+        self._segments_size.setdefault(segment, 0)
+        if (self._read_segment == 0) or (self._read_segment not in self._segments_size):
+            self._read_segment = min(self._segments_size)
+            self._read_offset = 0
+
+    def _save_cursor(self, segment: int, offset: int) -> None:
+        # Atomic update of the cursor file (only called by the drain thread, without lock).
+        cursor_path = os.path.join(self._directory, SPOOL_CURSOR_FILE_NAME)
+        cursor_file = open(cursor_path + ".tmp", "w")
+        json.dump({SPOOL_JSON_KEY_SEGMENT: segment, SPOOL_JSON_KEY_OFFSET: offset}, cursor_file)
+        cursor_file.close()
+        os.replace(cursor_path + ".tmp", cursor_path)
+        self._cursor_save_time = time.monotonic()
+
+    def _close_read_file(self) -> None:
+        if self._read_file is not None:
+            self._read_file.close()
+            self._read_file = None
+
+    def _drop_oldest_segment(self) -> bool:
+        # Never drop the segment being written.
+        candidates = [segment for segment in self._segments_size if (segment != self._write_segment)]
+        if not candidates:
+            return False
+        segment = min(candidates)
+        dropped = self._segments_pending.pop(segment, 0)
+        self._segments_size.pop(segment, 0)
+        try:
+            os.remove(self._get_segment_path(segment))
+        except OSError:
+            pass
+        # Move cursor if needed.
+        if (self._read_segment == segment):
+            self._read_segment = min(self._segments_size)
+            self._read_offset = 0
+            self._head_time = None
+        metrics.increment(self._name + SPOOL_METRIC_DROPPED, dropped)
+        Log.debug_print("[SPOOL] * ERROR: spool size limit reached, " + str(dropped) + " batches dropped")
+        return True
+
+    def get_depth(self) -> int:
+        return sum(self._segments_pending.values())
+
+    def get_size(self) -> int:
+        return sum(self._segments_size.values())
+
+    def get_age(self) -> float:
+        head_time = self._head_time
+        if (head_time is None) or (self.get_depth() == 0):
+            return 0.0
+        return max(0.0, time.time() - head_time)
+
+    def append(self, points: List[list]) -> None:
+        # Serialize batch.
+        line = (json.dumps({SPOOL_JSON_KEY_TIME: time.time(), SPOOL_JSON_KEY_POINTS: points}, separators=(",", ":")) + "\n").encode()
+        with self._condition:
+            # Rotate segment.
+            if (self._segments_size[self._write_segment] > 0) and ((self._segments_size[self._write_segment] + len(line)) > self._segment_max_size_bytes):
+                self._open_segment(self._write_segment + 1)
+            # Enforce disk usage limit.
+            while ((self.get_size() + len(line)) > self._max_size_bytes):
+                if (self._drop_oldest_segment() == False):
+                    break
+            # Append batch (fsync is performed in background by the sync thread).
+            self._write_file.write(line)
+            self._write_file.flush()
+            self._dirty = True
+            self._segments_pending[self._write_segment] += 1
+            self._segments_size[self._write_segment] += len(line)
+            metrics.increment(self._name + SPOOL_METRIC_APPENDED)
+            self._condition.notify()
+
+    def resume(self) -> None:
+        # Retry the pending batches immediately (e.g. when the server is healthy again).
+        with self._condition:
+            self._resumed = True
+            self._condition.notify_all()
+
+    def _sync(self) -> None:
+        while self._running:
+            time.sleep(SPOOL_FSYNC_PERIOD_SECONDS)
+            with self._lock:
+                if (self._dirty == True) and (self._write_file is not None):
+                    os.fsync(self._write_file.fileno())
+                    self._dirty = False
+
+    def _get_pending(self) -> int:
+        # Must be called with lock held.
+        while True:
+            pending = self._segments_pending.get(self._read_segment, 0)
+            if (pending > 0):
+                return pending
+            # Move to next segment if the current one is complete.
+            if (self._read_segment != self._write_segment) and (self._read_segment in self._segments_size):
+                self._segments_pending.pop(self._read_segment, None)
+                self._segments_size.pop(self._read_segment, None)
+                if (self._read_file_segment == self._read_segment):
+                    self._close_read_file()
+                try:
+                    os.remove(self._get_segment_path(self._read_segment))
+                except OSError:
+                    pass
+                self._read_segment = min(self._segments_size)
+                self._read_offset = 0
+                continue
+            return 0
+
+    def _read_batches(self, segment: int, offset: int, batches_count: int) -> tuple:
+        # Local variables.
+        points = []
+        read_count = 0
+        # Keep the segment file open between drain steps.
+        if (self._read_file is None) or (self._read_file_segment != segment):
+            self._close_read_file()
+            try:
+                self._read_file = open(self._get_segment_path(segment), "rb")
+            except OSError:
+                # Segment dropped in the meantime.
+                return 0, offset, points
+            self._read_file_segment = segment
+        if (self._read_file.tell() != offset):
+            self._read_file.seek(offset)
+        # Read complete lines only.
+        while (read_count < batches_count) and (len(points) < SPOOL_DRAIN_POINTS_MAX):
+            line = self._read_file.readline()
+            if not line.endswith(b"\n"):
+                self._read_file.seek(offset)
+                break
+            offset += len(line)
+            read_count += 1
+            # Decode batch.
+            try:
+                batch = json.loads(line)
+                if (read_count == 1):
+                    self._head_time = batch.get(SPOOL_JSON_KEY_TIME)
+                points.extend(batch[SPOOL_JSON_KEY_POINTS])
+            except Exception:
+                metrics.increment(self._name + SPOOL_METRIC_CORRUPTED)
+        return read_count, offset, points
+
+    def _drain(self) -> None:
+        # Local variables.
+        retry_delay = SPOOL_RETRY_DELAY_MIN_SECONDS
+        while True:
+            # Wait for data.
+            with self._condition:
+                pending = self._get_pending()
+                while (pending == 0):
+                    if (self._running == False):
+                        return
+                    self._condition.wait(timeout=1.0)
+                    pending = self._get_pending()
+                segment = self._read_segment
+                offset = self._read_offset
+            # Several batches are read outside of the lock and written together.
+            read_count, next_offset, points = self._read_batches(segment, offset, min(pending, SPOOL_DRAIN_BATCHES_MAX))
+            if (read_count == 0):
+                with self._condition:
+                    self._condition.wait(timeout=1.0)
+                continue
+            # Write batches (the write function only fails when the points must be retried, permanently rejected points are skipped).
+            if (len(points) > 0) and (self._write_batch(points) == False):
+                metrics.increment(self._name + SPOOL_METRIC_RETRIES)
+                Log.debug_print("[SPOOL] * Write failed, retrying in " + str(round(retry_delay, 1)) + "s")
+                # Exponential backoff with jitter (stop waiting if the spool is closed).
+                with self._condition:
+                    if (self._running == False):
+                        return
+                    if (self._resumed == False):
+                        self._condition.wait(timeout=(retry_delay * random.uniform(0.5, 1.0)))
+                    if (self._resumed == True):
+                        self._resumed = False
+                        retry_delay = SPOOL_RETRY_DELAY_MIN_SECONDS
+                        continue
+                retry_delay = min(SPOOL_RETRY_DELAY_MAX_SECONDS, (retry_delay * 2.0))
+                continue
+            retry_delay = SPOOL_RETRY_DELAY_MIN_SECONDS
+            # Advance cursor (unless the segment was dropped in the meantime).
+            with self._condition:
+                if (segment == self._read_segment) and (segment in self._segments_pending):
+                    self._read_offset = next_offset
+                    self._segments_pending[segment] -= read_count
+                segment = self._read_segment
+                offset = self._read_offset
+            metrics.increment(self._name + SPOOL_METRIC_DRAINED, read_count)
+            # Save cursor periodically.
+            if ((time.monotonic() - self._cursor_save_time) >= SPOOL_CURSOR_SAVE_PERIOD_SECONDS):
+                self._save_cursor(segment, offset)
+
+    def close(self) -> None:
+        # Stop threads and flush file (remaining batches are replayed at next startup).
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self._drain_thread.join()
+        self._close_read_file()
+        self._save_cursor(self._read_segment, self._read_offset)
+        with self._lock:
+            if self._write_file is not None:
+                self._write_file.flush()
+                os.fsync(self._write_file.fileno())
+                self._write_file.close()
+                self._write_file = None
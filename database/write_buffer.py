@@ -0,0 +1,107 @@
+"""
+* write_buffer.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import threading
+import time
+
+from typing import Callable, List
+from utils.log import *
+from utils.metrics import *
+
+### WRITE BUFFER macros ###
+
+WRITE_BUFFER_METRIC_POINTS = "write_buffer_points"
+WRITE_BUFFER_METRIC_FLUSHES = "write_buffer_flushes"
+WRITE_BUFFER_METRIC_FLUSH_POINTS = "write_buffer_flush_points"
+WRITE_BUFFER_METRIC_FLUSH_LATENCY = "write_buffer_flush_latency"
+WRITE_BUFFER_METRIC_FLUSH_DURATION = "write_buffer_flush_duration"
+WRITE_BUFFER_METRIC_BACKPRESSURE = "write_buffer_backpressure"
+WRITE_BUFFER_METRIC_WRITE_ERRORS = "write_buffer_write_errors"
+
+### WRITE BUFFER classes ###
+
+class WriteBuffer:
+
+    def __init__(self, write_batch: Callable[[List[list]], bool], flush_size_points: int, max_latency_seconds: float, capacity_points: int) -> None:
+        # Init context.
+        self._write_batch = write_batch
+        self._flush_size_points = flush_size_points
+        self._max_latency_seconds = max_latency_seconds
+        self._capacity_points = max(capacity_points, flush_size_points)
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._running = True
+        # Points of all callbacks (grouped by database and retention policy when written).
+        self._points: List[list] = []
+        self._oldest_time = None
+        metrics.register_gauge(WRITE_BUFFER_METRIC_POINTS, lambda: len(self._points))
+        # Start flush thread.
+        self._flush_thread = threading.Thread(target=self._flush, name="write_buffer_flush", daemon=True)
+        self._flush_thread.start()
+
+    def append(self, batch: List[list]) -> bool:
+        with self._condition:
+            # Backpressure: wait for the flush thread when the buffer is full.
+            if (self._running == True) and ((len(self._points) + len(batch)) > self._capacity_points) and (len(self._points) > 0):
+                metrics.increment(WRITE_BUFFER_METRIC_BACKPRESSURE)
+                while (self._running == True) and ((len(self._points) + len(batch)) > self._capacity_points) and (len(self._points) > 0):
+                    self._condition.wait()
+            if (self._running == True):
+                first_points = (len(self._points) == 0)
+                if (first_points == True):
+                    self._oldest_time = time.monotonic()
+                self._points.extend(batch)
+                # Wake up flush thread to start the latency timer or when the size threshold is reached.
+                if ((first_points == True) or (len(self._points) >= self._flush_size_points)):
+                    self._condition.notify_all()
+                return True
+        # Buffer closed: points are written synchronously.
+        if (self._write_batch(batch) == False):
+            metrics.increment(WRITE_BUFFER_METRIC_WRITE_ERRORS, len(batch))
+            Log.debug_print("[WRITE BUFFER] * ERROR: failed to write " + str(len(batch)) + " points after close")
+            return False
+        return True
+
+    def _flush(self) -> None:
+        while True:
+            with self._condition:
+                # Wait for the size threshold or for the oldest point to reach the maximum latency.
+                while (self._running == True):
+                    if (len(self._points) >= self._flush_size_points):
+                        break
+                    if (len(self._points) > 0):
+                        remaining_seconds = (self._oldest_time + self._max_latency_seconds) - time.monotonic()
+                        if (remaining_seconds <= 0):
+                            break
+                        self._condition.wait(timeout=remaining_seconds)
+                    else:
+                        self._condition.wait()
+                if (len(self._points) == 0):
+                    # Stopped and empty.
+                    return
+                batch = self._points
+                latency = (time.monotonic() - self._oldest_time)
+                self._points = []
+                self._oldest_time = None
+                # Release producers.
+                self._condition.notify_all()
+            # Write outside of the lock.
+            start_time = time.monotonic()
+            if (self._write_batch(batch) == False):
+                metrics.increment(WRITE_BUFFER_METRIC_WRITE_ERRORS, len(batch))
+                Log.debug_print("[WRITE BUFFER] * ERROR: failed to write " + str(len(batch)) + " points")
+            metrics.increment(WRITE_BUFFER_METRIC_FLUSHES)
+            metrics.add_sample(WRITE_BUFFER_METRIC_FLUSH_POINTS, len(batch))
+            metrics.add_timing(WRITE_BUFFER_METRIC_FLUSH_LATENCY, latency)
+            metrics.add_timing(WRITE_BUFFER_METRIC_FLUSH_DURATION, (time.monotonic() - start_time))
+
+    def close(self) -> None:
+        # Flush remaining points and stop thread.
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self._flush_thread.join()
@@ -13,12 +13,10 @@ from utils.log import *
 ### ATXFOX public macros ###
 
 ATXFOX_DEVICE_TYPE_NAME = "atxfox"
-ATXFOX_SIGFOX_EP_ID_LIST = ep.get_tags_list(ATXFOX_DEVICE_TYPE_NAME, DATABASE_TAG_SIGFOX_EP_ID)
 
 ### ATXFOX local macros ###
 
-ATXFOX_TAG_RACK = ep.get_tags_list(ATXFOX_DEVICE_TYPE_NAME, DATABASE_TAG_RACK)
-ATXFOX_TAG_PSFE = ep.get_tags_list(ATXFOX_DEVICE_TYPE_NAME, DATABASE_TAG_PSFE)
+ATXFOX_TAGS_NAME = [DATABASE_TAG_RACK, DATABASE_TAG_PSFE]
 
 ATXFOX_UL_PAYLOAD_SIZE_MONITORING = 9
 ATXFOX_UL_PAYLOAD_SIZE_ERROR_STACK = 12
@@ -32,31 +30,9 @@ ATXFOX_ERROR_VALUE_MCU_TEMPERATURE = 0X7F
 
 class ATXFox:
 
-    @staticmethod
-    def _get_rack(sigfox_ep_id: str) -> str:
-        # Default is unknown.
-        rack = COMMON_UNKNOWN
-        if (sigfox_ep_id in ATXFOX_SIGFOX_EP_ID_LIST):
-            rack = ATXFOX_TAG_RACK[ATXFOX_SIGFOX_EP_ID_LIST.index(sigfox_ep_id)]
-        return rack
-    
-    @staticmethod
-    def _get_psfe(sigfox_ep_id: str) -> str:
-        # Default is unknown.
-        psfe = COMMON_UNKNOWN
-        if (sigfox_ep_id in ATXFOX_SIGFOX_EP_ID_LIST):
-            psfe = ATXFOX_TAG_PSFE[ATXFOX_SIGFOX_EP_ID_LIST.index(sigfox_ep_id)]
-        return psfe
-    
     @staticmethod
     def get_tags(sigfox_ep_id: str) -> Dict[str, Any]:
-        # Local variables.
-        tags = {
-            DATABASE_TAG_SIGFOX_EP_ID: sigfox_ep_id,
-            DATABASE_TAG_RACK: ATXFox._get_rack(sigfox_ep_id),
-            DATABASE_TAG_PSFE: ATXFox._get_psfe(sigfox_ep_id)
-        }
-        return tags
+        return ep.get_tags(sigfox_ep_id, ATXFOX_DEVICE_TYPE_NAME)
     
     @staticmethod
     def get_record_list(database: Database, timestamp: int, sigfox_ep_id: str, ul_payload: str) -> List[Record]:
@@ -122,3 +98,6 @@ class ATXFox:
         _ = sigfox_ep_id
         # No dynamic payload used.
         return dl_payload
+
+# Register device type.
+ep.register_device_type(ATXFOX_DEVICE_TYPE_NAME, ATXFox, DATABASE_ATXFOX, ATXFOX_TAGS_NAME)
@@ -13,11 +13,10 @@ from utils.log import *
 ### DINFOX public macros ###
 
 DINFOX_DEVICE_TYPE_NAME = "dinfox"
-DINFOX_SIGFOX_EP_ID_LIST = ep.get_tags_list(DINFOX_DEVICE_TYPE_NAME, DATABASE_TAG_SIGFOX_EP_ID)
 
 ### DINFOX local macros ###
 
-DINFOX_TAG_SYSTEM = ep.get_tags_list(DINFOX_DEVICE_TYPE_NAME, DATABASE_TAG_SYSTEM)
+DINFOX_TAGS_NAME = [DATABASE_TAG_SYSTEM]
 
 DINFOX_NODE_NAME = [ "lvrm", "bpsm", "ddrm", "uhfm", "gpsm", "sm", "dim", "rrm", "dmm", "mpmcm", "r4s8cr", "bcm" ]
 
@@ -198,15 +197,6 @@ class DINFox:
             power_factor = ((-1) ** (sign)) * (value / 100.0)
         return float(power_factor)
     
-    @staticmethod
-    def _get_system(sigfox_ep_id: str) -> str:
-        # Default is unknown.
-        system_name = COMMON_UNKNOWN
-        if (sigfox_ep_id in DINFOX_SIGFOX_EP_ID_LIST):
-            # Get system name.
-            system_name = DINFOX_TAG_SYSTEM[DINFOX_SIGFOX_EP_ID_LIST.index(sigfox_ep_id)]
-        return system_name
-    
     @staticmethod
     def _get_node_name(board_id: int) -> str:
         # Default is unknown.
@@ -228,12 +218,7 @@ class DINFox:
     
     @staticmethod
     def get_tags(sigfox_ep_id: str) -> Dict[str, Any]:
-        # Local variables.
-        tags = {
-            DATABASE_TAG_SIGFOX_EP_ID: sigfox_ep_id,
-            DATABASE_TAG_SYSTEM: DINFox._get_system(sigfox_ep_id)
-        }
-        return tags
+        return ep.get_tags(sigfox_ep_id, DINFOX_DEVICE_TYPE_NAME)
     
     @staticmethod
     def get_record_list(database: Database, timestamp: int, sigfox_ep_id: str, ul_payload: str) -> List[Record]:
@@ -731,7 +716,7 @@ class DINFox:
         # Local variables.
         dl_payload = []
         # Check ID.
-        if (sigfox_ep_id in DINFOX_SIGFOX_EP_ID_LIST):
+        if (ep.is_device_type(sigfox_ep_id, DINFOX_DEVICE_TYPE_NAME) == True):
             dl_payload = "0000000000000000"
         return dl_payload
 
@@ -741,3 +726,6 @@ class DINFox:
         _ = sigfox_ep_id
         # No dynamic payload used.
         return dl_payload
+
+# Register device type.
+ep.register_device_type(DINFOX_DEVICE_TYPE_NAME, DINFox, DATABASE_DINFOX, DINFOX_TAGS_NAME)
@@ -6,22 +6,73 @@
 """
 
 from database.database import *
+from ep.common import *
 import json
-from typing import Dict, List, Optional, Type
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Type
 from utils.configuration import *
+from utils.metrics import *
 
 ### EP LIST local macros ###
 
 EP_LIST_FILE_NAME = os.path.join(SIGFOX_EP_SERVER_PATH, "sigfox_ep_list.json")
 
+EP_LIST_WATCH_PERIOD_SECONDS = 5
+
+EP_METRIC_DEVICES_COUNT = "ep_devices_count"
+EP_METRIC_LOAD_TIME = "ep_list_load_time"
+EP_METRIC_RELOADS = "ep_list_reloads"
+EP_METRIC_RELOAD_ERRORS = "ep_list_reload_errors"
+
 ### EP LIST classes ###
 
+class EpEntry:
+
+    def __init__(self, sigfox_ep_id: str, device_type: str, metadata: Dict) -> None:
+        # Device description (class, database and tags are set when the device type is registered).
+        self.sigfox_ep_id = sigfox_ep_id
+        self.device_type = device_type
+        self.metadata = metadata
+        self.ep_class = None
+        self.database = None
+        self.tags: Dict[str, Any] = {}
+
+class EpSnapshot:
+
+    def __init__(self, device_types: Dict[str, List[Dict]], entries: Dict[str, EpEntry], file_stat: tuple) -> None:
+        # Immutable view of the devices list (replaced as a whole on reload).
+        self.device_types = device_types
+        self.entries = entries
+        self.file_stat = file_stat
+
 class Ep:
 
     def __init__(self) -> None:
         # Init context.
-        self._device_types: Dict[str, List[Dict]] = {}
+        self._registered_types: Dict[str, tuple] = {}
+        self._reload_lock = threading.Lock()
+        self._watcher = None
         # Load devices list.
+        self._snapshot = self._load()
+        if self._snapshot is None:
+            self._snapshot = EpSnapshot({}, {}, None)
+        metrics.register_gauge(EP_METRIC_DEVICES_COUNT, lambda: len(self._snapshot.entries))
+
+    @staticmethod
+    def _get_file_stat() -> Optional[tuple]:
+        try:
+            file_stat = os.stat(EP_LIST_FILE_NAME)
+            return (file_stat.st_mtime_ns, file_stat.st_size)
+        except OSError:
+            return None
+
+    def _load(self) -> Optional[EpSnapshot]:
+        # Local variables.
+        device_types: Dict[str, List[Dict]] = {}
+        entries: Dict[str, EpEntry] = {}
+        file_stat = Ep._get_file_stat()
         try:
             # Open file.
             sigfox_ep_list_file = open(EP_LIST_FILE_NAME, "r")
@@ -34,7 +85,7 @@ class Ep:
             for device_type, items in ep_list_json.items():
                 if not isinstance(items, list):
                     raise Exception
-                self._device_types[device_type] = []
+                device_types[device_type] = []
                 for item in items:
                     if not isinstance(item, dict):
                         raise Exception
@@ -43,23 +94,101 @@ class Ep:
                         raise Exception
                     meta = dict(item)
                     meta[DATABASE_TAG_SIGFOX_EP_ID] = Ep.format_sigfox_ep_id(sigfox_ep_id)
-                    self._device_types[device_type].append(meta)
+                    device_types[device_type].append(meta)
+                    # First declaration wins if an EP-ID is listed twice.
+                    if meta[DATABASE_TAG_SIGFOX_EP_ID] not in entries:
+                        entry = EpEntry(meta[DATABASE_TAG_SIGFOX_EP_ID], device_type, meta)
+                        self._update_entry(entry)
+                        entries[entry.sigfox_ep_id] = entry
         except:
-            return
+            return None
+        return EpSnapshot(device_types, entries, file_stat)
 
-    def _get_devices_list(self, device_type: str) -> List[Dict]:
-        return list(self._device_types.get(device_type, []))
+    @staticmethod
+    def _build_tags(sigfox_ep_id: str, metadata: Dict, tags_name: List[str]) -> Dict[str, Any]:
+        # Tags are built once and interned since they are attached to every record of the device.
+        tags = {DATABASE_TAG_SIGFOX_EP_ID: sys.intern(sigfox_ep_id)}
+        for tag_name in tags_name:
+            tags[tag_name] = sys.intern(str(metadata[tag_name])) if (tag_name in metadata) else COMMON_UNKNOWN
+        return tags
+
+    def _update_entry(self, entry: EpEntry) -> None:
+        # Apply device type registration.
+        if entry.device_type in self._registered_types:
+            entry.ep_class, entry.database, tags_name = self._registered_types[entry.device_type]
+            entry.tags = Ep._build_tags(entry.sigfox_ep_id, entry.metadata, tags_name)
+
+    def register_device_type(self, device_type: str, ep_class: Type, database: str, tags_name: List[str]) -> None:
+        with self._reload_lock:
+            self._registered_types[device_type] = (ep_class, database, list(tags_name))
+            # Update all devices of this type.
+            for entry in self._snapshot.entries.values():
+                if (entry.device_type == device_type):
+                    self._update_entry(entry)
+
+    def reload(self) -> bool:
+        with self._reload_lock:
+            # Build the new index off the hot path.
+            start_time = time.monotonic()
+            snapshot = self._load()
+            load_time = (time.monotonic() - start_time)
+            if snapshot is None:
+                metrics.increment(EP_METRIC_RELOAD_ERRORS)
+                Log.debug_print("[EP] * ERROR: failed to reload " + EP_LIST_FILE_NAME + " (previous devices list kept)")
+                # Do not retry until the file changes again.
+                self._snapshot = EpSnapshot(self._snapshot.device_types, self._snapshot.entries, Ep._get_file_stat())
+                return False
+            # Atomic swap: readers always see either the previous or the new list.
+            self._snapshot = snapshot
+        metrics.add_timing(EP_METRIC_LOAD_TIME, load_time)
+        metrics.increment(EP_METRIC_RELOADS)
+        Log.debug_print("[EP] * Devices list reloaded (" + str(len(snapshot.entries)) + " devices in " + str(round(load_time * 1000.0, 1)) + " ms)")
+        return True
+
+    def _watch(self, period_seconds: float) -> None:
+        while True:
+            time.sleep(period_seconds)
+            try:
+                if (Ep._get_file_stat() != self._snapshot.file_stat):
+                    self.reload()
+            except Exception as e:
+                Log.debug_print("[EP] * ERROR: devices list watcher (" + str(e) + ")")
+
+    def start_watcher(self, period_seconds: float = EP_LIST_WATCH_PERIOD_SECONDS) -> None:
+        # Poll the devices list file and reload it when modified.
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, args=(period_seconds,), name="ep_list_watcher", daemon=True)
+            self._watcher.start()
+
+    def get_entry(self, sigfox_ep_id: str) -> Optional[EpEntry]:
+        return self._snapshot.entries.get(sigfox_ep_id)
+
+    def is_device_type(self, sigfox_ep_id: str, device_type: str) -> bool:
+        entry = self._snapshot.entries.get(sigfox_ep_id)
+        return ((entry is not None) and (entry.device_type == device_type))
+
+    def get_tags(self, sigfox_ep_id: str, device_type: str) -> Dict[str, Any]:
+        entry = self._snapshot.entries.get(sigfox_ep_id)
+        # Return a copy since callers add their own specific tags.
+        if ((entry is not None) and (entry.device_type == device_type)):
+            return dict(entry.tags)
+        # Unknown device.
+        _, _, tags_name = self._registered_types.get(device_type, (None, None, []))
+        return Ep._build_tags(sigfox_ep_id, {}, tags_name)
+
+    def get_metadata(self, sigfox_ep_id: str, device_type: str, key: str) -> str:
+        entry = self._snapshot.entries.get(sigfox_ep_id)
+        if ((entry is not None) and (entry.device_type == device_type) and (key in entry.metadata)):
+            return entry.metadata[key]
+        return COMMON_UNKNOWN
 
     def get_sigfox_ep_id_list(self) -> List[str]:
         ep_id_list: List[str] = []
-        for device_list in self._device_types.values():
+        for device_list in self._snapshot.device_types.values():
             for device in device_list:
                 ep_id_list.append(device[DATABASE_TAG_SIGFOX_EP_ID])
         return ep_id_list
 
-    def get_tags_list(self, device_type: str, tag: str) -> Optional[Dict]:
-        return [d[tag] for d in self._get_devices_list(device_type)]
-
     @staticmethod
     def format_sigfox_ep_id(sigfox_ep_id) -> str:
         try:
@@ -13,12 +13,10 @@ from utils.log import *
 ### HOMEFOX public macros ###
 
 HOMEFOX_DEVICE_TYPE_NAME = "homefox"
-HOMEFOX_SIGFOX_EP_ID_LIST = ep.get_tags_list(HOMEFOX_DEVICE_TYPE_NAME, DATABASE_TAG_SIGFOX_EP_ID)
 
 ### HOMEFOX local macros ###
 
-HOMEFOX_TAG_SITE = ep.get_tags_list(HOMEFOX_DEVICE_TYPE_NAME, DATABASE_TAG_SITE)
-HOMEFOX_TAG_LOCATION = ep.get_tags_list(HOMEFOX_DEVICE_TYPE_NAME, DATABASE_TAG_LOCATION)
+HOMEFOX_TAGS_NAME = [DATABASE_TAG_SITE, DATABASE_TAG_LOCATION]
 
 HOMEFOX_UL_PAYLOAD_SIZE_MONITORING = 6
 HOMEFOX_UL_PAYLOAD_SIZE_ERROR_STACK = 12
@@ -38,31 +36,9 @@ HOMEFOX_ERROR_VALUE_ACQUISITION_MODE = 0x7
 
 class HomeFox:
 
-    @staticmethod
-    def _get_site(sigfox_ep_id: str) -> str:
-        # Default is unknown.
-        site = COMMON_UNKNOWN
-        if (sigfox_ep_id in HOMEFOX_SIGFOX_EP_ID_LIST):
-            site = HOMEFOX_TAG_SITE[HOMEFOX_SIGFOX_EP_ID_LIST.index(sigfox_ep_id)]
-        return site
-    
-    @staticmethod
-    def _get_location(sigfox_ep_id: str) -> str:
-        # Default is unknown.
-        location = COMMON_UNKNOWN
-        if (sigfox_ep_id in HOMEFOX_SIGFOX_EP_ID_LIST):
-            location = HOMEFOX_TAG_LOCATION[HOMEFOX_SIGFOX_EP_ID_LIST.index(sigfox_ep_id)]
-        return location
-    
     @staticmethod
     def get_tags(sigfox_ep_id: str) -> Dict[str, Any]:
-        # Local variables.
-        tags = {
-            DATABASE_TAG_SIGFOX_EP_ID: sigfox_ep_id,
-            DATABASE_TAG_SITE: HomeFox._get_site(sigfox_ep_id),
-            DATABASE_TAG_LOCATION: HomeFox._get_location(sigfox_ep_id)
-        }
-        return tags
+        return ep.get_tags(sigfox_ep_id, HOMEFOX_DEVICE_TYPE_NAME)
     
     @staticmethod
     def get_record_list(database: Database, timestamp: int, sigfox_ep_id: str, ul_payload: str) -> List[Record]:
@@ -157,7 +133,7 @@ class HomeFox:
         # Local variables.
         dl_payload = []
         # Check ID.
-        if (sigfox_ep_id in HOMEFOX_SIGFOX_EP_ID_LIST):
+        if (ep.is_device_type(sigfox_ep_id, HOMEFOX_DEVICE_TYPE_NAME) == True):
             dl_payload = "0000000000000000"
         return dl_payload
 
@@ -167,3 +143,6 @@ class HomeFox:
         _ = sigfox_ep_id
         # No dynamic payload used.
         return dl_payload
+
+# Register device type.
+ep.register_device_type(HOMEFOX_DEVICE_TYPE_NAME, HomeFox, DATABASE_HOMEFOX, HOMEFOX_TAGS_NAME)
@@ -17,11 +17,10 @@ from datetime import datetime, timedelta
 ### METEOFOX public macros ###
 
 METEOFOX_DEVICE_TYPE_NAME = "meteofox"
-METEOFOX_SIGFOX_EP_ID_LIST = ep.get_tags_list(METEOFOX_DEVICE_TYPE_NAME, DATABASE_TAG_SIGFOX_EP_ID)
 
 ### METEOFOX local macros ###
 
-METEOFOX_TAG_SITE = ep.get_tags_list(METEOFOX_DEVICE_TYPE_NAME, DATABASE_TAG_SITE)
+METEOFOX_TAGS_NAME = [DATABASE_TAG_SITE]
 
 METEOFOX_UL_PAYLOAD_SIZE_MONITORING = 9
 
@@ -85,20 +84,11 @@ class MeteoFox:
     
     @staticmethod
     def _get_site(sigfox_ep_id: str) -> str:
-        # Default is unknown.
-        site = COMMON_UNKNOWN
-        if (sigfox_ep_id in METEOFOX_SIGFOX_EP_ID_LIST):
-            site = METEOFOX_TAG_SITE[METEOFOX_SIGFOX_EP_ID_LIST.index(sigfox_ep_id)]
-        return site
-
+        return ep.get_metadata(sigfox_ep_id, METEOFOX_DEVICE_TYPE_NAME, DATABASE_TAG_SITE)
+    
     @staticmethod
     def get_tags(sigfox_ep_id: str) -> Dict[str, Any]:
-        # Local variables.
-        tags = {
-            DATABASE_TAG_SIGFOX_EP_ID: sigfox_ep_id,
-            DATABASE_TAG_SITE: MeteoFox._get_site(sigfox_ep_id)
-        }
-        return tags
+        return ep.get_tags(sigfox_ep_id, METEOFOX_DEVICE_TYPE_NAME)
 
     @staticmethod
     def get_record_list(database: Database, timestamp: int, sigfox_ep_id: str, ul_payload: str) -> List[Record]:
@@ -106,7 +96,7 @@ class MeteoFox:
         data_type = DATABASE_FIELD_DATA_TYPE_UNKNOWN
         record_list = []
         record = Record()
-        where_clause = DATABASE_TAG_SITE + "='" + MeteoFox._get_site(sigfox_ep_id) + "'"
+        site_tags = {DATABASE_TAG_SITE: MeteoFox._get_site(sigfox_ep_id)}
         # Common properties.
         record.database = DATABASE_METEOFOX
         record.timestamp = timestamp
@@ -124,8 +114,9 @@ class MeteoFox:
         # Other frames format depends on software version.
         else:
             # Read software version.
-            sw_version_major_query, _ = database.read_field(DATABASE_METEOFOX, where_clause, DATABASE_MEASUREMENT_METADATA, DATABASE_FIELD_SW_VERSION_MAJOR, False)
-            sw_version_minor_query, _ = database.read_field(DATABASE_METEOFOX, where_clause, DATABASE_MEASUREMENT_METADATA, DATABASE_FIELD_SW_VERSION_MINOR, False)
+            sw_version = database.read_fields(DATABASE_METEOFOX, site_tags, [(DATABASE_MEASUREMENT_METADATA, DATABASE_FIELD_SW_VERSION_MAJOR, False), (DATABASE_MEASUREMENT_METADATA, DATABASE_FIELD_SW_VERSION_MINOR, False)])
+            sw_version_major_query, _ = sw_version[(DATABASE_MEASUREMENT_METADATA, DATABASE_FIELD_SW_VERSION_MAJOR, False)]
+            sw_version_minor_query, _ = sw_version[(DATABASE_MEASUREMENT_METADATA, DATABASE_FIELD_SW_VERSION_MINOR, False)]
             # Check results.
             if ((sw_version_major_query is not None) and (sw_version_minor_query is not None)):
                 sw_version_major = int(sw_version_major_query)
@@ -379,7 +370,7 @@ class MeteoFox:
                     pressure_atmospheric_sea_level_hpa = pressure_atmospheric_error_value
                     if ((pressure_atmospheric_absolute_pa != pressure_atmospheric_error_value) and (temperature_signed_magnitude != temperature_error_value)):
                         try:
-                            altitude_query, _ = database.read_field(DATABASE_METEOFOX, where_clause, DATABASE_MEASUREMENT_GEOLOCATION, DATABASE_FIELD_GEOLOCATION_ALTITUDE, True)
+                            altitude_query, _ = database.read_field(DATABASE_METEOFOX, site_tags, DATABASE_MEASUREMENT_GEOLOCATION, DATABASE_FIELD_GEOLOCATION_ALTITUDE, True)
                             if (altitude_query):
                                 altitude = int(altitude_query)
                                 Log.debug_print("[METEOFOX] * Computing sea-level pressure at altitude " + str(altitude) + "m")
@@ -417,14 +408,14 @@ class MeteoFox:
         # Local variables.
         dl_payload = []
         # Check ID.
-        if (sigfox_ep_id in METEOFOX_SIGFOX_EP_ID_LIST):
+        if (ep.is_device_type(sigfox_ep_id, METEOFOX_DEVICE_TYPE_NAME) == True):
             dl_payload = "0000000000000000"
         return dl_payload
 
     @staticmethod
     def update_dl_payload(sigfox_ep_id: str, dl_payload: str) -> str:
         # Check ID.
-        if (sigfox_ep_id in METEOFOX_SIGFOX_EP_ID_LIST):
+        if (ep.is_device_type(sigfox_ep_id, METEOFOX_DEVICE_TYPE_NAME) == True):
             # Convert to byte array.
             payload_bytes = bytearray.fromhex(dl_payload)
             # Check operation code.
@@ -441,3 +432,6 @@ class MeteoFox:
             # Convert to string.
             dl_payload = payload_bytes.hex().lower()
         return dl_payload
+
+# Register device type.
+ep.register_device_type(METEOFOX_DEVICE_TYPE_NAME, MeteoFox, DATABASE_METEOFOX, METEOFOX_TAGS_NAME)
@@ -13,13 +13,10 @@ from utils.log import *
 ### SENSIT public macros ###
 
 SENSIT_DEVICE_TYPE_NAME = "sensit"
-SENSIT_SIGFOX_EP_ID_LIST = ep.get_tags_list(SENSIT_DEVICE_TYPE_NAME, DATABASE_TAG_SIGFOX_EP_ID)
 
 ### SENSIT local macros ###
 
-SENSIT_TAG_SITE = ep.get_tags_list(SENSIT_DEVICE_TYPE_NAME, DATABASE_TAG_SITE)
-SENSIT_TAG_LOCATION = ep.get_tags_list(SENSIT_DEVICE_TYPE_NAME, DATABASE_TAG_LOCATION)
-SENSIT_TAG_VERSION = ep.get_tags_list(SENSIT_DEVICE_TYPE_NAME, DATABASE_TAG_VERSION)
+SENSIT_TAGS_NAME = [DATABASE_TAG_SITE, DATABASE_TAG_LOCATION]
 
 SENSIT_UL_PAYLOAD_SIZE_MONITORING = 4
 SENSIT_UL_PAYLOAD_SIZE_CONFIGURATION = 12
@@ -33,39 +30,13 @@ SENSIT_ERROR_VALUE_HUMIDITY = 0xFF
 
 class Sensit:
 
-    @staticmethod
-    def _get_site(sigfox_ep_id: str) -> str:
-        # Default is unknown.
-        site = COMMON_UNKNOWN
-        if (sigfox_ep_id in SENSIT_SIGFOX_EP_ID_LIST):
-            site = SENSIT_TAG_SITE[SENSIT_SIGFOX_EP_ID_LIST.index(sigfox_ep_id)]
-        return site
-    
-    @staticmethod
-    def _get_location(sigfox_ep_id: str) -> str:
-        # Default is unknown.
-        location = COMMON_UNKNOWN
-        if (sigfox_ep_id in SENSIT_SIGFOX_EP_ID_LIST):
-            location = SENSIT_TAG_LOCATION[SENSIT_SIGFOX_EP_ID_LIST.index(sigfox_ep_id)]
-        return location
-
     @staticmethod
     def _get_version(sigfox_ep_id: str) -> str:
-        # Default is unknown.
-        version = COMMON_UNKNOWN
-        if (sigfox_ep_id in SENSIT_SIGFOX_EP_ID_LIST):
-            version = SENSIT_TAG_VERSION[SENSIT_SIGFOX_EP_ID_LIST.index(sigfox_ep_id)]
-        return version
+        return ep.get_metadata(sigfox_ep_id, SENSIT_DEVICE_TYPE_NAME, DATABASE_TAG_VERSION)
     
     @staticmethod
     def get_tags(sigfox_ep_id: str) -> Dict[str, Any]:
-        # Local variables.
-        tags = {
-            DATABASE_TAG_SIGFOX_EP_ID: sigfox_ep_id,
-            DATABASE_TAG_SITE: Sensit._get_site(sigfox_ep_id),
-            DATABASE_TAG_LOCATION: Sensit._get_location(sigfox_ep_id)
-        }
-        return tags
+        return ep.get_tags(sigfox_ep_id, SENSIT_DEVICE_TYPE_NAME)
     
     @staticmethod
     def get_record_list(database: Database, timestamp: int, sigfox_ep_id: str, ul_payload: str) -> List[Record]:
@@ -127,7 +98,7 @@ class Sensit:
         dl_payload = []
         sensit_version = Sensit._get_version(sigfox_ep_id)
         # Check ID.
-        if (sigfox_ep_id in SENSIT_SIGFOX_EP_ID_LIST):
+        if (ep.is_device_type(sigfox_ep_id, SENSIT_DEVICE_TYPE_NAME) == True):
             # Check version.
             if (sensit_version.find("V3") >= 0):
                 dl_payload = "7F003F0F0004323C"
@@ -141,3 +112,6 @@ class Sensit:
         _ = sigfox_ep_id
         # No dynamic payload used.
         return dl_payload
+
+# Register device type.
+ep.register_device_type(SENSIT_DEVICE_TYPE_NAME, Sensit, DATABASE_SENSIT, SENSIT_TAGS_NAME)
@@ -13,11 +13,10 @@ from utils.log import *
 ### SMARTTAG public macros ###
 
 SMARTTAG_DEVICE_TYPE_NAME = "smarttag"
-SMARTTAG_SIGFOX_EP_ID_LIST = ep.get_tags_list(SMARTTAG_DEVICE_TYPE_NAME, DATABASE_TAG_SIGFOX_EP_ID)
 
 ### SMARTTAG local macros ###
 
-SMARTTAG_TAG_NAME = ep.get_tags_list(SMARTTAG_DEVICE_TYPE_NAME, DATABASE_TAG_NAME)
+SMARTTAG_TAGS_NAME = [DATABASE_TAG_NAME]
 
 SMARTTAG_UL_PAYLOAD_SIZE = 4
 
@@ -43,22 +42,9 @@ SMARTTAG_ERROR_VALUE_INTERRUPT_COUNT = 0xFF
 
 class SmartTag:
 
-    @staticmethod
-    def _get_name(sigfox_ep_id: str) -> str:
-        # Default is unknown.
-        name = COMMON_UNKNOWN
-        if (sigfox_ep_id in SMARTTAG_SIGFOX_EP_ID_LIST):
-            name = SMARTTAG_TAG_NAME[SMARTTAG_SIGFOX_EP_ID_LIST.index(sigfox_ep_id)]
-        return name
-    
     @staticmethod
     def get_tags(sigfox_ep_id: str) -> Dict[str, Any]:
-        # Local variables.
-        tags = {
-            DATABASE_TAG_SIGFOX_EP_ID: sigfox_ep_id,
-            DATABASE_TAG_NAME: SmartTag._get_name(sigfox_ep_id)
-        }
-        return tags
+        return ep.get_tags(sigfox_ep_id, SMARTTAG_DEVICE_TYPE_NAME)
     
     @staticmethod
     def get_record_list(database: Database, timestamp: int, sigfox_ep_id: str, ul_payload: str) -> List[Record]:
@@ -204,3 +190,6 @@ class SmartTag:
         _ = sigfox_ep_id
         # No dynamic payload used.
         return dl_payload
+
+# Register device type.
+ep.register_device_type(SMARTTAG_DEVICE_TYPE_NAME, SmartTag, DATABASE_SMARTTAG, SMARTTAG_TAGS_NAME)
@@ -13,11 +13,10 @@ from utils.log import *
 ### TRACKFOX public macros ###
 
 TRACKFOX_DEVICE_TYPE_NAME = "trackfox"
-TRACKFOX_SIGFOX_EP_ID_LIST = ep.get_tags_list(TRACKFOX_DEVICE_TYPE_NAME, DATABASE_TAG_SIGFOX_EP_ID)
 
 ### TRACKFOX local macros ###
 
-TRACKFOX_TAG_ASSET = ep.get_tags_list(TRACKFOX_DEVICE_TYPE_NAME, DATABASE_TAG_ASSET)
+TRACKFOX_TAGS_NAME = [DATABASE_TAG_ASSET]
 
 TRACKFOX_UL_PAYLOAD_SIZE_MONITORING = 7
 TRACKFOX_UL_PAYLOAD_SIZE_GEOLOCATION_ERROR = 4
@@ -32,22 +31,9 @@ TRACKFOX_ERROR_VALUE_STORAGE_VOLTAGE = 0xFFFF
 
 class TrackFox:
 
-    @staticmethod
-    def _get_asset(sigfox_ep_id: str) -> str:
-        # Default is unknown.
-        asset = COMMON_UNKNOWN
-        if (sigfox_ep_id in TRACKFOX_SIGFOX_EP_ID_LIST):
-            asset = TRACKFOX_TAG_ASSET[TRACKFOX_SIGFOX_EP_ID_LIST.index(sigfox_ep_id)]
-        return asset
-    
     @staticmethod
     def get_tags(sigfox_ep_id: str) -> Dict[str, Any]:
-        # Local variables.
-        tags = {
-            DATABASE_TAG_SIGFOX_EP_ID: sigfox_ep_id,
-            DATABASE_TAG_ASSET: TrackFox._get_asset(sigfox_ep_id)
-        }
-        return tags
+        return ep.get_tags(sigfox_ep_id, TRACKFOX_DEVICE_TYPE_NAME)
     
     @staticmethod
     def get_record_list(database: Database, timestamp: int, sigfox_ep_id: str, ul_payload: str) -> List[Record]:
@@ -137,3 +123,6 @@ class TrackFox:
         _ = sigfox_ep_id
         # No dynamic payload used.
         return dl_payload
+
+# Register device type.
+ep.register_device_type(TRACKFOX_DEVICE_TYPE_NAME, TrackFox, DATABASE_TRACKFOX, TRACKFOX_TAGS_NAME)
@@ -18,35 +18,64 @@ from ep.meteofox import *
 from ep.sensit import *
 from ep.smarttag import *
 from ep.trackfox import *
+from concurrent.futures import ThreadPoolExecutor
 from http.server import BaseHTTPRequestHandler, HTTPServer
 import argparse
 import time
 import threading
+from typing import Any, Dict, List, Optional
 from urllib.parse import urlparse, parse_qs
+from utils.async_server import *
 from utils.configuration import *
+from utils.downlink_store import *
+from utils.ingest_queue import *
 from utils.log import *
+from utils.metrics import *
+from utils.response_cache import *
 from utils.sigfox_cloud import *
+from utils.ttl_cache import *
 
 ### SIGFOX EP SERVER macros ###
 
 SIGFOX_UL_PAYLOAD_SIZE_ATLAS_WIFI = 12
 SIGFOX_DL_PAYLOAD_SIZE_BYTES = 8
 
-SIGFOX_EP_DL_MESSAGES_JSON_KEY = "dl_messages_list"
-SIGFOX_EP_DL_MESSAGES_JSON_KEY_RECORD_TIME = "record_time"
-SIGFOX_EP_DL_MESSAGES_JSON_KEY_SIGFOX_EP_ID = "sigfox_ep_id"
-SIGFOX_EP_DL_MESSAGES_JSON_KEY_DL_PAYLOAD = "dl_payload"
-SIGFOX_EP_DL_MESSAGES_JSON_KEY_PERMANENT = "permanent"
+SIGFOX_EP_SERVER_WORKERS_DEFAULT = 16
+SIGFOX_EP_SERVER_WORKERS_BACKLOG_FACTOR = 4
+SIGFOX_EP_SERVER_SOCKET_TIMEOUT_SECONDS = 10
+
+SIGFOX_EP_SERVER_CALLBACK_MANDATORY_KEYS = {
+    SIGFOX_CLOUD_CALLBACK_TYPE_DATA_UPLINK: [SIGFOX_CLOUD_CALLBACK_JSON_KEY_MESSAGE_COUNTER, SIGFOX_CLOUD_CALLBACK_JSON_KEY_UL_PAYLOAD],
+    SIGFOX_CLOUD_CALLBACK_TYPE_DATA_BIDIR: [SIGFOX_CLOUD_CALLBACK_JSON_KEY_MESSAGE_COUNTER, SIGFOX_CLOUD_CALLBACK_JSON_KEY_UL_PAYLOAD, SIGFOX_CLOUD_CALLBACK_JSON_KEY_BIDIRECTIONAL_FLAG],
+    SIGFOX_CLOUD_CALLBACK_TYPE_DATA_ADVANCED: [SIGFOX_CLOUD_CALLBACK_JSON_KEY_MESSAGE_COUNTER, SIGFOX_CLOUD_CALLBACK_JSON_KEY_UL_PAYLOAD, SIGFOX_CLOUD_CALLBACK_JSON_KEY_GEOLOCATION],
+    SIGFOX_CLOUD_CALLBACK_TYPE_SERVICE_ACKNOWLEDGE: [SIGFOX_CLOUD_CALLBACK_JSON_KEY_DL_PAYLOAD, SIGFOX_CLOUD_CALLBACK_JSON_KEY_DL_SUCCESS, SIGFOX_CLOUD_CALLBACK_JSON_KEY_DL_STATUS]
+}
 
 SIGFOX_EP_SERVER_API_RATE_LIMIT_REQUESTS = 10
 SIGFOX_EP_SERVER_API_RATE_LIMIT_WINDOW_SECONDS = 60
 SIGFOX_EP_SERVER_API_KEY_EP = "ep"
 SIGFOX_EP_SERVER_API_KEY_LATEST = "latest"
+SIGFOX_EP_SERVER_API_KEY_METRICS = "metrics"
+SIGFOX_EP_SERVER_API_KEY_BATCH = "batch"
+SIGFOX_EP_SERVER_API_KEY_STATUS = "status"
+SIGFOX_EP_SERVER_API_KEY_RESPONSE = "response"
+SIGFOX_EP_SERVER_BATCH_MAX_SIZE = 1000
+SIGFOX_EP_SERVER_METRIC_BATCH_CALLBACKS = "batch_callbacks"
+SIGFOX_EP_SERVER_METRIC_DOWNLINK_RESPONSE_TIME = "downlink_response_time"
+SIGFOX_EP_SERVER_CONTRACT_CACHE_TTL_SECONDS = 86400
+SIGFOX_EP_SERVER_CONTRACT_CACHE_NEGATIVE_TTL_SECONDS = 300
+SIGFOX_EP_SERVER_CONTRACT_CACHE_REFRESH_AHEAD_SECONDS = 3600
+# Sigfox cloud API lookups of the callbacks: no retry and bounded rate limiter wait.
+SIGFOX_EP_SERVER_CLOUD_API_MAX_RETRIES = 0
+SIGFOX_EP_SERVER_CLOUD_API_MAX_WAIT_SECONDS = 1.0
 SIGFOX_EP_SERVER_API_KEY_MEASUREMENT = "measurement"
 SIGFOX_EP_SERVER_API_KEY_FIELD = "field"
 SIGFOX_EP_SERVER_API_KEY_TAGS = "tags"
 SIGFOX_EP_SERVER_API_KEY_TIMESTAMP = "timestamp"
 SIGFOX_EP_SERVER_API_KEY_VALUE = "value"
+SIGFOX_EP_SERVER_RESPONSE_CACHE_CAPACITY = 10000
+SIGFOX_EP_SERVER_RESPONSE_CACHE_TTL_SECONDS = 300
+SIGFOX_EP_SERVER_RESPONSE_CACHE_NEGATIVE_TTL_SECONDS = 30
 
 ### SIGFOX EP SERVER classes ###
 
@@ -75,36 +104,74 @@ class RateLimiter:
                 return 0
             return max(0, int(self._window_seconds - (now - self._requests[0])) + 1)
 
+class CallbackContext:
+
+    def __init__(self, sigfox_ep_id: str) -> None:
+        # Per-request scratch state (never shared between concurrent callbacks).
+        self.sigfox_ep_id = sigfox_ep_id
+        self.ep_entry = None
+        self.ep_class = None
+        self.ep_database = None
+        self.downlink_hash = 0
+
+class DeferredCallback:
+
+    def __init__(self, json_in: dict) -> None:
+        # Callback processed once the HTTP response has been sent.
+        self.json_in = json_in
+
 class SigfoxEpServer:
     
     def __init__(self) -> None :
         # Init context.
         self._database = Database()
-        self._downlink_hash = 0
-        self._ep_class = None
-        self._ep_database = None
+        if (SIGFOX_EP_SERVER_SPOOL_ENABLED == True):
+            self._database.enable_spool(SIGFOX_EP_SERVER_SPOOL_PATH, (SIGFOX_EP_SERVER_SPOOL_MAX_SIZE_MB * 1024 * 1024))
+        else:
+            # Failed writes are diverted to disk until InfluxDB is healthy again.
+            self._database.enable_diverted_spool(SIGFOX_EP_SERVER_DIVERTED_SPOOL_PATH, (SIGFOX_EP_SERVER_SPOOL_MAX_SIZE_MB * 1024 * 1024))
+            if (SIGFOX_EP_SERVER_WRITE_BUFFER_ENABLED == True):
+                self._database.enable_write_buffer(SIGFOX_EP_SERVER_WRITE_BUFFER_FLUSH_SIZE, (SIGFOX_EP_SERVER_WRITE_BUFFER_MAX_LATENCY_MS / 1000.0), SIGFOX_EP_SERVER_WRITE_BUFFER_CAPACITY)
+        self._downlink_hash = {}
+        self._downlink_hash_lock = threading.Lock()
+        self._downlink_store = None
+        self._default_dl_payloads = {}
+        # Atlas WiFi contract lookups (persisted so that a restart does not start with an empty cache).
+        self._contract_id_cache = TtlCache("contract_id", self._read_contract_id, SIGFOX_EP_SERVER_CONTRACT_CACHE_TTL_SECONDS, SIGFOX_EP_SERVER_CONTRACT_CACHE_NEGATIVE_TTL_SECONDS, SIGFOX_EP_SERVER_CONTRACT_CACHE_REFRESH_AHEAD_SECONDS, os.path.join(SIGFOX_EP_SERVER_PATH, "sigfox_ep_contract_id_cache.json"))
+        self._geolocation_level_cache = TtlCache("geolocation_level", self._read_geolocation_level, SIGFOX_EP_SERVER_CONTRACT_CACHE_TTL_SECONDS, SIGFOX_EP_SERVER_CONTRACT_CACHE_NEGATIVE_TTL_SECONDS, SIGFOX_EP_SERVER_CONTRACT_CACHE_REFRESH_AHEAD_SECONDS, os.path.join(SIGFOX_EP_SERVER_PATH, "sigfox_ep_geolocation_level_cache.json"))
         self._api_key = SIGFOX_EP_SERVER_API_KEY
-        # Init downlink messages file.
-        self._check_dl_messages_file()
+        self._rate_limiter = RateLimiter(SIGFOX_EP_SERVER_API_RATE_LIMIT_REQUESTS, SIGFOX_EP_SERVER_API_RATE_LIMIT_WINDOW_SECONDS)
+        # Latest data responses (invalidated when matching points are written).
+        self._response_cache = ResponseCache(SIGFOX_EP_SERVER_RESPONSE_CACHE_CAPACITY, SIGFOX_EP_SERVER_RESPONSE_CACHE_TTL_SECONDS, SIGFOX_EP_SERVER_RESPONSE_CACHE_NEGATIVE_TTL_SECONDS)
+        self._database.add_write_listener(self._response_cache.invalidate)
+        self._ingest_queue = None
+        # Reload devices list when modified.
+        ep.start_watcher()
+        # Init downlink messages store.
+        self._init_downlink_store()
         # Update Git version in database.
         self._update_git_version()
+        # Start background ingestion workers.
+        if (SIGFOX_EP_SERVER_INGEST_QUEUE_ENABLED == True):
+            if (SIGFOX_EP_SERVER_INGEST_QUEUE_OVERFLOW_POLICY not in INGEST_QUEUE_OVERFLOW_POLICY_LIST):
+                Log.debug_print("[SIGFOX EP SERVER] * ERROR: invalid ingest queue overflow policy (" + SIGFOX_EP_SERVER_INGEST_QUEUE_OVERFLOW_POLICY + ")")
+                exit(1)
+            Log.debug_print("[SIGFOX EP SERVER] * Starting ingest queue (depth=" + str(SIGFOX_EP_SERVER_INGEST_QUEUE_DEPTH) + " workers=" + str(SIGFOX_EP_SERVER_INGEST_QUEUE_WORKERS) + " overflow_policy=" + SIGFOX_EP_SERVER_INGEST_QUEUE_OVERFLOW_POLICY + ")")
+            self._ingest_queue = IngestQueue(self._process_callback_in_background, SIGFOX_EP_SERVER_INGEST_QUEUE_DEPTH, SIGFOX_EP_SERVER_INGEST_QUEUE_WORKERS, SIGFOX_EP_SERVER_INGEST_QUEUE_OVERFLOW_POLICY)
 
-    def _check_dl_messages_file(self) -> None:
-        # Check if file already exists.
+    def _init_downlink_store(self) -> None:
         Log.debug_print("")
         try:
-            # Open file.
-            dl_messages_file = open(SIGFOX_EP_DL_MESSAGES_FILE_PATH, "r")
-            dl_messages_json = json.load(dl_messages_file)
-            dl_messages_file.close()
-            # Check header.
-            if (SIGFOX_EP_DL_MESSAGES_JSON_KEY not in dl_messages_json):
-                raise Exception
+            # Load journal and import pending messages of the downlink messages file.
+            self._downlink_store = DownlinkStore(SIGFOX_EP_DL_MESSAGES_JOURNAL_PATH)
+            self._downlink_store.import_inbox(SIGFOX_EP_DL_MESSAGES_FILE_PATH)
             Log.debug_print("[SIGFOX EP SERVER] * Downlink messages file found")
         except Exception as e:
             # Stop server.
             Log.debug_print("[SIGFOX EP SERVER] * ERROR: Failed to load downlink messages file (" + str(e) + ")")
             exit(1)
+        # Watch downlink messages file for new messages.
+        self._downlink_store.start_inbox_watcher(SIGFOX_EP_DL_MESSAGES_FILE_PATH)
 
     def _update_git_version(self) -> None:
         # Local variables.
@@ -146,114 +213,86 @@ class SigfoxEpServer:
         except:
             return
 
-    def _set_ep_class_and_database(self, sigfox_ep_id: str) -> None:
-        # ATXFox.
-        if (sigfox_ep_id in ATXFOX_SIGFOX_EP_ID_LIST):
-            self._ep_class = ATXFox
-            self._ep_database = DATABASE_ATXFOX
-        # DinFox.
-        elif (sigfox_ep_id in DINFOX_SIGFOX_EP_ID_LIST):
-            self._ep_class = DINFox
-            self._ep_database = DATABASE_DINFOX
-        # HomeFox.
-        elif (sigfox_ep_id in HOMEFOX_SIGFOX_EP_ID_LIST):
-            self._ep_class = HomeFox
-            self._ep_database = DATABASE_HOMEFOX
-        # MeteoFox.
-        elif (sigfox_ep_id in METEOFOX_SIGFOX_EP_ID_LIST):
-            self._ep_class = MeteoFox
-            self._ep_database = DATABASE_METEOFOX
-        # Sensit.
-        elif (sigfox_ep_id in SENSIT_SIGFOX_EP_ID_LIST):
-            self._ep_class = Sensit
-            self._ep_database = DATABASE_SENSIT
-        # SmartTag.
-        elif (sigfox_ep_id in SMARTTAG_SIGFOX_EP_ID_LIST):
-            self._ep_class = SmartTag
-            self._ep_database = DATABASE_SMARTTAG
-        # TrackFox.
-        elif (sigfox_ep_id in TRACKFOX_SIGFOX_EP_ID_LIST):
-            self._ep_class = TrackFox
-            self._ep_database = DATABASE_TRACKFOX
-        # Unknown device.
-        else:
-            self._ep_class = None
-            self._ep_database = None
+    def _get_callback_context(self, sigfox_ep_id: str) -> CallbackContext:
+        # Local variables.
+        context = CallbackContext(sigfox_ep_id)
+        # Constant-time lookup in the end-points registry (unknown devices keep empty class and database).
+        entry = ep.get_entry(sigfox_ep_id)
+        if (entry is not None):
+            context.ep_entry = entry
+            context.ep_class = entry.ep_class
+            context.ep_database = entry.database
+        return context
+
+    def _get_default_dl_payload(self, context: CallbackContext, sigfox_ep_id: str):
+        # Default payload is computed once per device, and again when the devices list is reloaded (new registry entry).
+        default_dl_payload = self._default_dl_payloads.get(sigfox_ep_id)
+        if ((default_dl_payload is not None) and (default_dl_payload[0] is context.ep_entry)):
+            return default_dl_payload[1]
+        dl_payload = context.ep_class.get_default_dl_payload(sigfox_ep_id)
+        self._default_dl_payloads[sigfox_ep_id] = (context.ep_entry, dl_payload)
+        return dl_payload
 
     # Function to compute dynamic DL payload.
-    def _compute_dl_payload(self, sigfox_ep_id: str):
+    def _compute_dl_payload(self, context: CallbackContext, sigfox_ep_id: str, batch_record_list: Optional[List[Record]] = None):
         # Local variables.
         timestamp_now = int(time.time())
         record = Record()
-        dl_message_found = False
         dl_message_record_time = timestamp_now
         # Initialize with default payload if there is any.
-        dl_payload = self._ep_class.get_default_dl_payload(sigfox_ep_id)
-        # Open downlink messages file.
-        try:
-            # Load JSON data.
-            dl_messages_file = open(SIGFOX_EP_DL_MESSAGES_FILE_PATH, "r")
-            dl_messages_json = json.load(dl_messages_file)
-            dl_messages_file.close()
-            # Check header.
-            if (SIGFOX_EP_DL_MESSAGES_JSON_KEY not in dl_messages_json):
-                Log.debug_print("[SIGFOX EP SERVER] * ERROR: downlink messages file header not found")
-                raise Exception
-            # Messages loop (since the JSON file is written in chronological order, the oldest element is the first one during reading).
-            dl_messages = dl_messages_json[SIGFOX_EP_DL_MESSAGES_JSON_KEY]
-            for dl_message_idx, dl_message in enumerate(dl_messages):
-                # Check fields.
-                if ((SIGFOX_EP_DL_MESSAGES_JSON_KEY_RECORD_TIME not in dl_message) or
-                    (SIGFOX_EP_DL_MESSAGES_JSON_KEY_SIGFOX_EP_ID not in dl_message) or
-                    (SIGFOX_EP_DL_MESSAGES_JSON_KEY_DL_PAYLOAD not in dl_message) or
-                    (SIGFOX_EP_DL_MESSAGES_JSON_KEY_PERMANENT not in dl_message)):
-                    Log.debug_print("[SIGFOX EP SERVER] * ERROR: missing headers in downlink messages file")
-                    raise Exception
-                # Compare EP-ID.
-                if (int(dl_message[SIGFOX_EP_DL_MESSAGES_JSON_KEY_SIGFOX_EP_ID], 16) == int(sigfox_ep_id, 16)):
-                    # Select the oldest non permanent message, or the oldest permanent message.
-                    if (dl_message_found == False):
-                        # Read record time payload and.
-                        dl_message_record_time = int(dl_message[SIGFOX_EP_DL_MESSAGES_JSON_KEY_RECORD_TIME])
-                        dl_payload = dl_message[SIGFOX_EP_DL_MESSAGES_JSON_KEY_DL_PAYLOAD]
-                        # Update flag.
-                        dl_message_found = True
-                    # Check mode.
-                    if (dl_message[SIGFOX_EP_DL_MESSAGES_JSON_KEY_PERMANENT] == SIGFOX_CLOUD_CALLBACK_JSON_FALSE):
-                        # Force reading.
-                        dl_message_record_time = int(dl_message[SIGFOX_EP_DL_MESSAGES_JSON_KEY_RECORD_TIME])
-                        dl_payload = dl_message[SIGFOX_EP_DL_MESSAGES_JSON_KEY_DL_PAYLOAD]
-                        # Remove message from the file.
-                        del dl_messages[dl_message_idx]
-                        # Update file.
-                        dl_messages_file = open(SIGFOX_EP_DL_MESSAGES_FILE_PATH, "w+")
-                        json.dump(dl_messages_json, dl_messages_file, indent = 4)
-                        dl_messages_file.close()
-                        break
-            raise Exception
-        except:
-            # Check final result.
-            if (dl_payload is not None):
-                # Check size.
-                if (len(dl_payload) == (2 * SIGFOX_DL_PAYLOAD_SIZE_BYTES)):
-                    # Update dynamic fields.
-                    dl_payload = self._ep_class.update_dl_payload(sigfox_ep_id, dl_payload)
-                    # Log downlink in database.
-                    record.database = self._ep_database
-                    record.measurement = DATABASE_MEASUREMENT_SIGFOX_DOWNLINK
-                    record.timestamp = timestamp_now
-                    record.fields = {
-                        DATABASE_FIELD_SIGFOX_DOWNLINK_HASH: self._downlink_hash,
-                        DATABASE_FIELD_SIGFOX_DOWNLINK_RECORD_TIME: dl_message_record_time,
-                        DATABASE_FIELD_SIGFOX_DOWNLINK_SERVER_TIME: timestamp_now,
-                        DATABASE_FIELD_SIGFOX_DOWNLINK_PAYLOAD: dl_payload.lower(),
-                    }
-                    record.tags = self._ep_class.get_tags(sigfox_ep_id)
-                    record.limited_retention = True
-                    self._database.write_record(record)
-            return dl_payload
+        dl_payload = self._get_default_dl_payload(context, sigfox_ep_id)
+        # Oldest one-shot message, or current permanent message.
+        dl_message = self._downlink_store.pop(sigfox_ep_id)
+        if (dl_message is not None):
+            dl_message_record_time, dl_payload = dl_message
+        # Check final result.
+        if (dl_payload is not None):
+            # Check size.
+            if (len(dl_payload) == (2 * SIGFOX_DL_PAYLOAD_SIZE_BYTES)):
+                # Update dynamic fields.
+                dl_payload = context.ep_class.update_dl_payload(sigfox_ep_id, dl_payload)
+                # Log downlink in database.
+                record.database = context.ep_database
+                record.measurement = DATABASE_MEASUREMENT_SIGFOX_DOWNLINK
+                record.timestamp = timestamp_now
+                record.fields = {
+                    DATABASE_FIELD_SIGFOX_DOWNLINK_HASH: context.downlink_hash,
+                    DATABASE_FIELD_SIGFOX_DOWNLINK_RECORD_TIME: dl_message_record_time,
+                    DATABASE_FIELD_SIGFOX_DOWNLINK_SERVER_TIME: timestamp_now,
+                    DATABASE_FIELD_SIGFOX_DOWNLINK_PAYLOAD: dl_payload.lower(),
+                }
+                record.tags = context.ep_class.get_tags(sigfox_ep_id)
+                record.limited_retention = True
+                self._write_records([record], batch_record_list)
         return dl_payload
 
+    def _read_contract_id(self, sigfox_ep_id: str) -> str:
+        # Get device informations.
+        response = sigfox_cloud.api_request(SIGFOX_CLOUD_API_REQUEST_DEVICES, { SIGFOX_CLOUD_API_JSON_KEY_ID: sigfox_ep_id }, SIGFOX_EP_SERVER_CLOUD_API_MAX_RETRIES, SIGFOX_EP_SERVER_CLOUD_API_MAX_WAIT_SECONDS)
+        if ((response == None) or (response.status_code != 200)):
+            raise Exception("device informations request failed")
+        device_info = json.loads(response.text)
+        # Get contract ID.
+        return str((device_info.get(SIGFOX_CLOUD_API_JSON_KEY_DATA)[0]).get(SIGFOX_CLOUD_API_JSON_KEY_CONTRACT).get(SIGFOX_CLOUD_API_JSON_KEY_ID))
+
+    def _read_geolocation_level(self, contract_id: str) -> str:
+        # Get contract informations.
+        response = sigfox_cloud.api_request((SIGFOX_CLOUD_API_REQUEST_CONTRACT_INFOS + contract_id), None, SIGFOX_EP_SERVER_CLOUD_API_MAX_RETRIES, SIGFOX_EP_SERVER_CLOUD_API_MAX_WAIT_SECONDS)
+        if ((response == None) or (response.status_code != 200)):
+            raise Exception("contract informations request failed")
+        contract_info = json.loads(response.text)
+        # Get contract options.
+        contract_options = contract_info.get(SIGFOX_CLOUD_API_JSON_KEY_OPTIONS)
+        # Get geolocation level.
+        geolocation_level = SIGFOX_CLOUD_CALLBACK_GEOLOCATION_LEVEL_NETWORK
+        for idx in range(len(contract_options)):
+            option = contract_options[idx]
+            if (option.get(SIGFOX_CLOUD_API_JSON_KEY_ID) == SIGFOX_CLOUD_API_JSON_KEY_GEOLOCATION):
+                geolocation_level = option.get(SIGFOX_CLOUD_API_JSON_KEY_PARAMETERS).get(SIGFOX_CLOUD_API_JSON_KEY_LEVEL)
+                Log.debug_print("[SIGFOX EP SERVER] * API REQUEST: Geolocation level = " + str(geolocation_level) + " (index " + str(idx) + ")")
+                break
+        return geolocation_level
+
     def _is_atlas_wifi_message(self, sigfox_ep_id:str, ul_payload: str) -> bool:
         # Local variables.
         atlas_wifi_message = False
@@ -265,29 +304,13 @@ class SigfoxEpServer:
                 # Check I/G bit of the first byte.
                 if (((int(ul_payload[0:2], 16)) & 0x01) == 0):
                     log_message = "no WiFi option in contract"
-                    # Check if the device has an Atlas WiFi contract.
-                    # Get device informations.
-                    response = sigfox_cloud.api_request(SIGFOX_CLOUD_API_REQUEST_DEVICES, { SIGFOX_CLOUD_API_JSON_KEY_ID: sigfox_ep_id }, 0)
-                    if ((response == None) or (response.status_code != 200)):
+                    # Check if the device has an Atlas WiFi contract (cached since it almost never changes).
+                    contract_id = self._contract_id_cache.get(sigfox_ep_id)
+                    if (contract_id is None):
                         raise Exception
-                    device_info = json.loads(response.text)
-                    # Get contract ID.
-                    contract_id = (device_info.get(SIGFOX_CLOUD_API_JSON_KEY_DATA)[0]).get(SIGFOX_CLOUD_API_JSON_KEY_CONTRACT).get(SIGFOX_CLOUD_API_JSON_KEY_ID)
-                    # Get contract informations.
-                    response = sigfox_cloud.api_request((SIGFOX_CLOUD_API_REQUEST_CONTRACT_INFOS + str(contract_id)), None, 0)
-                    if ((response == None) or (response.status_code != 200)):
+                    geolocation_level = self._geolocation_level_cache.get(str(contract_id))
+                    if (geolocation_level is None):
                         raise Exception
-                    contract_info = json.loads(response.text)
-                    # Get contract options.
-                    contract_options = contract_info.get(SIGFOX_CLOUD_API_JSON_KEY_OPTIONS)
-                    # Get geolocation level.
-                    geolocation_level = SIGFOX_CLOUD_CALLBACK_GEOLOCATION_LEVEL_NETWORK
-                    for idx in range(len(contract_options)):
-                        option = contract_options[idx]
-                        if (option.get(SIGFOX_CLOUD_API_JSON_KEY_ID) == SIGFOX_CLOUD_API_JSON_KEY_GEOLOCATION):
-                            geolocation_level = option.get(SIGFOX_CLOUD_API_JSON_KEY_PARAMETERS).get(SIGFOX_CLOUD_API_JSON_KEY_LEVEL)
-                            Log.debug_print("[SIGFOX EP SERVER] * API REQUEST: Geolocation level = " + str(geolocation_level) + " (index " + str(idx) + ")")
-                            break
                     # Check geolocation level.
                     if (geolocation_level == SIGFOX_CLOUD_CALLBACK_GEOLOCATION_LEVEL_WIFI):
                         log_message = "all checks passed"
@@ -297,7 +320,133 @@ class SigfoxEpServer:
         Log.debug_print("[SIGFOX EP SERVER] * Atlas WiFi message = " + str(atlas_wifi_message) + " (" + log_message + ")")
         return atlas_wifi_message
 
-    def execute_callback(self, json_in: str) -> None:
+    def _check_callback(self, json_in: dict) -> tuple:
+        # Check mandatory JSON fields.
+        if ((SIGFOX_CLOUD_CALLBACK_JSON_KEY_TYPE not in json_in) or
+            (SIGFOX_CLOUD_CALLBACK_JSON_KEY_TIME not in json_in) or
+            (SIGFOX_CLOUD_CALLBACK_JSON_KEY_EP_ID not in json_in)):
+            return 415, None
+        callback_type = json_in[SIGFOX_CLOUD_CALLBACK_JSON_KEY_TYPE]
+        # Check callback type and its specific fields.
+        if (callback_type not in SIGFOX_EP_SERVER_CALLBACK_MANDATORY_KEYS):
+            return 204, None
+        for key in SIGFOX_EP_SERVER_CALLBACK_MANDATORY_KEYS[callback_type]:
+            if (key not in json_in):
+                return 424, None
+        # Check end-point ID.
+        context = self._get_callback_context(Ep.format_sigfox_ep_id(json_in[SIGFOX_CLOUD_CALLBACK_JSON_KEY_EP_ID]))
+        if ((context.ep_class == None) or (context.ep_database == None)):
+            return 204, None
+        return 204, context
+
+    @staticmethod
+    def _is_acknowledge_first_callback(json_in: dict) -> bool:
+        # The response of these callbacks never depends on the stored data.
+        callback_type = json_in[SIGFOX_CLOUD_CALLBACK_JSON_KEY_TYPE]
+        if ((callback_type == SIGFOX_CLOUD_CALLBACK_TYPE_DATA_UPLINK) or (callback_type == SIGFOX_CLOUD_CALLBACK_TYPE_DATA_ADVANCED)):
+            return True
+        # Bidirectional callbacks without downlink request.
+        if ((callback_type == SIGFOX_CLOUD_CALLBACK_TYPE_DATA_BIDIR) and (json_in[SIGFOX_CLOUD_CALLBACK_JSON_KEY_BIDIRECTIONAL_FLAG] != SIGFOX_CLOUD_CALLBACK_JSON_TRUE)):
+            return True
+        return False
+
+    def _process_callback_in_background(self, json_in: dict) -> None:
+        self._process_callback(json_in)
+
+    def execute_callback(self, json_in: dict, deferred_record_list: Optional[List[Record]] = None) -> tuple:
+        # Local variables.
+        start_time = time.monotonic()
+        # Process callback.
+        http_return_code, json_out = self._execute_callback(json_in, deferred_record_list)
+        # Downlink responses are time critical.
+        if (http_return_code == 200):
+            metrics.add_timing(SIGFOX_EP_SERVER_METRIC_DOWNLINK_RESPONSE_TIME, (time.monotonic() - start_time))
+        return http_return_code, json_out
+
+    def write_deferred_records(self, deferred_record_list: List[Any]) -> None:
+        # Called by the HTTP server once the response has been sent.
+        record_list = [item for item in deferred_record_list if isinstance(item, Record)]
+        if (len(record_list) > 0):
+            self._database.write_records(record_list)
+        # Uplink part of the bidirectional callbacks.
+        for item in deferred_record_list:
+            if isinstance(item, DeferredCallback):
+                self._process_callback(item.json_in)
+
+    def _execute_callback(self, json_in: dict, deferred_record_list: Optional[List[Record]]) -> tuple:
+        # Synchronous mode.
+        if (self._ingest_queue is None):
+            return self._process_callback(json_in, deferred_record_list)
+        # Check callback before acknowledging it.
+        http_return_code, context = self._check_callback(json_in)
+        if (context is None):
+            # Invalid callbacks are processed synchronously to get the exact logs and return code.
+            return self._process_callback(json_in, deferred_record_list)
+        # Bidirectional callbacks stay on the synchronous path.
+        if (SigfoxEpServer._is_acknowledge_first_callback(json_in) == False):
+            return self._process_callback(json_in, deferred_record_list)
+        # Queue callback and acknowledge immediately.
+        if (self._ingest_queue.put(context.sigfox_ep_id, json_in) == True):
+            return http_return_code, []
+        # Queue is full: apply overflow policy.
+        if (SIGFOX_EP_SERVER_INGEST_QUEUE_OVERFLOW_POLICY == INGEST_QUEUE_OVERFLOW_POLICY_REJECT):
+            Log.debug_print("[SIGFOX EP SERVER] * ERROR: ingest queue full, callback rejected")
+            return 503, []
+        return self._process_callback(json_in, deferred_record_list)
+
+    def execute_batch(self, api_key: str, json_in: Any) -> tuple:
+        # Local variables.
+        batch_record_list = []
+        json_out = []
+        # Check API key.
+        if ((self._api_key is None) or (api_key != self._api_key)):
+            return 401, json_out
+        # Check batch.
+        if not isinstance(json_in, list):
+            return 400, json_out
+        if (len(json_in) > SIGFOX_EP_SERVER_BATCH_MAX_SIZE):
+            return 413, json_out
+        Log.debug_print("[SIGFOX EP SERVER] * Batch request: " + str(len(json_in)) + " callbacks")
+        # Process callbacks (records are collected instead of being written one by one).
+        for item in json_in:
+            if not isinstance(item, dict):
+                json_out.append({SIGFOX_EP_SERVER_API_KEY_STATUS: 400})
+                continue
+            # Downlink requests are only answered to the Sigfox cloud (pending downlinks must not be consumed by a batch).
+            if (item.get(SIGFOX_CLOUD_CALLBACK_JSON_KEY_BIDIRECTIONAL_FLAG) == SIGFOX_CLOUD_CALLBACK_JSON_TRUE):
+                Log.debug_print("[SIGFOX EP SERVER] * ERROR: bidirectional request not allowed in batch")
+                json_out.append({SIGFOX_EP_SERVER_API_KEY_STATUS: 400})
+                continue
+            http_return_code, item_json_out = self._process_callback(item, batch_record_list)
+            item_status = {SIGFOX_EP_SERVER_API_KEY_STATUS: http_return_code}
+            if ((item_json_out is not None) and (len(item_json_out) > 0)):
+                item_status[SIGFOX_EP_SERVER_API_KEY_RESPONSE] = item_json_out
+            json_out.append(item_status)
+        # Write all records at once (grouped per database and retention policy).
+        if (self._database.write_records(batch_record_list) == False):
+            Log.debug_print("[SIGFOX EP SERVER] * ERROR: batch records write failed")
+            return 503, json_out
+        metrics.increment(SIGFOX_EP_SERVER_METRIC_BATCH_CALLBACKS, len(json_in))
+        return 200, json_out
+
+    def stop(self) -> None:
+        # Flush pending callbacks.
+        if (self._ingest_queue is not None):
+            Log.debug_print("[SIGFOX EP SERVER] * Flushing ingest queue (" + str(self._ingest_queue.get_depth()) + " pending callbacks)")
+            self._ingest_queue.stop()
+            self._ingest_queue = None
+        # Sync downlink journal and write-ahead spool.
+        self._downlink_store.close()
+        self._database.close()
+
+    def _write_records(self, record_list: List[Record], batch_record_list: Optional[List[Record]]) -> None:
+        # Records of batch requests are written at once at the end of the batch.
+        if batch_record_list is not None:
+            batch_record_list.extend([copy.copy(record) for record in record_list])
+        else:
+            self._database.write_records(record_list)
+
+    def _process_callback(self, json_in: dict, batch_record_list: Optional[List[Record]] = None) -> tuple:
         # Local variables.
         timestamp_now = int(time.time())
         record_list = List[Record]
@@ -316,10 +465,10 @@ class SigfoxEpServer:
             callback_type = json_in[SIGFOX_CLOUD_CALLBACK_JSON_KEY_TYPE]
             timestamp = int(json_in[SIGFOX_CLOUD_CALLBACK_JSON_KEY_TIME])
             sigfox_ep_id = Ep.format_sigfox_ep_id(json_in[SIGFOX_CLOUD_CALLBACK_JSON_KEY_EP_ID])
-            # Update class pointer and database.
-            self._set_ep_class_and_database(sigfox_ep_id)
+            # Build request context.
+            context = self._get_callback_context(sigfox_ep_id)
             # Directly returns if the end-point ID is unknown.
-            if ((self._ep_class == None) or (self._ep_database == None)):
+            if ((context.ep_class == None) or (context.ep_database == None)):
                 Log.debug_print("[SIGFOX EP SERVER] * ERROR: unknown Sigfox EP-ID.")
                 raise Exception
             # Data callback.
@@ -348,12 +497,34 @@ class SigfoxEpServer:
                     callback_type_str = "Data bidirectional"
                     bidirectional_flag = json_in[SIGFOX_CLOUD_CALLBACK_JSON_KEY_BIDIRECTIONAL_FLAG]
                 Log.debug_print("[SIGFOX EP SERVER] * " + callback_type_str + " callback: timestamp=" + str(timestamp) + " sigfox_ep_id=" + sigfox_ep_id + " message_counter=" + str(message_counter) + " ul_payload=" + ul_payload + " bidirectional_flag=" + bidirectional_flag)
+                # Check bidirectional flag.
+                if (bidirectional_flag == SIGFOX_CLOUD_CALLBACK_JSON_TRUE):
+                    # Use uplink message counter as downlink message hash.
+                    context.downlink_hash = message_counter
+                    with self._downlink_hash_lock:
+                        self._downlink_hash[sigfox_ep_id] = message_counter
+                    # Compute DL payload first (the response never waits for the uplink parsing).
+                    dl_payload = self._compute_dl_payload(context, sigfox_ep_id, batch_record_list)
+                    # Check result.
+                    if (dl_payload is not None):
+                        # Check size.
+                        if (len(dl_payload) == (2 * SIGFOX_DL_PAYLOAD_SIZE_BYTES)):
+                            # Build response.
+                            http_return_code = 200
+                            json_out = {sigfox_ep_id: {"downlinkData": dl_payload}}
+                            Log.debug_print("[SIGFOX EP SERVER] * Bidirectional request response: dl_payload=" + dl_payload)
+                    # Uplink is parsed after the response, like the callbacks without downlink request.
+                    if (batch_record_list is not None):
+                        uplink_json_in = dict(json_in)
+                        uplink_json_in[SIGFOX_CLOUD_CALLBACK_JSON_KEY_BIDIRECTIONAL_FLAG] = SIGFOX_CLOUD_CALLBACK_JSON_FALSE
+                        batch_record_list.append(DeferredCallback(uplink_json_in))
+                        return http_return_code, json_out
                 # Parse UL payload.
-                [data_type, record_list] = self._ep_class.get_record_list(self._database, timestamp, sigfox_ep_id, ul_payload)
+                [data_type, record_list] = context.ep_class.get_record_list(self._database, timestamp, sigfox_ep_id, ul_payload)
                 # Check parsing status.
                 if ((data_type != DATABASE_FIELD_DATA_TYPE_UNKNOWN) and (len(record_list) > 0)):
                     # Add common metadata record.
-                    record.database = self._ep_database
+                    record.database = context.ep_database
                     record.measurement = DATABASE_MEASUREMENT_METADATA
                     record.timestamp = timestamp
                     record.fields = {
@@ -365,21 +536,7 @@ class SigfoxEpServer:
                     record.limited_retention = False
                     record_list.append(copy.copy(record))
                     # Write data base.
-                    self._database.write_records(record_list)
-                # Check bidirectional flag.
-                if (bidirectional_flag == SIGFOX_CLOUD_CALLBACK_JSON_TRUE):
-                    # Use uplink message counter as downlink message hash.
-                    self._downlink_hash = message_counter
-                    # Compute DL payload.
-                    dl_payload = self._compute_dl_payload(sigfox_ep_id)
-                    # Check result.
-                    if (dl_payload is not None):
-                        # Check size.
-                        if (len(dl_payload) == (2 * SIGFOX_DL_PAYLOAD_SIZE_BYTES)):
-                            # Build response.
-                            http_return_code = 200
-                            json_out = {sigfox_ep_id: {"downlinkData": dl_payload}}
-                            Log.debug_print("[SIGFOX EP SERVER] * Bidirectional request response: dl_payload=" + dl_payload)
+                    self._write_records(record_list, batch_record_list)
             # Data advanced callback.
             elif (callback_type == SIGFOX_CLOUD_CALLBACK_TYPE_DATA_ADVANCED):
                 # Check mandatory JSON fields.
@@ -422,7 +579,7 @@ class SigfoxEpServer:
                     # Change timestamp to avoid overwriting custom GPS message with Atlas Native.
                     geolocation_timestamp = (timestamp + 1)
                     # Create metadata record.
-                    record.database = self._ep_database
+                    record.database = context.ep_database
                     record.measurement = DATABASE_MEASUREMENT_METADATA
                     record.timestamp = geolocation_timestamp
                     record.fields = {
@@ -430,11 +587,11 @@ class SigfoxEpServer:
                         DATABASE_FIELD_SIGFOX_UPLINK_MESSAGE_COUNTER: message_counter,
                         DATABASE_FIELD_DATA_TYPE: data_type
                     }
-                    record.tags = self._ep_class.get_tags(sigfox_ep_id)
+                    record.tags = context.ep_class.get_tags(sigfox_ep_id)
                     record.limited_retention = False
-                    self._database.write_record(record)
+                    self._write_records([record], batch_record_list)
                     # Create geolocation record.
-                    record.database = self._ep_database
+                    record.database = context.ep_database
                     record.measurement = DATABASE_MEASUREMENT_GEOLOCATION
                     record.timestamp = geolocation_timestamp
                     record.fields = {
@@ -446,9 +603,9 @@ class SigfoxEpServer:
                     }
                     if (source == SIGFOX_CLOUD_CALLBACK_GEOLOCATION_SOURCE_WIFI):
                         record.add_field(0x00, 0xFF, DATABASE_FIELD_WIFI_SCAN_STATUS, 0x00)
-                    record.tags = self._ep_class.get_tags(sigfox_ep_id)
+                    record.tags = context.ep_class.get_tags(sigfox_ep_id)
                     record.limited_retention = True
-                    self._database.write_record(record)
+                    self._write_records([record], batch_record_list)
             # Service acknowledge callback.
             elif (callback_type == SIGFOX_CLOUD_CALLBACK_TYPE_SERVICE_ACKNOWLEDGE):
                 # Check mandatory JSON fields.
@@ -463,20 +620,23 @@ class SigfoxEpServer:
                 dl_success = json_in[SIGFOX_CLOUD_CALLBACK_JSON_KEY_DL_SUCCESS]
                 dl_status = json_in[SIGFOX_CLOUD_CALLBACK_JSON_KEY_DL_STATUS]
                 Log.debug_print("[SIGFOX EP SERVER] * Service acknowledge callback: timestamp=" + str(timestamp) + " sigfox_ep_id=" + sigfox_ep_id + " dl_payload=" + dl_payload + " dl_success=" + dl_success + " dl_status=" + dl_status)
+                # Retrieve hash of the last downlink sent to this end-point.
+                with self._downlink_hash_lock:
+                    context.downlink_hash = self._downlink_hash.get(sigfox_ep_id, 0)
                 # Log downlink network status in database.
-                record.database = self._ep_database
+                record.database = context.ep_database
                 record.measurement = DATABASE_MEASUREMENT_SIGFOX_DOWNLINK
                 record.timestamp = timestamp_now
                 record.fields = {
-                    DATABASE_FIELD_SIGFOX_DOWNLINK_HASH: self._downlink_hash,
+                    DATABASE_FIELD_SIGFOX_DOWNLINK_HASH: context.downlink_hash,
                     DATABASE_FIELD_SIGFOX_DOWNLINK_NETWORK_TIME: timestamp_now,
                     DATABASE_FIELD_SIGFOX_DOWNLINK_PAYLOAD: dl_payload,
                     DATABASE_FIELD_SIGFOX_DOWNLINK_SUCCESS: dl_success,
                     DATABASE_FIELD_SIGFOX_DOWNLINK_STATUS: dl_status
                 }
-                record.tags = self._ep_class.get_tags(sigfox_ep_id)
+                record.tags = context.ep_class.get_tags(sigfox_ep_id)
                 record.limited_retention = True
-                self._database.write_record(record)
+                self._write_records([record], batch_record_list)
             # Invalid callback type.
             else:
                 Log.debug_print("[SIGFOX EP SERVER] * ERROR: invalid callback type")
@@ -485,27 +645,33 @@ class SigfoxEpServer:
             pass
         return http_return_code, json_out
 
-class SigfoxEpServerHandler(BaseHTTPRequestHandler):
+    def _send_cached_response(self, cached: tuple, if_none_match: Optional[str]) -> tuple:
+        # Local variables.
+        http_return_code, json_out, etag = cached
+        http_headers = {}
+        if etag is not None:
+            http_headers["ETag"] = etag
+        # Client copy is still valid.
+        if ResponseCache.is_not_modified(etag, if_none_match):
+            metrics.increment(RESPONSE_CACHE_METRIC_NOT_MODIFIED)
+            return 304, http_headers, []
+        return http_return_code, http_headers, json_out
 
-    def do_GET(self):
-        Log.debug_print("")
-        Log.debug_print("[SIGFOX EP SERVER] * GET request received")
+    def execute_api_request(self, api_key: str, path: str, if_none_match: Optional[str] = None) -> tuple:
+        # Local variables.
+        http_return_code = 404
+        http_headers = {}
+        json_out = []
         # Check API key.
-        api_key = self.headers.get("X-API-Key")
-        if ((sigfox_ep_server._api_key is None) or (api_key != sigfox_ep_server._api_key)):
-            self.send_response(401)
-            self.end_headers()
-            return
-        # Check rate limiting.
-        if not rate_limiter.is_allowed():
-            self.send_response(429)
-            self.send_header("Retry-After", str(rate_limiter.retry_after()))
-            self.end_headers()
-            return
+        if ((self._api_key is None) or (api_key != self._api_key)):
+            return 401, http_headers, json_out
         # Parse URL.
-        parsed = urlparse(self.path)
+        parsed = urlparse(path)
         parts = parsed.path.strip("/").split("/")
         params = parse_qs(parsed.query)
+        # Server metrics (not rate limited).
+        if ((len(parts) == 1) and (parts[0] == SIGFOX_EP_SERVER_API_KEY_METRICS)):
+            return 200, http_headers, metrics.get_snapshot()
         if ((len(parts) == 3) and (parts[0] == SIGFOX_EP_SERVER_API_KEY_EP) and (parts[2] == SIGFOX_EP_SERVER_API_KEY_LATEST)):
             ep = parts[1]
             measurement = params.get(SIGFOX_EP_SERVER_API_KEY_MEASUREMENT, [None])[0]
@@ -513,34 +679,34 @@ class SigfoxEpServerHandler(BaseHTTPRequestHandler):
             # Check if database exists.
             ep_database = (ep + "_db")
             if ep_database not in DATABASE_LIST:
-                self.send_response(404)
-                self.end_headers()
-                return
+                return 404, http_headers, json_out
             # Check mandatory fields.
             if not measurement or not field:
-                self.send_response(400)
-                self.end_headers()
-                return
+                return 400, http_headers, json_out
             # Extract tags.
             reserved_parameters = {SIGFOX_EP_SERVER_API_KEY_MEASUREMENT, SIGFOX_EP_SERVER_API_KEY_FIELD}
             tag_filter = {
                 k: v[0] for k, v in params.items() if k not in reserved_parameters
             }
-            # Check if a tag has been given.
-            if tag_filter:
-                where_parts  = [f'"{k}"=\'{v}\'' for k, v in tag_filter.items()]
-                where_clause = " AND ".join(where_parts)
-            else:
-                where_clause = None
+            # Cached responses are not rate limited.
+            response_cache_key = ResponseCache.build_key(ep_database, measurement, field, tag_filter)
+            cached = self._response_cache.get(response_cache_key)
+            if cached is not None:
+                return self._send_cached_response(cached, if_none_match)
+            # Check rate limiting.
+            if not self._rate_limiter.is_allowed():
+                http_headers["Retry-After"] = str(self._rate_limiter.retry_after())
+                return 429, http_headers, json_out
             # Perform InfluxDB request.
+            response_cache_generation = self._response_cache.get_generation(response_cache_key)
             retention_flag = (measurement != DATABASE_MEASUREMENT_METADATA)
-            value, timestamp = sigfox_ep_server._database.read_field(ep_database, where_clause, measurement, field, limited_retention=retention_flag)
+            value, timestamp = self._database.read_field(ep_database, tag_filter, measurement, field, limited_retention=retention_flag)
             # Check if data has been found.
             if ((value is None) or (timestamp is None)):
-                self.send_response(404)
-                self.end_headers()
-                return
+                self._response_cache.put(response_cache_key, 404, json_out, response_cache_generation)
+                return 404, http_headers, json_out
             # Build output JSON.
+            http_return_code = 200
             json_out = {
                 SIGFOX_EP_SERVER_API_KEY_EP: ep,
                 SIGFOX_EP_SERVER_API_KEY_TAGS: tag_filter,
@@ -549,14 +715,74 @@ class SigfoxEpServerHandler(BaseHTTPRequestHandler):
                 SIGFOX_EP_SERVER_API_KEY_TIMESTAMP: timestamp,
                 SIGFOX_EP_SERVER_API_KEY_VALUE: value
             }
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
+            etag = self._response_cache.put(response_cache_key, http_return_code, json_out, response_cache_generation)
+            return self._send_cached_response((http_return_code, json_out, etag), if_none_match)
+        # Check rate limiting.
+        if not self._rate_limiter.is_allowed():
+            http_headers["Retry-After"] = str(self._rate_limiter.retry_after())
+            return 429, http_headers, json_out
+        return http_return_code, http_headers, json_out
+
+class SigfoxEpHttpServer(HTTPServer):
+
+    def __init__(self, server_address: tuple, handler_class: type, workers: int) -> None:
+        # Init HTTP server.
+        super().__init__(server_address, handler_class)
+        # Bounded worker pool: the accept loop blocks when all slots are taken, so bursts are absorbed by the TCP backlog.
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sigfox_ep_server")
+        self._slots = threading.BoundedSemaphore(workers * SIGFOX_EP_SERVER_WORKERS_BACKLOG_FACTOR)
+
+    def _process_request_worker(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def process_request(self, request, client_address) -> None:
+        # Wait for a free slot.
+        self._slots.acquire()
+        try:
+            self._executor.submit(self._process_request_worker, request, client_address)
+        except Exception:
+            self._slots.release()
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+class SigfoxEpServerHandler(BaseHTTPRequestHandler):
+
+    # Socket timeout to prevent idle connections from holding a worker.
+    timeout = SIGFOX_EP_SERVER_SOCKET_TIMEOUT_SECONDS
+
+    def _send_json_response(self, http_return_code: int, http_headers: Dict[str, str], json_out) -> None:
+        # Send HTTP response.
+        self.send_response(http_return_code)
+        for header_name, header_value in http_headers.items():
+            self.send_header(header_name, header_value)
+        if ((json_out is not None) and (len(json_out) > 0)):
+            body = (json.dumps(json_out)).encode()
+            self.send_header("content-type", "application/json")
+            self.send_header("content-length", str(len(body)))
             self.end_headers()
-            self.wfile.write(json.dumps(json_out).encode())
+            self.wfile.write(body)
         else:
-            self.send_response(404)
+            # Content length lets the client complete the response without waiting for the connection to be closed.
+            if (http_return_code not in (204, 304)):
+                self.send_header("content-length", "0")
             self.end_headers()
 
+    def do_GET(self):
+        Log.debug_print("")
+        Log.debug_print("[SIGFOX EP SERVER] * GET request received")
+        # Execute API request.
+        http_return_code, http_headers, json_out = sigfox_ep_server.execute_api_request(self.headers.get("X-API-Key"), self.path, self.headers.get("If-None-Match"))
+        self._send_json_response(http_return_code, http_headers, json_out)
+
     def do_HEAD(self):
         Log.debug_print("")
         Log.debug_print("[SIGFOX EP SERVER] * HEAD request received")
@@ -571,19 +797,18 @@ class SigfoxEpServerHandler(BaseHTTPRequestHandler):
             # Get JSON content.
             json_length = int(self.headers.get("content-length", 0))
             json_in = json.loads(self.rfile.read(json_length))
+            deferred_record_list = []
+            # Batch of callbacks.
+            if (urlparse(self.path).path.strip("/") == SIGFOX_EP_SERVER_API_KEY_BATCH):
+                http_return_code, json_out = sigfox_ep_server.execute_batch(self.headers.get("X-API-Key"), json_in)
             # Parse callback.
-            http_return_code, json_out = sigfox_ep_server.execute_callback(json_in)
-            # Send HTTP response.
-            self.send_response(http_return_code)
-            if (json_out is not None):
-                if (len(json_out) > 0):
-                    self.send_header("content-type", "application/json")
-                    self.end_headers()
-                    self.wfile.write((json.dumps(json_out)).encode())
-                else:
-                    self.end_headers()
             else:
-                self.end_headers()
+                http_return_code, json_out = sigfox_ep_server.execute_callback(json_in, deferred_record_list)
+            # Send HTTP response.
+            self._send_json_response(http_return_code, {}, json_out)
+            self.wfile.flush()
+            # Write records once the response has been sent.
+            sigfox_ep_server.write_deferred_records(deferred_record_list)
         else:
             Log.debug_print("ERROR: invalid HTTP content type")
             self.send_response(400)
@@ -595,6 +820,8 @@ if __name__ == "__main__":
     # Parse arguments.
     parser = argparse.ArgumentParser()
     parser.add_argument("--debug", action="store_true", default=False, help="Enable debug logs")
+    parser.add_argument("--workers", type=int, default=SIGFOX_EP_SERVER_WORKERS_DEFAULT, help="Number of concurrent request workers")
+    parser.add_argument("--asyncio", action="store_true", default=False, help="Use the asyncio server (keep-alive and pipelined HTTP/1.1)")
     args = parser.parse_args()
     if args.debug:
         Log.enable()
@@ -606,13 +833,21 @@ if __name__ == "__main__":
     Log.debug_print("")
     # Init server.
     sigfox_ep_server = SigfoxEpServer()
-    rate_limiter = RateLimiter(SIGFOX_EP_SERVER_API_RATE_LIMIT_REQUESTS, SIGFOX_EP_SERVER_API_RATE_LIMIT_WINDOW_SECONDS)
+    # Start asyncio server.
+    if args.asyncio:
+        Log.debug_print("")
+        try:
+            AsyncHttpServer(sigfox_ep_server, SIGFOX_EP_SERVER_HTTP_PORT, max(1, args.workers)).run()
+        finally:
+            sigfox_ep_server.stop()
+        exit(0)
     # Start server.
-    sigfox_ep_server_handler = HTTPServer(("", SIGFOX_EP_SERVER_HTTP_PORT), SigfoxEpServerHandler)
-    sigfox_ep_server_handler.timeout = 10
+    sigfox_ep_server_handler = SigfoxEpHttpServer(("", SIGFOX_EP_SERVER_HTTP_PORT), SigfoxEpServerHandler, max(1, args.workers))
     Log.debug_print("")
-    Log.debug_print("[SIGFOX EP SERVER] * Starting server at port " + str(SIGFOX_EP_SERVER_HTTP_PORT))
+    Log.debug_print("[SIGFOX EP SERVER] * Starting server at port " + str(SIGFOX_EP_SERVER_HTTP_PORT) + " (" + str(max(1, args.workers)) + " workers)")
     # Main loop.
-    while True:
-        Log.debug_print("[SIGFOX EP SERVER] * Handle request")
-        sigfox_ep_server_handler.handle_request()
+    try:
+        sigfox_ep_server_handler.serve_forever()
+    finally:
+        sigfox_ep_server_handler.server_close()
+        sigfox_ep_server.stop()
@@ -0,0 +1,22 @@
+"""
+* conftest.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+# Modules are imported from the repository root, like the server does.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+# Tests use their own configuration file and data directory (the server configuration file is never read).
+_data_path = tempfile.mkdtemp(prefix="sigfox_ep_server_tests_")
+_config_file_path = os.path.join(_data_path, "sigfox_ep_server.json")
+_config_file = open(_config_file_path, "w")
+json.dump({"path": _data_path, "http_port": 65000, "api_key": "test", "sigfox_cloud": {"user": "test", "password": "test"}, "dl_messages_file_path": os.path.join(_data_path, "sigfox_ep_dl_messages.json")}, _config_file)
+_config_file.close()
+os.environ["SIGFOX_EP_SERVER_CONFIG_FILE"] = _config_file_path
@@ -0,0 +1,107 @@
+"""
+* test_database.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import pytest
+import time
+
+import database.spool
+
+from database.database import *
+from influxdb.exceptions import InfluxDBServerError
+
+### TEST DATABASE ###
+
+class FakeClient:
+
+    def __init__(self) -> None:
+        self.lines = []
+        self.server_errors_count = 0
+
+    def write_points(self, lines, time_precision=None, retention_policy=None, protocol=None) -> bool:
+        # InfluxDB unavailable.
+        if (self.server_errors_count > 0):
+            self.server_errors_count -= 1
+            raise InfluxDBServerError("service unavailable")
+        # Field type conflict: valid points of the request are stored anyway.
+        rejected_lines = [line for line in lines if ("temperature=\"" in line)]
+        self.lines.extend([line for line in lines if line not in rejected_lines])
+        if (len(rejected_lines) > 0):
+            raise InfluxDBClientError("{\"error\":\"partial write: field type conflict: input field \\\"temperature\\\" on measurement \\\"weather\\\" is type string, already exists as type float dropped=" + str(len(rejected_lines)) + "\"}", 400)
+        return True
+
+@pytest.fixture
+def client(monkeypatch) -> FakeClient:
+    # No InfluxDB server: startup steps are skipped and all databases share a fake client.
+    monkeypatch.setattr(Database, "_wait_influxdb", lambda self: None)
+    monkeypatch.setattr(Database, "_reconcile_databases", lambda self: None)
+    monkeypatch.setattr(Database, "_reconcile_retention_policies", lambda self: None)
+    monkeypatch.setattr(database.spool, "SPOOL_RETRY_DELAY_MIN_SECONDS", 0.01)
+    return FakeClient()
+
+def _create_database(client: FakeClient) -> Database:
+    database = Database()
+    for name in DATABASE_LIST:
+        database._clients[name] = client
+    return database
+
+def _build_batch(idx: int, temperature) -> list:
+    return [[DATABASE_METEOFOX, None, {"measurement": "weather", "fields": {"temperature": temperature}, "tags": {"sigfox_ep_id": "1234abcd"}, "time": idx}]]
+
+def _wait_drained(spool: Spool) -> None:
+    deadline = time.monotonic() + 5
+    while (spool.get_depth() > 0) and (time.monotonic() < deadline):
+        time.sleep(0.01)
+
+def test_rejected_points_do_not_block_the_spool(client, tmp_path) -> None:
+    database = _create_database(client)
+    database.enable_spool(str(tmp_path), (1024 * 1024))
+    rejected_count = metrics.get_counter(DATABASE_METRIC_REJECTED_POINTS)
+    for idx in range(10):
+        database.write_points(_build_batch(idx, "invalid" if (idx == 3) else float(idx)))
+    _wait_drained(database._spool)
+    # The rejected point is dropped and counted, the other points are written.
+    assert database._spool.get_depth() == 0
+    assert len(client.lines) == 9
+    assert metrics.get_counter(DATABASE_METRIC_REJECTED_POINTS) == (rejected_count + 1)
+    database.close()
+
+def test_failed_writes_are_retried(client, tmp_path) -> None:
+    database = _create_database(client)
+    client.server_errors_count = 2
+    database.enable_spool(str(tmp_path), (1024 * 1024))
+    for idx in range(5):
+        database.write_points(_build_batch(idx, float(idx)))
+    _wait_drained(database._spool)
+    assert database._spool.get_depth() == 0
+    assert len(client.lines) == 5
+    database.close()
+
+def test_rejected_points_are_not_diverted(client, tmp_path) -> None:
+    database = _create_database(client)
+    database.enable_diverted_spool(str(tmp_path), (1024 * 1024))
+    diverted_count = metrics.get_counter(DATABASE_METRIC_DIVERTED_POINTS)
+    assert database.write_points(_build_batch(0, "invalid")) == True
+    assert metrics.get_counter(DATABASE_METRIC_DIVERTED_POINTS) == diverted_count
+    assert database._diverted_spool.get_depth() == 0
+    database.close()
+
+def test_only_failed_groups_are_diverted(client, tmp_path) -> None:
+    database = _create_database(client)
+    # InfluxDB fails on a single database.
+    failing_client = FakeClient()
+    failing_client.server_errors_count = 1
+    database._clients[DATABASE_SENSIT] = failing_client
+    database.enable_diverted_spool(str(tmp_path), (1024 * 1024))
+    diverted_count = metrics.get_counter(DATABASE_METRIC_DIVERTED_POINTS)
+    batch = _build_batch(0, 1.0) + [[DATABASE_SENSIT, None, {"measurement": "sensor", "fields": {"temperature": 2.0}, "time": 0}]]
+    assert database.write_points(batch) == True
+    assert metrics.get_counter(DATABASE_METRIC_DIVERTED_POINTS) == (diverted_count + 1)
+    # Diverted point is replayed, the written one is not written again.
+    _wait_drained(database._diverted_spool)
+    assert len(client.lines) == 1
+    assert len(failing_client.lines) == 1
+    database.close()
@@ -0,0 +1,136 @@
+"""
+* test_downlink_store.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import json
+import os
+import pytest
+
+import utils.downlink_store
+
+from utils.downlink_store import *
+
+### TEST DOWNLINK STORE ###
+
+def _count_lines(file_path: str) -> int:
+    journal_file = open(file_path, "r")
+    lines_count = len(journal_file.readlines())
+    journal_file.close()
+    return lines_count
+
+def test_pop_order(tmp_path) -> None:
+    store = DownlinkStore(str(tmp_path / "journal"))
+    store.add("1234abcd", 2, "1111111111111111", True)
+    store.add("1234abcd", 1, "0000000000000000", False)
+    store.add("1234abcd", 3, "2222222222222222", False)
+    # One-shot messages first (chronological order), then permanent message.
+    assert store.pop("1234abcd") == (1, "0000000000000000")
+    assert store.pop("1234abcd") == (3, "2222222222222222")
+    assert store.pop("1234abcd") == (2, "1111111111111111")
+    assert store.pop("1234abcd") == (2, "1111111111111111")
+    assert store.pop("0000aaaa") is None
+    store.close()
+
+def test_journal_replay(tmp_path) -> None:
+    journal_path = str(tmp_path / "journal")
+    store = DownlinkStore(journal_path)
+    store.add("1234abcd", 1, "0000000000000000", False)
+    store.add("1234abcd", 2, "1111111111111111", False)
+    assert store.pop("1234abcd") == (1, "0000000000000000")
+    store.close()
+    # Consumed messages are not sent again after a restart.
+    store = DownlinkStore(journal_path)
+    assert store.pop("1234abcd") == (2, "1111111111111111")
+    assert store.pop("1234abcd") is None
+    store.close()
+
+def test_compaction(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(utils.downlink_store, "DOWNLINK_STORE_COMPACTION_MIN_OPERATIONS", 50)
+    journal_path = str(tmp_path / "journal")
+    store = DownlinkStore(journal_path)
+    store.add("1234abcd", 1, "1111111111111111", True)
+    for idx in range(200):
+        store.add("0000aaaa", idx, "0000000000000000", False)
+        assert store.pop("0000aaaa") == (idx, "0000000000000000")
+    store.add("0000aaaa", 200, "2222222222222222", False)
+    store.flush()
+    store.close()
+    # Journal only contains the live messages (and the operations written after the last compaction).
+    assert _count_lines(journal_path) < 50
+    store = DownlinkStore(journal_path)
+    assert store.pop("0000aaaa") == (200, "2222222222222222")
+    assert store.pop("0000aaaa") is None
+    assert store.pop("1234abcd") == (1, "1111111111111111")
+    store.close()
+
+def _build_dl_message(record_time: int, dl_payload: str, permanent: str) -> dict:
+    return {DOWNLINK_STORE_JSON_KEY_RECORD_TIME: record_time, DOWNLINK_STORE_JSON_KEY_SIGFOX_EP_ID: "1234abcd", DOWNLINK_STORE_JSON_KEY_DL_PAYLOAD: dl_payload, DOWNLINK_STORE_JSON_KEY_PERMANENT: permanent}
+
+def _write_inbox(inbox_path: str, dl_messages: list) -> None:
+    inbox_file = open(inbox_path, "w")
+    json.dump({DOWNLINK_STORE_JSON_KEY: dl_messages}, inbox_file)
+    inbox_file.close()
+
+def test_import_inbox(tmp_path) -> None:
+    journal_path = str(tmp_path / "journal")
+    inbox_path = str(tmp_path / "inbox.json")
+    _write_inbox(inbox_path, [_build_dl_message(1, "0000000000000000", "false"), _build_dl_message(2, "1111111111111111", "true")])
+    store = DownlinkStore(journal_path)
+    store.import_inbox(inbox_path)
+    # Inbox is emptied once the messages are in the journal.
+    inbox_file = open(inbox_path, "r")
+    assert json.load(inbox_file) == {DOWNLINK_STORE_JSON_KEY: []}
+    inbox_file.close()
+    assert _count_lines(journal_path) == 2
+    store.close()
+    store = DownlinkStore(journal_path)
+    assert store.pop("1234abcd") == (1, "0000000000000000")
+    assert store.pop("1234abcd") == (2, "1111111111111111")
+    store.close()
+
+def test_inbox_written_during_import(tmp_path) -> None:
+    inbox_path = str(tmp_path / "inbox.json")
+    _write_inbox(inbox_path, [_build_dl_message(1, "0000000000000000", "false")])
+    store = DownlinkStore(str(tmp_path / "journal"))
+    add = store.add
+    def add_and_write_inbox(sigfox_ep_id: str, record_time: int, dl_payload: str, permanent: bool) -> None:
+        # Operator adds a message while the previous ones are being imported.
+        if (record_time == 1):
+            _write_inbox(inbox_path, [_build_dl_message(2, "1111111111111111", "false")])
+        add(sigfox_ep_id, record_time, dl_payload, permanent)
+    store.add = add_and_write_inbox
+    store.import_inbox(inbox_path)
+    # New message is kept in the inbox and imported next time.
+    assert store.pop("1234abcd") == (1, "0000000000000000")
+    assert store.pop("1234abcd") is None
+    store.import_inbox(inbox_path)
+    assert store.pop("1234abcd") == (2, "1111111111111111")
+    assert sorted(os.listdir(str(tmp_path))) == ["inbox.json", "journal"]
+    store.close()
+
+def test_interrupted_import(tmp_path) -> None:
+    inbox_path = str(tmp_path / "inbox.json")
+    # Inbox taken by an import interrupted before the messages were added.
+    _write_inbox(inbox_path + DOWNLINK_STORE_INBOX_IMPORTING_SUFFIX, [_build_dl_message(1, "0000000000000000", "false")])
+    store = DownlinkStore(str(tmp_path / "journal"))
+    store.import_inbox(inbox_path)
+    assert store.pop("1234abcd") == (1, "0000000000000000")
+    # Empty inbox is created.
+    inbox_file = open(inbox_path, "r")
+    assert json.load(inbox_file) == {DOWNLINK_STORE_JSON_KEY: []}
+    inbox_file.close()
+    store.close()
+
+def test_import_invalid_file(tmp_path) -> None:
+    inbox_path = str(tmp_path / "inbox.json")
+    inbox_file = open(inbox_path, "w")
+    json.dump({DOWNLINK_STORE_JSON_KEY: [{DOWNLINK_STORE_JSON_KEY_SIGFOX_EP_ID: "1234abcd"}]}, inbox_file)
+    inbox_file.close()
+    store = DownlinkStore(str(tmp_path / "journal"))
+    with pytest.raises(Exception):
+        store.import_inbox(inbox_path)
+    assert store.pop("1234abcd") is None
+    store.close()
@@ -0,0 +1,66 @@
+"""
+* test_ingest_queue.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import threading
+import time
+
+from utils.ingest_queue import *
+
+### TEST INGEST QUEUE ###
+
+class BlockingProcess:
+
+    def __init__(self) -> None:
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.items = []
+
+    def __call__(self, data) -> None:
+        self.started.set()
+        self.release.wait()
+        self.items.append(data)
+
+def _build_full_queue(overflow_policy: str) -> tuple:
+    process = BlockingProcess()
+    ingest_queue = IngestQueue(process, 1, 1, overflow_policy)
+    # First item is being processed, second one fills the queue.
+    assert ingest_queue.put("1234abcd", 1) == True
+    assert process.started.wait(timeout=5)
+    assert ingest_queue.put("1234abcd", 2) == True
+    return ingest_queue, process
+
+def test_order_per_key() -> None:
+    items = []
+    ingest_queue = IngestQueue(lambda data: items.append(data), 400, 4, INGEST_QUEUE_OVERFLOW_POLICY_REJECT)
+    for idx in range(50):
+        assert ingest_queue.put("1234abcd", idx) == True
+    ingest_queue.stop()
+    assert items == list(range(50))
+
+def test_overflow_reject() -> None:
+    ingest_queue, process = _build_full_queue(INGEST_QUEUE_OVERFLOW_POLICY_REJECT)
+    assert ingest_queue.put("1234abcd", 3) == False
+    process.release.set()
+    ingest_queue.stop()
+    assert process.items == [1, 2]
+
+def test_overflow_synchronous() -> None:
+    # Caller processes the item itself.
+    ingest_queue, process = _build_full_queue(INGEST_QUEUE_OVERFLOW_POLICY_SYNCHRONOUS)
+    assert ingest_queue.put("1234abcd", 3) == False
+    process.release.set()
+    ingest_queue.stop()
+    assert process.items == [1, 2]
+
+def test_overflow_drop_oldest() -> None:
+    ingest_queue, process = _build_full_queue(INGEST_QUEUE_OVERFLOW_POLICY_DROP_OLDEST)
+    dropped_count = metrics.get_counter(INGEST_QUEUE_METRIC_DROPPED)
+    assert ingest_queue.put("1234abcd", 3) == True
+    assert metrics.get_counter(INGEST_QUEUE_METRIC_DROPPED) == (dropped_count + 1)
+    process.release.set()
+    ingest_queue.stop()
+    assert process.items == [1, 3]
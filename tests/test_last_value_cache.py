@@ -0,0 +1,87 @@
+"""
+* test_last_value_cache.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import time
+
+from database.last_value_cache import *
+
+### TEST LAST VALUE CACHE ###
+
+TAGS = {"sigfox_ep_id": "1234abcd", "site": "home"}
+
+def _build_point(value, time_seconds: int, tags=TAGS) -> list:
+    return ["meteofox_db", "rp_10y", {"measurement": "metadata", "fields": {"sw_version_major": value}, "tags": tags, "time": time_seconds}]
+
+def test_put_and_get() -> None:
+    cache = LastValueCache(10, 60, 60)
+    key = LastValueCache.build_key("meteofox_db", "rp_10y", "metadata", {"site": "home"}, "sw_version_major")
+    assert cache.get(key) is None
+    cache.put(key, 8, "2026-10-18T00:00:00Z")
+    assert cache.get(key) == (8, "2026-10-18T00:00:00Z")
+
+def test_put_keeps_newer_value() -> None:
+    cache = LastValueCache(10, 60, 60)
+    key = LastValueCache.build_key("meteofox_db", "rp_10y", "metadata", {"site": "home"}, "sw_version_major")
+    cache.put(key, 8, "2026-10-18T00:00:00Z")
+    cache.put(key, 7, "2025-10-18T00:00:00Z")
+    assert cache.get(key) == (8, "2026-10-18T00:00:00Z")
+
+def test_update_write_through() -> None:
+    cache = LastValueCache(10, 60, 60)
+    key = LastValueCache.build_key("meteofox_db", "rp_10y", "metadata", {"site": "home"}, "sw_version_major")
+    cache.put(key, 8, "2026-10-18T00:00:00Z")
+    # Newer point with a superset of the reader tags.
+    cache.update([_build_point(9, 1800000000)])
+    assert cache.get(key) == (9, "2027-01-15T08:00:00Z")
+    # Older point (backfill) and point of another site.
+    cache.update([_build_point(3, 100), _build_point(4, 1900000000, {"site": "lab"})])
+    assert cache.get(key) == (9, "2027-01-15T08:00:00Z")
+
+def test_update_ignores_unknown_keys() -> None:
+    cache = LastValueCache(10, 60, 60)
+    cache.update([_build_point(9, 1800000000)])
+    key = LastValueCache.build_key("meteofox_db", "rp_10y", "metadata", {"site": "home"}, "sw_version_major")
+    assert cache.get(key) is None
+
+def test_update_insert() -> None:
+    cache = LastValueCache(10, 60, 60)
+    cache.update([_build_point(9, 1800000000)], insert=True)
+    # Only the whole point tags are cached until a reader uses another tags filter.
+    key = LastValueCache.build_key("meteofox_db", "rp_10y", "metadata", TAGS, "sw_version_major")
+    assert cache.get(key) == (9, "2027-01-15T08:00:00Z")
+    key = LastValueCache.build_key("meteofox_db", "rp_10y", "metadata", {"site": "home"}, "sw_version_major")
+    assert cache.get(key) is None
+    cache.put(key, 9, "2027-01-15T08:00:00Z")
+    cache.update([_build_point(10, 1800000001)], insert=True)
+    assert cache.get(key) == (10, "2027-01-15T08:00:01Z")
+    key = LastValueCache.build_key("meteofox_db", "rp_10y", "metadata", {"sigfox_ep_id": "1234abcd"}, "sw_version_major")
+    assert cache.get(key) is None
+
+def test_update_insert_size() -> None:
+    cache = LastValueCache(10000, 60, 60)
+    tags = {("tag_" + str(idx)): str(idx) for idx in range(8)}
+    fields = {("field_" + str(idx)): idx for idx in range(10)}
+    cache.update([["dinfox_db", None, {"measurement": "electrical", "fields": fields, "tags": tags, "time": 1800000000}]], insert=True)
+    # One entry per field (not per subset of the tags).
+    assert len(cache._entries) == 10
+
+def test_capacity() -> None:
+    cache = LastValueCache(2, 60, 60)
+    keys = [LastValueCache.build_key("meteofox_db", None, "weather", {"site": str(idx)}, "temperature") for idx in range(3)]
+    for key in keys:
+        cache.put(key, 1, "2026-10-18T00:00:00Z")
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[2]) is not None
+
+def test_max_age() -> None:
+    cache = LastValueCache(10, 60, 0.05)
+    key = LastValueCache.build_key("meteofox_db", None, "weather", None, "temperature")
+    # Not found values are reloaded sooner.
+    cache.put(key, None, None)
+    assert cache.get(key) == (None, None)
+    time.sleep(0.1)
+    assert cache.get(key) is None
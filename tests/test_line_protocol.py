@@ -0,0 +1,34 @@
+"""
+* test_line_protocol.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+from database.line_protocol import *
+from influxdb import line_protocol
+
+### TEST LINE PROTOCOL ###
+
+POINTS = [
+    {"measurement": "weather", "fields": {"temperature": 21.5, "humidity": 40}, "tags": {"sigfox_ep_id": "1234abcd", "site": "home"}, "time": 1700000000},
+    {"measurement": "metadata", "fields": {"sw_version_commit_id": "0a1b2c", "error": -3}, "tags": {"site": "lab room, 1=2"}, "time": 1700000001},
+    {"measurement": "monitoring", "fields": {"status": "say \"hi\"", "path": "c:\\dir", "ratio": 1e-7}, "tags": {"sigfox_ep_id": "0000aaaa", "empty": ""}, "time": 1700000002},
+    {"measurement": "sensor", "fields": {"value": 1, "missing": None}, "time": 1700000003},
+    {"measurement": "geo location", "fields": {"latitude": 43.6}, "tags": {"tag with space": "v", "none": None}}
+]
+
+def test_encode_matches_make_lines() -> None:
+    encoder = LineProtocolEncoder()
+    expected = line_protocol.make_lines({"points": POINTS}).splitlines()
+    assert encoder.encode(POINTS) == expected
+    # Series keys are served from the cache the second time.
+    assert encoder.encode(POINTS) == expected
+
+def test_encode_boolean_fields() -> None:
+    encoder = LineProtocolEncoder()
+    assert encoder.encode_point({"measurement": "m", "fields": {"a": True, "b": False}, "time": 1}) == "m a=true,b=false 1"
+
+def test_encode_skips_points_without_fields() -> None:
+    encoder = LineProtocolEncoder()
+    assert encoder.encode([{"measurement": "m", "fields": {"a": None}, "time": 1}]) == []
@@ -0,0 +1,77 @@
+"""
+* test_response_cache.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+from utils.response_cache import *
+
+### TEST RESPONSE CACHE ###
+
+def _build_point(tags: dict, fields: dict) -> list:
+    return ["meteofox_db", None, {"measurement": "weather", "fields": fields, "tags": tags, "time": 1800000000}]
+
+def test_put_and_get() -> None:
+    cache = ResponseCache(10, 60, 60)
+    key = ResponseCache.build_key("meteofox_db", "weather", "temperature", {"site": "home"})
+    assert cache.get(key) is None
+    etag = cache.put(key, 200, {"value": 21.5}, cache.get_generation(key))
+    assert cache.get(key) == (200, {"value": 21.5}, etag)
+    assert ResponseCache.is_not_modified(etag, "W/" + etag + ", \"other\"") == True
+    assert ResponseCache.is_not_modified(etag, "\"other\"") == False
+
+def test_not_found_responses_have_no_etag() -> None:
+    cache = ResponseCache(10, 60, 60)
+    key = ResponseCache.build_key("meteofox_db", "weather", "temperature", None)
+    assert cache.put(key, 404, [], cache.get_generation(key)) is None
+    assert cache.get(key) == (404, [], None)
+
+def test_invalidate_matching_responses() -> None:
+    cache = ResponseCache(10, 60, 60)
+    key_home = ResponseCache.build_key("meteofox_db", "weather", "temperature", {"site": "home"})
+    key_lab = ResponseCache.build_key("meteofox_db", "weather", "temperature", {"site": "lab"})
+    key_humidity = ResponseCache.build_key("meteofox_db", "weather", "humidity", {"site": "home"})
+    for key in [key_home, key_lab, key_humidity]:
+        cache.put(key, 200, {"value": 1}, cache.get_generation(key))
+    # Point of the home site (readers filter on a subset of the point tags).
+    cache.invalidate([_build_point({"site": "home", "sigfox_ep_id": "1234abcd"}, {"temperature": 22.0})])
+    assert cache.get(key_home) is None
+    assert cache.get(key_lab) is not None
+    assert cache.get(key_humidity) is not None
+
+def test_write_during_read_is_not_cached() -> None:
+    cache = ResponseCache(10, 60, 60)
+    key = ResponseCache.build_key("meteofox_db", "weather", "temperature", {"site": "home"})
+    generation = cache.get_generation(key)
+    # Point written between the read and the put.
+    cache.invalidate([_build_point({"site": "home"}, {"temperature": 22.0})])
+    cache.put(key, 200, {"value": 21.5}, generation)
+    assert cache.get(key) is None
+    # Writes of other tags do not change the generation.
+    generation = cache.get_generation(key)
+    cache.invalidate([_build_point({"site": "lab"}, {"temperature": 22.0})])
+    cache.put(key, 200, {"value": 22.0}, generation)
+    assert cache.get(key) is not None
+
+def test_generations_are_bounded() -> None:
+    cache = ResponseCache(10, 60, 60)
+    key = ResponseCache.build_key("meteofox_db", "weather", "temperature", {"sigfox_ep_id": "1234abcd"})
+    cache.get_generation(key)
+    for idx in range(1000):
+        cache.invalidate([_build_point({"sigfox_ep_id": str(idx)}, {"temperature": 22.0})])
+    assert len(cache._generations) == 10
+
+def test_write_during_read_is_detected_after_eviction() -> None:
+    cache = ResponseCache(10, 60, 60)
+    key = ResponseCache.build_key("meteofox_db", "weather", "temperature", {"sigfox_ep_id": "1234abcd"})
+    generation = cache.get_generation(key)
+    # Point written during the read, then generation evicted by the writes of other devices.
+    cache.invalidate([_build_point({"sigfox_ep_id": "1234abcd"}, {"temperature": 22.0})])
+    for idx in range(20):
+        cache.invalidate([_build_point({"sigfox_ep_id": str(idx)}, {"temperature": 22.0})])
+    cache.put(key, 200, {"value": 21.5}, generation)
+    assert cache.get(key) is None
+    # Responses read after the eviction are cached.
+    cache.put(key, 200, {"value": 22.0}, cache.get_generation(key))
+    assert cache.get(key) is not None
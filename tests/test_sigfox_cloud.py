@@ -0,0 +1,86 @@
+"""
+* test_sigfox_cloud.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import pytest
+
+import utils.sigfox_cloud
+
+from typing import List
+from utils.sigfox_cloud import *
+
+### TEST SIGFOX CLOUD ###
+
+class FakeResponse:
+
+    def __init__(self, status_code: int) -> None:
+        self.status_code = status_code
+        self.headers = {SIGFOX_CLOUD_API_HTTP_HEADER_RETRY_AFTER: "30"}
+
+@pytest.fixture
+def sleeps(monkeypatch) -> list:
+    # Record the waits instead of sleeping.
+    sleeps = []
+    monkeypatch.setattr(utils.sigfox_cloud.time, "sleep", lambda seconds: sleeps.append(seconds))
+    return sleeps
+
+def _create_cloud(monkeypatch, status_codes: List[int]) -> tuple:
+    # Local variables.
+    requests_list = []
+    cloud = SigfoxCloud()
+    def get(request, params=None, timeout=None):
+        requests_list.append(request)
+        return FakeResponse(status_codes[min(len(requests_list), len(status_codes)) - 1])
+    monkeypatch.setattr(cloud._session, "get", get)
+    return cloud, requests_list
+
+def test_burst(sleeps) -> None:
+    token_bucket = TokenBucket(2.0, 5)
+    for _ in range(5):
+        assert token_bucket.acquire() == 0.0
+    # Next requests wait for the refill.
+    assert token_bucket.acquire() == pytest.approx(0.5, abs=0.05)
+    assert token_bucket.acquire() == pytest.approx(1.0, abs=0.05)
+    assert len(sleeps) == 2
+
+def test_pause(sleeps) -> None:
+    token_bucket = TokenBucket(2.0, 5)
+    # Server side rate limiting: no request before the delay.
+    token_bucket.pause(3.0)
+    assert token_bucket.acquire() == pytest.approx(3.0, abs=0.05)
+
+def test_bounded_wait(sleeps) -> None:
+    token_bucket = TokenBucket(2.0, 1)
+    assert token_bucket.acquire(1.0) == 0.0
+    token_bucket.pause(3.0)
+    # Token is not reserved when the caller gives up.
+    assert token_bucket.acquire(1.0) is None
+    assert token_bucket.acquire(1.0) is None
+    assert token_bucket.acquire() == pytest.approx(3.0, abs=0.05)
+    assert sleeps == [pytest.approx(3.0, abs=0.05)]
+
+def test_rate_limited_request_is_retried(monkeypatch, sleeps) -> None:
+    cloud, requests_list = _create_cloud(monkeypatch, [SIGFOX_CLOUD_API_HTTP_STATUS_TOO_MANY_REQUESTS, 200])
+    assert cloud.api_request(SIGFOX_CLOUD_API_REQUEST_DEVICES, None).status_code == 200
+    assert len(requests_list) == 2
+    # Retry waits for the Retry-After delay.
+    assert sum(sleeps) >= 30.0
+
+def test_rate_limited_request_without_retry(monkeypatch, sleeps) -> None:
+    cloud, requests_list = _create_cloud(monkeypatch, [SIGFOX_CLOUD_API_HTTP_STATUS_TOO_MANY_REQUESTS, 200])
+    response = cloud.api_request(SIGFOX_CLOUD_API_REQUEST_DEVICES, None, 0, 1.0)
+    assert response.status_code == SIGFOX_CLOUD_API_HTTP_STATUS_TOO_MANY_REQUESTS
+    assert len(requests_list) == 1
+    # Other requests sharing the limiter are not paused.
+    assert cloud.api_request(SIGFOX_CLOUD_API_REQUEST_DEVICES, None, 0, 1.0).status_code == 200
+    assert sleeps == []
+
+def test_request_gives_up_when_limiter_wait_is_too_long(monkeypatch, sleeps) -> None:
+    cloud, requests_list = _create_cloud(monkeypatch, [200])
+    cloud._limiter.pause(30.0)
+    assert cloud.api_request(SIGFOX_CLOUD_API_REQUEST_DEVICES, None, 0, 1.0) is None
+    assert requests_list == []
+    assert sleeps == []
@@ -0,0 +1,95 @@
+"""
+* test_sigfox_ep_server.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import threading
+import time
+import urllib.request
+
+from http.server import BaseHTTPRequestHandler
+from sigfox_ep_server import *
+
+### TEST SIGFOX EP SERVER ###
+
+class BlockingHandler(BaseHTTPRequestHandler):
+
+    # Shared by all the requests of a test.
+    lock = threading.Lock()
+    barrier = None
+    active_count = 0
+    active_count_max = 0
+
+    def do_GET(self):
+        with BlockingHandler.lock:
+            BlockingHandler.active_count += 1
+            BlockingHandler.active_count_max = max(BlockingHandler.active_count_max, BlockingHandler.active_count)
+        # Requests only complete when enough of them are processed at the same time.
+        if BlockingHandler.barrier is not None:
+            BlockingHandler.barrier.wait(timeout=5)
+        else:
+            time.sleep(0.1)
+        with BlockingHandler.lock:
+            BlockingHandler.active_count -= 1
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        return
+
+def _send_requests(server: SigfoxEpHttpServer, requests_count: int) -> List[int]:
+    # Local variables.
+    status_codes = []
+    url = "http://127.0.0.1:" + str(server.server_address[1]) + "/"
+    def send_request():
+        response = urllib.request.urlopen(url, timeout=10)
+        status_codes.append(response.status)
+        response.close()
+    threads = [threading.Thread(target=send_request) for _ in range(requests_count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return status_codes
+
+def _start_server(workers: int, barrier: Optional[threading.Barrier]) -> SigfoxEpHttpServer:
+    BlockingHandler.barrier = barrier
+    BlockingHandler.active_count = 0
+    BlockingHandler.active_count_max = 0
+    server = SigfoxEpHttpServer(("127.0.0.1", 0), BlockingHandler, workers)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def _stop_server(server: SigfoxEpHttpServer) -> None:
+    server.shutdown()
+    server.server_close()
+
+def test_requests_are_served_concurrently() -> None:
+    # Each request waits for the 4 others: they all fail if requests are served one by one.
+    server = _start_server(4, threading.Barrier(4))
+    try:
+        assert _send_requests(server, 4) == ([200] * 4)
+        assert BlockingHandler.active_count_max == 4
+    finally:
+        _stop_server(server)
+
+def test_workers_are_bounded() -> None:
+    server = _start_server(2, None)
+    try:
+        assert _send_requests(server, 8) == ([200] * 8)
+        assert BlockingHandler.active_count_max == 2
+    finally:
+        _stop_server(server)
+
+def test_callback_context_per_request() -> None:
+    # Scratch state of a callback is never visible to the other callbacks.
+    sigfox_ep_server = SigfoxEpServer.__new__(SigfoxEpServer)
+    context_1 = sigfox_ep_server._get_callback_context("1234abcd")
+    context_2 = sigfox_ep_server._get_callback_context("1234abcd")
+    context_1.downlink_hash = 42
+    assert context_1 is not context_2
+    assert context_2.downlink_hash == 0
+    assert context_2.sigfox_ep_id == "1234abcd"
@@ -0,0 +1,55 @@
+"""
+* test_single_flight.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import pytest
+import threading
+import time
+
+from database.single_flight import *
+
+### TEST SINGLE FLIGHT ###
+
+def test_identical_calls_are_collapsed() -> None:
+    single_flight = SingleFlight("test_single_flight")
+    calls = []
+    results = []
+    def function():
+        calls.append(1)
+        time.sleep(0.2)
+        return 42
+    threads = [threading.Thread(target=lambda: results.append(single_flight.do("query", function))) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == ([42] * 10)
+
+def test_different_keys() -> None:
+    single_flight = SingleFlight("test_single_flight")
+    assert single_flight.do("a", lambda: 1) == 1
+    assert single_flight.do("b", lambda: 2) == 2
+
+def test_error_is_shared() -> None:
+    single_flight = SingleFlight("test_single_flight")
+    errors = []
+    def function():
+        time.sleep(0.2)
+        raise ValueError("query failed")
+    def call():
+        try:
+            single_flight.do("query", function)
+        except ValueError as e:
+            errors.append(e)
+    threads = [threading.Thread(target=call) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 5
+    # Next call is executed again.
+    assert single_flight.do("query", lambda: 1) == 1
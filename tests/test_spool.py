@@ -0,0 +1,87 @@
+"""
+* test_spool.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import json
+import os
+import time
+
+import database.spool
+
+from database.spool import *
+
+### TEST SPOOL ###
+
+class WriteBatch:
+
+    def __init__(self, success: bool) -> None:
+        self.success = success
+        self.points = []
+
+    def __call__(self, points) -> bool:
+        if (self.success == True):
+            self.points.extend(points)
+        return self.success
+
+def _build_batch(idx: int) -> list:
+    return [["meteofox_db", None, {"measurement": "weather", "fields": {"temperature": idx}, "time": idx}]]
+
+def _wait_drained(spool: Spool) -> None:
+    deadline = time.monotonic() + 5
+    while (spool.get_depth() > 0) and (time.monotonic() < deadline):
+        time.sleep(0.01)
+
+def test_drain(tmp_path) -> None:
+    write_batch = WriteBatch(True)
+    spool = Spool(str(tmp_path), (1024 * 1024), write_batch, "test_spool")
+    for idx in range(100):
+        spool.append(_build_batch(idx))
+    _wait_drained(spool)
+    spool.close()
+    assert [point[2]["time"] for point in write_batch.points] == list(range(100))
+
+def test_replay_after_restart(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(database.spool, "SPOOL_RETRY_DELAY_MIN_SECONDS", 0.01)
+    # InfluxDB unavailable: batches stay in the spool.
+    spool = Spool(str(tmp_path), (1024 * 1024), WriteBatch(False), "test_spool")
+    for idx in range(10):
+        spool.append(_build_batch(idx))
+    spool.close()
+    # Pending batches are replayed in order at next startup.
+    write_batch = WriteBatch(True)
+    spool = Spool(str(tmp_path), (1024 * 1024), write_batch, "test_spool")
+    _wait_drained(spool)
+    spool.close()
+    assert [point[2]["time"] for point in write_batch.points] == list(range(10))
+
+def test_cursor(tmp_path) -> None:
+    spool = Spool(str(tmp_path), (1024 * 1024), WriteBatch(True), "test_spool")
+    for idx in range(10):
+        spool.append(_build_batch(idx))
+    _wait_drained(spool)
+    spool.close()
+    # Cursor is saved on close: drained batches are not replayed.
+    cursor_file = open(os.path.join(str(tmp_path), SPOOL_CURSOR_FILE_NAME), "r")
+    cursor_json = json.load(cursor_file)
+    cursor_file.close()
+    assert cursor_json[SPOOL_JSON_KEY_OFFSET] > 0
+    write_batch = WriteBatch(True)
+    spool = Spool(str(tmp_path), (1024 * 1024), write_batch, "test_spool")
+    assert spool.get_depth() == 0
+    spool.append(_build_batch(10))
+    _wait_drained(spool)
+    spool.close()
+    assert [point[2]["time"] for point in write_batch.points] == [10]
+
+def test_size_limit(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(database.spool, "SPOOL_RETRY_DELAY_MIN_SECONDS", 60.0)
+    spool = Spool(str(tmp_path), 20000, WriteBatch(False), "test_spool")
+    for idx in range(1000):
+        spool.append(_build_batch(idx))
+    # Oldest segments are dropped to stay under the size limit.
+    assert spool.get_size() <= 20000
+    assert spool.get_depth() < 1000
+    spool.close()
@@ -0,0 +1,82 @@
+"""
+* test_ttl_cache.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import json
+import threading
+import time
+
+from utils.ttl_cache import *
+
+### TEST TTL CACHE ###
+
+class Loader:
+
+    def __init__(self, delay_seconds: float = 0.0) -> None:
+        self.delay_seconds = delay_seconds
+        self.keys = []
+        self.value = "contract"
+
+    def __call__(self, key: str) -> str:
+        self.keys.append(key)
+        time.sleep(self.delay_seconds)
+        if self.value is None:
+            raise Exception("request failed")
+        return self.value
+
+def _count_saves(cache: TtlCache) -> list:
+    # Record the file writes.
+    saves = []
+    save_file = cache._save_file
+    def count_save() -> None:
+        saves.append(1)
+        save_file()
+    cache._save_file = count_save
+    return saves
+
+def test_concurrent_misses_are_collapsed() -> None:
+    loader = Loader(0.2)
+    cache = TtlCache("test_ttl", loader, 60, 60, 10)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("1234abcd"))) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert loader.keys == ["1234abcd"]
+    assert results == (["contract"] * 10)
+
+def test_file_written_when_entry_is_added(tmp_path) -> None:
+    file_path = str(tmp_path / "cache.json")
+    loader = Loader()
+    # Entries are always refreshed.
+    cache = TtlCache("test_ttl", loader, 60, 60, 120, file_path)
+    saves = _count_saves(cache)
+    assert cache.get("1234abcd") == "contract"
+    assert len(saves) == 1
+    # Refresh with the same value.
+    cache._load("1234abcd", refresh=True)
+    assert len(saves) == 1
+    # Value changed.
+    loader.value = "other_contract"
+    cache._load("1234abcd", refresh=True)
+    assert len(saves) == 2
+    # Entries are loaded at startup.
+    cache = TtlCache("test_ttl", Loader(), 60, 60, 10, file_path)
+    assert cache.get("1234abcd") == "other_contract"
+
+def test_expired_entries_are_not_saved(tmp_path) -> None:
+    file_path = str(tmp_path / "cache.json")
+    loader = Loader()
+    loader.value = None
+    cache = TtlCache("test_ttl", loader, 60, 0.05, 10, file_path)
+    assert cache.get("1234abcd") is None
+    time.sleep(0.1)
+    loader.value = "contract"
+    cache.get("0000aaaa")
+    cache_file = open(file_path, "r")
+    assert list(json.load(cache_file).keys()) == ["0000aaaa"]
+    cache_file.close()
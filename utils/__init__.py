@@ -1,6 +1,14 @@
 __all__ = [
     "api_callback",
+    "async_server",
     "configuration",
+    "downlink_store",
+    "ingest_queue",
+    "log",
+    "metrics",
+    "reprocess",
+    "response_cache",
     "sigfox",
-    "test"
+    "test",
+    "ttl_cache"
 ]
\ No newline at end of file
@@ -8,27 +8,172 @@
 import requests
 import json
 import sys
+import threading
 import time
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from database.database import *
+from ep.atxfox import *
+from ep.dinfox import *
 from ep.ep import *
+from ep.homefox import *
+from ep.meteofox import *
+from ep.sensit import *
+from ep.smarttag import *
+from ep.trackfox import *
+from typing import Dict, List, Optional
 from utils.configuration import *
 from utils.sigfox_cloud import *
 
 ### API CALLBACK macros ###
 
-API_CALLBACK_SIGFOX_CLOUD_API_REQUEST_DELAY_SECONDS = 1.1
-API_CALLBACK_SIGFOX_EP_SERVER_TIMEOUT_SECONDS = 10
+API_CALLBACK_SIGFOX_EP_SERVER_TIMEOUT_SECONDS = 60
+API_CALLBACK_SIGFOX_EP_SERVER_BATCH_PATH = "batch"
+# Devices restored concurrently (the Sigfox cloud rate limiter is shared by all of them).
+API_CALLBACK_DEVICE_WORKERS = 4
+API_CALLBACK_SUBMIT_WORKERS = 4
+API_CALLBACK_PROGRESS_PERIOD_SECONDS = 10
+API_CALLBACK_DEVICE_RETRY_MAX_COUNT = 3
+API_CALLBACK_DEVICE_RETRY_DELAY_SECONDS = 5
+
+API_CALLBACK_CHECKPOINT_FILE_NAME = os.path.join(SIGFOX_EP_SERVER_PATH, "api_callback_checkpoint.json")
+API_CALLBACK_CHECKPOINT_JSON_KEY_MODE = "mode"
+API_CALLBACK_CHECKPOINT_JSON_KEY_START_TIME = "start_time"
+API_CALLBACK_CHECKPOINT_JSON_KEY_STOP_TIME = "stop_time"
+API_CALLBACK_CHECKPOINT_JSON_KEY_DEVICES = "devices"
+API_CALLBACK_CHECKPOINT_JSON_KEY_NEXT_PAGE_REQUEST = "next"
+API_CALLBACK_CHECKPOINT_JSON_KEY_LAST_MESSAGE_TIME = "last_message_time"
+API_CALLBACK_CHECKPOINT_JSON_KEY_COMPLETE = "complete"
+
+API_CALLBACK_MODE_RANGE = "range"
+API_CALLBACK_MODE_INCREMENTAL = "incremental"
 
 ### API CALLBACK classes ###
 
+class RestoreCheckpoint:
+
+    def __init__(self, file_path: str, mode: str, timestamp_start_epoch_ms: int, timestamp_stop_epoch_ms: int) -> None:
+        # Init context.
+        self._file_path = file_path
+        self._lock = threading.Lock()
+        self._checkpoint_json = {
+            API_CALLBACK_CHECKPOINT_JSON_KEY_MODE: mode,
+            API_CALLBACK_CHECKPOINT_JSON_KEY_START_TIME: timestamp_start_epoch_ms,
+            API_CALLBACK_CHECKPOINT_JSON_KEY_STOP_TIME: timestamp_stop_epoch_ms,
+            API_CALLBACK_CHECKPOINT_JSON_KEY_DEVICES: {}
+        }
+        # Resume previous job only if it was started with the same mode and time range.
+        try:
+            checkpoint_file = open(self._file_path, "r")
+            checkpoint_json = json.load(checkpoint_file)
+            checkpoint_file.close()
+            if ((checkpoint_json.get(API_CALLBACK_CHECKPOINT_JSON_KEY_MODE, API_CALLBACK_MODE_RANGE) == mode) and
+                (checkpoint_json[API_CALLBACK_CHECKPOINT_JSON_KEY_START_TIME] == timestamp_start_epoch_ms) and
+                (checkpoint_json[API_CALLBACK_CHECKPOINT_JSON_KEY_STOP_TIME] == timestamp_stop_epoch_ms)):
+                self._checkpoint_json = checkpoint_json
+                print("[API CALLBACK] * Resuming restore from " + self._file_path)
+        except:
+            pass
+
+    def get_device(self, sigfox_ep_id: str) -> Dict:
+        with self._lock:
+            return dict(self._checkpoint_json[API_CALLBACK_CHECKPOINT_JSON_KEY_DEVICES].get(sigfox_ep_id, {}))
+
+    def _save(self) -> None:
+        # Must be called with lock held: atomic update of the file.
+        checkpoint_file = open(self._file_path + ".tmp", "w")
+        json.dump(self._checkpoint_json, checkpoint_file, indent=4)
+        checkpoint_file.close()
+        os.replace(self._file_path + ".tmp", self._file_path)
+
+    def set_device_start_time(self, sigfox_ep_id: str, start_time_ms: Optional[int]) -> None:
+        # Start time of an incremental restore (kept so that a resumed job does not depend on the data written since).
+        with self._lock:
+            device = self._checkpoint_json[API_CALLBACK_CHECKPOINT_JSON_KEY_DEVICES].setdefault(sigfox_ep_id, {})
+            device[API_CALLBACK_CHECKPOINT_JSON_KEY_START_TIME] = start_time_ms
+            self._save()
+
+    def update_device(self, sigfox_ep_id: str, next_page_request: Optional[str], last_message_time_ms: Optional[int], complete: bool) -> None:
+        with self._lock:
+            device = self._checkpoint_json[API_CALLBACK_CHECKPOINT_JSON_KEY_DEVICES].setdefault(sigfox_ep_id, {})
+            device[API_CALLBACK_CHECKPOINT_JSON_KEY_NEXT_PAGE_REQUEST] = next_page_request
+            if last_message_time_ms is not None:
+                device[API_CALLBACK_CHECKPOINT_JSON_KEY_LAST_MESSAGE_TIME] = last_message_time_ms
+            device[API_CALLBACK_CHECKPOINT_JSON_KEY_COMPLETE] = complete
+            self._save()
+
+    def remove(self) -> None:
+        with self._lock:
+            if os.path.exists(self._file_path):
+                os.remove(self._file_path)
+
+class RestoreProgress:
+
+    def __init__(self, sigfox_ep_id_list: List[str], timestamp_start_epoch_ms: int, timestamp_stop_epoch_ms: int) -> None:
+        # Init context.
+        self._lock = threading.Lock()
+        self._timestamp_start_epoch_ms = timestamp_start_epoch_ms
+        self._timestamp_stop_epoch_ms = timestamp_stop_epoch_ms
+        self._start_time = time.monotonic()
+        self._messages_count = 0
+        self._errors_count = 0
+        # Per device: [messages count, pages count, completion ratio, done flag, start time].
+        self._devices = {sigfox_ep_id: [0, 0, 0.0, False, timestamp_start_epoch_ms] for sigfox_ep_id in sigfox_ep_id_list}
+
+    def set_device_start_time(self, sigfox_ep_id: str, start_time_ms: int) -> None:
+        with self._lock:
+            self._devices[sigfox_ep_id][4] = start_time_ms
+
+    def update(self, sigfox_ep_id: str, messages_count: int, errors_count: int, oldest_message_time_ms: int) -> None:
+        with self._lock:
+            device = self._devices[sigfox_ep_id]
+            device[0] += messages_count
+            device[1] += 1
+            # Messages are returned from the newest to the oldest one.
+            if (self._timestamp_stop_epoch_ms > device[4]):
+                device[2] = min(1.0, max(0.0, (self._timestamp_stop_epoch_ms - oldest_message_time_ms) / (self._timestamp_stop_epoch_ms - device[4])))
+            self._messages_count += messages_count
+            self._errors_count += errors_count
+
+    def complete(self, sigfox_ep_id: str) -> None:
+        with self._lock:
+            device = self._devices[sigfox_ep_id]
+            device[2] = 1.0
+            device[3] = True
+        print("[API CALLBACK] * Sigfox EP ID " + sigfox_ep_id + " done (" + str(device[0]) + " messages in " + str(device[1]) + " pages)")
+
+    def skip(self, sigfox_ep_id: str) -> None:
+        with self._lock:
+            self._devices[sigfox_ep_id][2] = 1.0
+            self._devices[sigfox_ep_id][3] = True
+
+    def get_summary(self) -> str:
+        with self._lock:
+            elapsed_seconds = (time.monotonic() - self._start_time)
+            done_count = len([device for device in self._devices.values() if device[3]])
+            ratio = (sum(device[2] for device in self._devices.values()) / len(self._devices)) if self._devices else 1.0
+            throughput = (self._messages_count / elapsed_seconds) if (elapsed_seconds > 0) else 0.0
+            eta = (str(int(elapsed_seconds * (1.0 - ratio) / ratio)) + "s") if (ratio > 0) else "unknown"
+            return ("devices=" + str(done_count) + "/" + str(len(self._devices)) + " messages=" + str(self._messages_count) + " errors=" + str(self._errors_count) +
+                    " throughput=" + str(round(throughput, 1)) + " msg/s progress=" + str(round(ratio * 100.0, 1)) + "% ETA=" + eta)
+
 class ApiCallback:
 
     def __init__(self, server_address: str) -> None:
         # Init context.
         self._server_address = server_address
+        self._session = requests.Session()
+        self._progress = None
+        self._checkpoint = None
+        self._database = None
+        self._mode = API_CALLBACK_MODE_RANGE
+        self._timestamp_stop_epoch_ms = 0
 
-    # Send callback to server.
-    def _send_sigfox_ep_server_callback(self, ep_id, messages_list):
+    # Send callbacks to server.
+    def _send_sigfox_ep_server_callback(self, ep_id, messages_list) -> Optional[int]:
+        # Local variables.
+        json_batch = []
+        errors_count = None
         # Message loop.
         for message in messages_list:
             # Create JSON for data bidirectional callback.
@@ -40,18 +185,116 @@ class ApiCallback:
                 SIGFOX_CLOUD_CALLBACK_JSON_KEY_UL_PAYLOAD: message.get(SIGFOX_CLOUD_API_JSON_KEY_UL_PAYLOAD),
                 SIGFOX_CLOUD_CALLBACK_JSON_KEY_BIDIRECTIONAL_FLAG: SIGFOX_CLOUD_CALLBACK_JSON_FALSE
             }
-            print("[SIGFOX_EP_SERVER] * Sending callback for message [time=" + str(message.get(SIGFOX_CLOUD_API_JSON_KEY_TIME)) + ", ul_payload=" + message.get(SIGFOX_CLOUD_API_JSON_KEY_UL_PAYLOAD) + "]")
-            # Sigfox EP server callback.
-            try:
-                response = requests.post(self._server_address, json=json_callback, timeout=API_CALLBACK_SIGFOX_EP_SERVER_TIMEOUT_SECONDS)
-                if ((response.status_code == 200) or (response.status_code == 204)):
-                    print("[SIGFOX_EP_SERVER] * OK")
-                else:
-                    print("[SIGFOX_EP_SERVER] * ERROR: status_code=" + str(response.status_code))
-            except Exception as expection_message:
-                print(expection_message)
-            # Delay between callbacks.
-            time.sleep(SIGFOX_EP_SERVER_REQUEST_DELAY_SECONDS)
+            json_batch.append(json_callback)
+        # Sigfox EP server batch callback.
+        try:
+            response = self._session.post(self._server_address + "/" + API_CALLBACK_SIGFOX_EP_SERVER_BATCH_PATH, json=json_batch, headers={"X-API-Key": SIGFOX_EP_SERVER_API_KEY}, timeout=API_CALLBACK_SIGFOX_EP_SERVER_TIMEOUT_SECONDS)
+            if (response.status_code == 200):
+                # Check status of each callback.
+                status_list = [item.get("status") for item in json.loads(response.text)]
+                errors_count = len([status for status in status_list if ((status != 200) and (status != 204))])
+                if (errors_count > 0):
+                    print("[SIGFOX_EP_SERVER] * ERROR: " + str(errors_count) + " callbacks of Sigfox EP ID " + ep_id + " failed")
+            else:
+                print("[SIGFOX_EP_SERVER] * ERROR: status_code=" + str(response.status_code))
+        except Exception as expection_message:
+            print(expection_message)
+        return errors_count
+
+    def _submit_page(self, sigfox_ep_id: str, messages_list: List[Dict], next_page_request: Optional[str]) -> None:
+        errors_count = self._send_sigfox_ep_server_callback(sigfox_ep_id, messages_list)
+        if errors_count is None:
+            raise Exception("batch callback failed")
+        oldest_message_time_ms = min(int(message.get(SIGFOX_CLOUD_API_JSON_KEY_TIME)) for message in messages_list)
+        self._progress.update(sigfox_ep_id, len(messages_list), errors_count, oldest_message_time_ms)
+        # Page is fully processed: save cursor of the next one.
+        self._checkpoint.update_device(sigfox_ep_id, next_page_request, oldest_message_time_ms, False)
+
+    def _read_page(self, sigfox_ep_id: str, request: str, parameters: Optional[Dict]) -> Dict:
+        # Retry transient errors (rate limiting is already handled by the Sigfox cloud client).
+        for retry_count in range(API_CALLBACK_DEVICE_RETRY_MAX_COUNT + 1):
+            response = sigfox_cloud.api_request(request, parameters)
+            if ((response != None) and (response.status_code == 200)):
+                return json.loads(response.text)
+            print("[API CALLBACK] * ERROR: failed to read messages of Sigfox EP ID " + sigfox_ep_id + " (status_code=" + (str(response.status_code) if (response != None) else "None") + ")")
+            if ((response != None) and (response.status_code < 500) and (response.status_code != SIGFOX_CLOUD_API_HTTP_STATUS_TOO_MANY_REQUESTS)):
+                break
+            if (retry_count < API_CALLBACK_DEVICE_RETRY_MAX_COUNT):
+                time.sleep(API_CALLBACK_DEVICE_RETRY_DELAY_SECONDS * (retry_count + 1))
+        raise Exception("messages request failed")
+
+    def _read_last_data_time(self, sigfox_ep_id: str) -> Optional[int]:
+        # Read the newest data time stored for the device.
+        ep_entry = ep.get_entry(sigfox_ep_id)
+        if ((ep_entry is None) or (ep_entry.database is None)):
+            return None
+        last_data_time, _ = self._database.read_field(ep_entry.database, {DATABASE_TAG_SIGFOX_EP_ID: sigfox_ep_id}, DATABASE_MEASUREMENT_METADATA, DATABASE_FIELD_LAST_DATA_TIME, False)
+        return None if (last_data_time is None) else int(last_data_time)
+
+    def _get_incremental_parameters(self, sigfox_ep_id: str, device_checkpoint: Dict, timestamp_stop_epoch_ms: int) -> Optional[Dict]:
+        # Use the start time of the interrupted job if any.
+        if (API_CALLBACK_CHECKPOINT_JSON_KEY_START_TIME in device_checkpoint):
+            start_time_ms = device_checkpoint[API_CALLBACK_CHECKPOINT_JSON_KEY_START_TIME]
+        else:
+            last_data_time = self._read_last_data_time(sigfox_ep_id)
+            # Data time is stored in seconds.
+            start_time_ms = None if (last_data_time is None) else ((last_data_time + 1) * 1000)
+            self._checkpoint.set_device_start_time(sigfox_ep_id, start_time_ms)
+        if start_time_ms is None:
+            print("[API CALLBACK] * No data stored for Sigfox EP ID " + sigfox_ep_id + ", retrieving all messages")
+            return None
+        self._progress.set_device_start_time(sigfox_ep_id, start_time_ms)
+        print("[API CALLBACK] * Retrieving messages of Sigfox EP ID " + sigfox_ep_id + " since " + str(start_time_ms))
+        return {
+            SIGFOX_CLOUD_API_JSON_KEY_START_TIME: start_time_ms,
+            SIGFOX_CLOUD_API_JSON_KEY_STOP_TIME: timestamp_stop_epoch_ms
+        }
+
+    def _restore_device(self, sigfox_ep_id: str, parameters: Optional[Dict], submit_executor: ThreadPoolExecutor) -> None:
+        # Local variables.
+        submit_future = None
+        # Skip devices already restored and resume the other ones from their last processed page.
+        device_checkpoint = self._checkpoint.get_device(sigfox_ep_id)
+        if (device_checkpoint.get(API_CALLBACK_CHECKPOINT_JSON_KEY_COMPLETE) == True):
+            self._progress.skip(sigfox_ep_id)
+            print("[API CALLBACK] * Sigfox EP ID " + sigfox_ep_id + " already restored")
+            return
+        # In incremental mode, only retrieve the messages newer than the data already stored.
+        if (self._mode == API_CALLBACK_MODE_INCREMENTAL):
+            parameters = self._get_incremental_parameters(sigfox_ep_id, device_checkpoint, self._timestamp_stop_epoch_ms)
+        request = device_checkpoint.get(API_CALLBACK_CHECKPOINT_JSON_KEY_NEXT_PAGE_REQUEST)
+        if request is None:
+            # Build request.
+            request = SIGFOX_CLOUD_API_REQUEST_DEVICES + sigfox_ep_id + "/" + SIGFOX_CLOUD_API_REQUEST_MESSAGES
+        else:
+            parameters = None
+            print("[API CALLBACK] * Resuming Sigfox EP ID " + sigfox_ep_id + " from " + request)
+        try:
+            # Paging loop.
+            while (str(request) != SIGFOX_CLOUD_API_REQUEST_NONE):
+                # API request (next page requests already include the query parameters).
+                messages_list_json = self._read_page(sigfox_ep_id, request, parameters)
+                parameters = None
+                messages_list = messages_list_json.get(SIGFOX_CLOUD_API_JSON_KEY_DATA)
+                # Check if there are messages to process.
+                if (len(messages_list) == 0):
+                    break
+                # Get next page request.
+                paging = messages_list_json.get(SIGFOX_CLOUD_API_JSON_KEY_PAGING)
+                request = paging.get(SIGFOX_CLOUD_API_JSON_KEY_NEXT_PAGE_REQUEST)
+                # Send callbacks to server while the next page is downloaded (one page in flight per device).
+                if submit_future is not None:
+                    submit_future.result()
+                submit_future = submit_executor.submit(self._submit_page, sigfox_ep_id, messages_list, request)
+        finally:
+            if submit_future is not None:
+                submit_future.result()
+        self._checkpoint.update_device(sigfox_ep_id, None, None, True)
+        self._progress.complete(sigfox_ep_id)
+
+    def _print_progress(self, stop_event: threading.Event) -> None:
+        while (stop_event.wait(API_CALLBACK_PROGRESS_PERIOD_SECONDS) == False):
+            print("[API CALLBACK] * Progress: " + self._progress.get_summary())
 
     def restore_all_data(self, timestamp_start_epoch_ms: int, timestamp_stop_epoch_ms: int) -> None:
         # Get devices list.
@@ -64,30 +307,50 @@ class ApiCallback:
                 SIGFOX_CLOUD_API_JSON_KEY_START_TIME: timestamp_start_epoch_ms,
                 SIGFOX_CLOUD_API_JSON_KEY_STOP_TIME: timestamp_stop_epoch_ms
             }
-        # Devices loop.
-        for sigfox_ep_id in sigfox_ep_id_list:
-            print("[API CALLBACK] * Reading all messages of Sigfox EP ID " + sigfox_ep_id)
-            # Build request.
-            request = SIGFOX_CLOUD_API_REQUEST_DEVICES + sigfox_ep_id + "/" + SIGFOX_CLOUD_API_REQUEST_MESSAGES
-            # Paging loop.
-            while (str(request) != SIGFOX_CLOUD_API_REQUEST_NONE):
-                # API request.
-                response = sigfox_cloud.api_request(request, parameters, API_CALLBACK_SIGFOX_CLOUD_API_REQUEST_DELAY_SECONDS)
-                if ((response == None) or (response.status_code != 200)):
-                    return
-                # Open JSON structure.
-                messages_list_json = json.loads(response.text)
-                messages_list = messages_list_json.get(SIGFOX_CLOUD_API_JSON_KEY_DATA)
-                # Check if there are messages to process.
-                if (len(messages_list) == 0):
-                    request = SIGFOX_CLOUD_API_REQUEST_NONE
-                    break
-                else:
-                    # Get next page request.
-                    paging = messages_list_json.get(SIGFOX_CLOUD_API_JSON_KEY_PAGING)
-                    request = paging.get(SIGFOX_CLOUD_API_JSON_KEY_NEXT_PAGE_REQUEST)
-                # Send callbacks to server.
-                self._send_sigfox_ep_server_callback(sigfox_ep_id, messages_list)
+            self._progress = RestoreProgress(sigfox_ep_id_list, int(timestamp_start_epoch_ms), int(timestamp_stop_epoch_ms))
+        else:
+            self._progress = RestoreProgress(sigfox_ep_id_list, 0, 0)
+        self._mode = API_CALLBACK_MODE_RANGE
+        self._restore(sigfox_ep_id_list, parameters, int(timestamp_start_epoch_ms), int(timestamp_stop_epoch_ms))
+
+    def sync_incremental(self) -> None:
+        # Get devices list.
+        sigfox_ep_id_list = ep.get_sigfox_ep_id_list()
+        timestamp_stop_epoch_ms = int(time.time() * 1000)
+        # Start time of each device is read from the database.
+        if self._database is None:
+            self._database = Database()
+        self._mode = API_CALLBACK_MODE_INCREMENTAL
+        self._timestamp_stop_epoch_ms = timestamp_stop_epoch_ms
+        self._progress = RestoreProgress(sigfox_ep_id_list, 0, timestamp_stop_epoch_ms)
+        # The checkpoint of an incremental job does not depend on the time range.
+        self._restore(sigfox_ep_id_list, None, 0, 0)
+
+    def _restore(self, sigfox_ep_id_list: List[str], parameters: Optional[Dict], timestamp_start_epoch_ms: int, timestamp_stop_epoch_ms: int) -> None:
+        self._checkpoint = RestoreCheckpoint(API_CALLBACK_CHECKPOINT_FILE_NAME, self._mode, timestamp_start_epoch_ms, timestamp_stop_epoch_ms)
+        print("[API CALLBACK] * Restoring " + str(len(sigfox_ep_id_list)) + " devices (" + self._mode + " mode)")
+        # Periodic progress report.
+        stop_event = threading.Event()
+        progress_thread = threading.Thread(target=self._print_progress, args=(stop_event,), daemon=True)
+        progress_thread.start()
+        # Devices are restored in parallel (an error on one device does not abort the other ones).
+        failed_count = 0
+        with ThreadPoolExecutor(max_workers=API_CALLBACK_SUBMIT_WORKERS) as submit_executor:
+            with ThreadPoolExecutor(max_workers=API_CALLBACK_DEVICE_WORKERS) as device_executor:
+                futures = {device_executor.submit(self._restore_device, sigfox_ep_id, parameters, submit_executor): sigfox_ep_id for sigfox_ep_id in sigfox_ep_id_list}
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        failed_count += 1
+                        print("[API CALLBACK] * ERROR: Sigfox EP ID " + futures[future] + " (" + str(e) + ")")
+        stop_event.set()
+        progress_thread.join()
+        if (failed_count == 0):
+            self._checkpoint.remove()
+            print("[API CALLBACK] * Restore complete: " + self._progress.get_summary())
+        else:
+            print("[API CALLBACK] * Restore incomplete (" + str(failed_count) + " devices failed, run again to resume): " + self._progress.get_summary())
         return
 
 ### MAIN PROGRAM ###
@@ -102,15 +365,23 @@ sigfox_ep_server_name = input("Sigfox EP server address = ")
 sigfox_ep_server_address = sigfox_ep_server_name + ":" + str(SIGFOX_EP_SERVER_HTTP_PORT)
 print("")
 
-# Read timestamps
-timestamp_start_epoch_ms = input("Retrieve data from (EPOCH ms) = ")
-timestamp_stop_epoch_ms = input("Retrieve data to (EPOCH ms) = ")
-if (timestamp_stop_epoch_ms == "now"):
-    timestamp_stop_epoch_ms = str(int(time.time() * 1000))
+api_callback = ApiCallback(sigfox_ep_server_address)
+
+# Read mode.
+restore_mode = input("Restore mode (" + API_CALLBACK_MODE_RANGE + "/" + API_CALLBACK_MODE_INCREMENTAL + ") = ")
 print("")
 
-api_callback = ApiCallback(sigfox_ep_server_address)
-api_callback.restore_all_data(timestamp_start_epoch_ms, timestamp_stop_epoch_ms)
+if (restore_mode == API_CALLBACK_MODE_INCREMENTAL):
+    # Retrieve messages newer than the last data stored for each device.
+    api_callback.sync_incremental()
+else:
+    # Read timestamps
+    timestamp_start_epoch_ms = input("Retrieve data from (EPOCH ms) = ")
+    timestamp_stop_epoch_ms = input("Retrieve data to (EPOCH ms) = ")
+    if (timestamp_stop_epoch_ms == "now"):
+        timestamp_stop_epoch_ms = str(int(time.time() * 1000))
+    print("")
+    api_callback.restore_all_data(timestamp_start_epoch_ms, timestamp_stop_epoch_ms)
 
 print("")
 print("***********************")
@@ -0,0 +1,206 @@
+"""
+* async_server.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import asyncio
+import json
+
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Dict, Optional
+from utils.log import *
+
+### ASYNC SERVER macros ###
+
+ASYNC_SERVER_IDLE_TIMEOUT_SECONDS = 30
+ASYNC_SERVER_HEADERS_MAX_COUNT = 100
+ASYNC_SERVER_LINE_MAX_SIZE_BYTES = 8192
+ASYNC_SERVER_BODY_MAX_SIZE_BYTES = (16 * 1024 * 1024)
+ASYNC_SERVER_LISTEN_BACKLOG = 4096
+
+ASYNC_SERVER_HEADER_CONTENT_TYPE = "content-type"
+ASYNC_SERVER_HEADER_CONTENT_LENGTH = "content-length"
+ASYNC_SERVER_HEADER_CONNECTION = "connection"
+ASYNC_SERVER_HEADER_TRANSFER_ENCODING = "transfer-encoding"
+ASYNC_SERVER_HEADER_API_KEY = "x-api-key"
+ASYNC_SERVER_HEADER_IF_NONE_MATCH = "if-none-match"
+
+ASYNC_SERVER_PATH_BATCH = "batch"
+
+### ASYNC SERVER classes ###
+
+class AsyncHttpError(Exception):
+
+    def __init__(self, http_return_code: int, message: str) -> None:
+        super().__init__(message)
+        self.http_return_code = http_return_code
+
+class AsyncHttpRequest:
+
+    def __init__(self, method: str, path: str, version: str, headers: Dict[str, str], body: bytes) -> None:
+        self.method = method
+        self.path = path
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    def keep_alive(self) -> bool:
+        # HTTP/1.1 connections are persistent unless explicitly closed, HTTP/1.0 ones only on request.
+        connection = self.headers.get(ASYNC_SERVER_HEADER_CONNECTION, "").lower()
+        if (self.version == "HTTP/1.1"):
+            return (connection != "close")
+        return (connection == "keep-alive")
+
+class AsyncHttpServer:
+
+    def __init__(self, sigfox_ep_server, port: int, workers: int) -> None:
+        # Init context.
+        self._sigfox_ep_server = sigfox_ep_server
+        self._port = port
+        # Blocking parts (callback parsing, database and Sigfox cloud accesses) are offloaded to a bounded thread pool.
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sigfox_ep_server_async")
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[AsyncHttpRequest]:
+        # Local variables.
+        headers = {}
+        body = b""
+        # Read request line (wait for the next pipelined or keep-alive request).
+        request_line = await asyncio.wait_for(reader.readline(), timeout=ASYNC_SERVER_IDLE_TIMEOUT_SECONDS)
+        if not request_line:
+            return None
+        # Skip empty lines between requests.
+        while (request_line in (b"\r\n", b"\n")):
+            request_line = await asyncio.wait_for(reader.readline(), timeout=ASYNC_SERVER_IDLE_TIMEOUT_SECONDS)
+            if not request_line:
+                return None
+        if (len(request_line) > ASYNC_SERVER_LINE_MAX_SIZE_BYTES):
+            raise AsyncHttpError(400, "request line too long")
+        method, path, version = request_line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        # Read headers.
+        for _ in range(ASYNC_SERVER_HEADERS_MAX_COUNT + 1):
+            line = await asyncio.wait_for(reader.readline(), timeout=ASYNC_SERVER_IDLE_TIMEOUT_SECONDS)
+            if (line in (b"\r\n", b"\n", b"")):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        else:
+            raise AsyncHttpError(400, "too many headers")
+        # Chunked bodies are not used by the Sigfox backend.
+        if (ASYNC_SERVER_HEADER_TRANSFER_ENCODING in headers):
+            raise AsyncHttpError(501, "transfer encoding not supported")
+        # Read body.
+        content_length = int(headers.get(ASYNC_SERVER_HEADER_CONTENT_LENGTH, 0))
+        if ((content_length < 0) or (content_length > ASYNC_SERVER_BODY_MAX_SIZE_BYTES)):
+            raise AsyncHttpError(400, "invalid content length")
+        if (content_length > 0):
+            body = await asyncio.wait_for(reader.readexactly(content_length), timeout=ASYNC_SERVER_IDLE_TIMEOUT_SECONDS)
+        return AsyncHttpRequest(method, path, version, headers, body)
+
+    @staticmethod
+    def _build_response(http_return_code: int, http_headers: Dict[str, str], json_out, keep_alive: bool) -> bytes:
+        # Local variables.
+        body = b""
+        try:
+            reason = HTTPStatus(http_return_code).phrase
+        except ValueError:
+            reason = ""
+        # Build header.
+        response = "HTTP/1.1 " + str(http_return_code) + " " + reason + "\r\n"
+        for header_name, header_value in http_headers.items():
+            response += (header_name + ": " + header_value + "\r\n")
+        if ((json_out is not None) and (len(json_out) > 0)):
+            body = json.dumps(json_out).encode()
+            response += "Content-Type: application/json\r\n"
+        # 204 and 304 responses must not carry a content length.
+        if (http_return_code not in (204, 304)):
+            response += ("Content-Length: " + str(len(body)) + "\r\n")
+        response += ("Connection: " + ("keep-alive" if keep_alive else "close") + "\r\n")
+        response += "\r\n"
+        return (response.encode("latin-1") + body)
+
+    async def _execute_request(self, request: AsyncHttpRequest, deferred_record_list: list) -> tuple:
+        # Local variables.
+        loop = asyncio.get_running_loop()
+        # Data callbacks.
+        if (request.method == "POST"):
+            Log.debug_print("[SIGFOX EP SERVER] * POST request received")
+            # Check content type.
+            if (request.headers.get(ASYNC_SERVER_HEADER_CONTENT_TYPE) != "application/json"):
+                Log.debug_print("ERROR: invalid HTTP content type")
+                return 400, {}, None
+            json_in = json.loads(request.body)
+            # Batch of callbacks.
+            if (request.path.split("?", 1)[0].strip("/") == ASYNC_SERVER_PATH_BATCH):
+                http_return_code, json_out = await loop.run_in_executor(self._executor, self._sigfox_ep_server.execute_batch, request.headers.get(ASYNC_SERVER_HEADER_API_KEY), json_in)
+            else:
+                http_return_code, json_out = await loop.run_in_executor(self._executor, self._sigfox_ep_server.execute_callback, json_in, deferred_record_list)
+            return http_return_code, {}, json_out
+        # API requests.
+        elif (request.method == "GET"):
+            Log.debug_print("[SIGFOX EP SERVER] * GET request received")
+            return await loop.run_in_executor(self._executor, self._sigfox_ep_server.execute_api_request, request.headers.get(ASYNC_SERVER_HEADER_API_KEY), request.path, request.headers.get(ASYNC_SERVER_HEADER_IF_NONE_MATCH))
+        elif (request.method == "HEAD"):
+            Log.debug_print("[SIGFOX EP SERVER] * HEAD request received")
+            return 400, {}, None
+        return 501, {}, None
+
+    @staticmethod
+    def _check_deferred_write(future: asyncio.Future) -> None:
+        # Deferred writes are not awaited, so that the next request of the connection is not delayed.
+        if (future.cancelled() == False) and (future.exception() is not None):
+            Log.debug_print("[SIGFOX EP SERVER] * ERROR: deferred records write failed (" + str(future.exception()) + ")")
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Local variables.
+        loop = asyncio.get_running_loop()
+        try:
+            # Requests are processed in order, so pipelined requests are answered in sequence.
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except AsyncHttpError as e:
+                    Log.debug_print("[SIGFOX EP SERVER] * ERROR: invalid request (" + str(e) + ")")
+                    writer.write(AsyncHttpServer._build_response(e.http_return_code, {}, None, False))
+                    break
+                except (ValueError, UnicodeDecodeError):
+                    writer.write(AsyncHttpServer._build_response(400, {}, None, False))
+                    break
+                if request is None:
+                    break
+                keep_alive = request.keep_alive()
+                deferred_record_list = []
+                try:
+                    http_return_code, http_headers, json_out = await self._execute_request(request, deferred_record_list)
+                except Exception:
+                    http_return_code, http_headers, json_out = 400, {}, None
+                writer.write(AsyncHttpServer._build_response(http_return_code, http_headers, json_out, keep_alive))
+                await writer.drain()
+                # Write records once the response has been sent (without delaying the next request of the connection).
+                if (len(deferred_record_list) > 0):
+                    deferred_write = loop.run_in_executor(self._executor, self._sigfox_ep_server.write_deferred_records, deferred_record_list)
+                    deferred_write.add_done_callback(AsyncHttpServer._check_deferred_write)
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def serve_forever(self) -> None:
+        server = await asyncio.start_server(self._handle_connection, host=None, port=self._port, backlog=ASYNC_SERVER_LISTEN_BACKLOG, limit=ASYNC_SERVER_LINE_MAX_SIZE_BYTES)
+        Log.debug_print("[SIGFOX EP SERVER] * Starting asyncio server at port " + str(self._port))
+        async with server:
+            await server.serve_forever()
+
+    def run(self) -> None:
+        try:
+            asyncio.run(self.serve_forever())
+        finally:
+            self._executor.shutdown(wait=True)
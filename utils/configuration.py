@@ -11,7 +11,8 @@ from utils.log import *
 
 ### CONFIGURATION local macros ###
 
-SIGFOX_EP_SERVER_CONFIG_FILE_NAME = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "sigfox_ep_server.json")
+# Configuration file can be overridden by environment (e.g. for the tests).
+SIGFOX_EP_SERVER_CONFIG_FILE_NAME = os.environ.get("SIGFOX_EP_SERVER_CONFIG_FILE", os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), "sigfox_ep_server.json"))
 
 SIGFOX_EP_SERVER_CONFIG_JSON_KEY_PATH = "path"
 SIGFOX_EP_SERVER_CONFIG_JSON_KEY_HTTP_PORT = "http_port"
@@ -20,6 +21,18 @@ SIGFOX_EP_SERVER_CONFIG_JSON_KEY_SIGFOX_CLOUD = "sigfox_cloud"
 SIGFOX_EP_SERVER_CONFIG_JSON_KEY_USER = "user"
 SIGFOX_EP_SERVER_CONFIG_JSON_KEY_PASSWORD = "password"
 SIGFOX_EP_SERVER_CONFIG_JSON_KEY_DL_MESSAGES_FILE_PATH = "dl_messages_file_path"
+SIGFOX_EP_SERVER_CONFIG_JSON_KEY_DL_MESSAGES_JOURNAL_PATH = "dl_messages_journal_path"
+SIGFOX_EP_SERVER_CONFIG_JSON_KEY_INGEST_QUEUE = "ingest_queue"
+SIGFOX_EP_SERVER_CONFIG_JSON_KEY_ENABLED = "enabled"
+SIGFOX_EP_SERVER_CONFIG_JSON_KEY_DEPTH = "depth"
+SIGFOX_EP_SERVER_CONFIG_JSON_KEY_WORKERS = "workers"
+SIGFOX_EP_SERVER_CONFIG_JSON_KEY_OVERFLOW_POLICY = "overflow_policy"
+SIGFOX_EP_SERVER_CONFIG_JSON_KEY_SPOOL = "spool"
+SIGFOX_EP_SERVER_CONFIG_JSON_KEY_MAX_SIZE_MB = "max_size_mb"
+SIGFOX_EP_SERVER_CONFIG_JSON_KEY_WRITE_BUFFER = "write_buffer"
+SIGFOX_EP_SERVER_CONFIG_JSON_KEY_FLUSH_SIZE = "flush_size"
+SIGFOX_EP_SERVER_CONFIG_JSON_KEY_MAX_LATENCY_MS = "max_latency_ms"
+SIGFOX_EP_SERVER_CONFIG_JSON_KEY_CAPACITY = "capacity"
 
 ### CONFIGURATION macros ###
 
@@ -31,6 +44,20 @@ SIGFOX_EP_SERVER_API_KEY = None
 SIGFOX_CLOUD_USER = None
 SIGFOX_CLOUD_PASSWORD = None
 SIGFOX_EP_DL_MESSAGES_FILE_PATH = None
+SIGFOX_EP_DL_MESSAGES_JOURNAL_PATH = None
+# Optional settings.
+SIGFOX_EP_SERVER_INGEST_QUEUE_ENABLED = False
+SIGFOX_EP_SERVER_INGEST_QUEUE_DEPTH = 10000
+SIGFOX_EP_SERVER_INGEST_QUEUE_WORKERS = 4
+SIGFOX_EP_SERVER_INGEST_QUEUE_OVERFLOW_POLICY = "synchronous"
+SIGFOX_EP_SERVER_SPOOL_ENABLED = False
+SIGFOX_EP_SERVER_SPOOL_PATH = None
+SIGFOX_EP_SERVER_SPOOL_MAX_SIZE_MB = 512
+SIGFOX_EP_SERVER_DIVERTED_SPOOL_PATH = None
+SIGFOX_EP_SERVER_WRITE_BUFFER_ENABLED = False
+SIGFOX_EP_SERVER_WRITE_BUFFER_FLUSH_SIZE = 1000
+SIGFOX_EP_SERVER_WRITE_BUFFER_MAX_LATENCY_MS = 200
+SIGFOX_EP_SERVER_WRITE_BUFFER_CAPACITY = 20000
 
 ### CONFIGURATION loading ###
 
@@ -44,6 +71,26 @@ try:
     SIGFOX_CLOUD_USER = _config_json[SIGFOX_EP_SERVER_CONFIG_JSON_KEY_SIGFOX_CLOUD][SIGFOX_EP_SERVER_CONFIG_JSON_KEY_USER]
     SIGFOX_CLOUD_PASSWORD = _config_json[SIGFOX_EP_SERVER_CONFIG_JSON_KEY_SIGFOX_CLOUD][SIGFOX_EP_SERVER_CONFIG_JSON_KEY_PASSWORD]
     SIGFOX_EP_DL_MESSAGES_FILE_PATH = _config_json[SIGFOX_EP_SERVER_CONFIG_JSON_KEY_DL_MESSAGES_FILE_PATH]
+    SIGFOX_EP_DL_MESSAGES_JOURNAL_PATH = _config_json.get(SIGFOX_EP_SERVER_CONFIG_JSON_KEY_DL_MESSAGES_JOURNAL_PATH, os.path.join(SIGFOX_EP_SERVER_PATH, "sigfox_ep_dl_messages.journal"))
+    # Optional ingest queue.
+    _ingest_queue_json = _config_json.get(SIGFOX_EP_SERVER_CONFIG_JSON_KEY_INGEST_QUEUE, {})
+    SIGFOX_EP_SERVER_INGEST_QUEUE_ENABLED = bool(_ingest_queue_json.get(SIGFOX_EP_SERVER_CONFIG_JSON_KEY_ENABLED, SIGFOX_EP_SERVER_INGEST_QUEUE_ENABLED))
+    SIGFOX_EP_SERVER_INGEST_QUEUE_DEPTH = int(_ingest_queue_json.get(SIGFOX_EP_SERVER_CONFIG_JSON_KEY_DEPTH, SIGFOX_EP_SERVER_INGEST_QUEUE_DEPTH))
+    SIGFOX_EP_SERVER_INGEST_QUEUE_WORKERS = int(_ingest_queue_json.get(SIGFOX_EP_SERVER_CONFIG_JSON_KEY_WORKERS, SIGFOX_EP_SERVER_INGEST_QUEUE_WORKERS))
+    SIGFOX_EP_SERVER_INGEST_QUEUE_OVERFLOW_POLICY = str(_ingest_queue_json.get(SIGFOX_EP_SERVER_CONFIG_JSON_KEY_OVERFLOW_POLICY, SIGFOX_EP_SERVER_INGEST_QUEUE_OVERFLOW_POLICY))
+    # Optional write-ahead spool.
+    _spool_json = _config_json.get(SIGFOX_EP_SERVER_CONFIG_JSON_KEY_SPOOL, {})
+    SIGFOX_EP_SERVER_SPOOL_ENABLED = bool(_spool_json.get(SIGFOX_EP_SERVER_CONFIG_JSON_KEY_ENABLED, SIGFOX_EP_SERVER_SPOOL_ENABLED))
+    SIGFOX_EP_SERVER_SPOOL_PATH = str(_spool_json.get(SIGFOX_EP_SERVER_CONFIG_JSON_KEY_PATH, os.path.join(SIGFOX_EP_SERVER_PATH, "spool")))
+    SIGFOX_EP_SERVER_SPOOL_MAX_SIZE_MB = int(_spool_json.get(SIGFOX_EP_SERVER_CONFIG_JSON_KEY_MAX_SIZE_MB, SIGFOX_EP_SERVER_SPOOL_MAX_SIZE_MB))
+    # Failed writes are persisted next to the write-ahead spool.
+    SIGFOX_EP_SERVER_DIVERTED_SPOOL_PATH = os.path.join(os.path.dirname(os.path.normpath(SIGFOX_EP_SERVER_SPOOL_PATH)), "diverted")
+    # Optional write buffer.
+    _write_buffer_json = _config_json.get(SIGFOX_EP_SERVER_CONFIG_JSON_KEY_WRITE_BUFFER, {})
+    SIGFOX_EP_SERVER_WRITE_BUFFER_ENABLED = bool(_write_buffer_json.get(SIGFOX_EP_SERVER_CONFIG_JSON_KEY_ENABLED, SIGFOX_EP_SERVER_WRITE_BUFFER_ENABLED))
+    SIGFOX_EP_SERVER_WRITE_BUFFER_FLUSH_SIZE = int(_write_buffer_json.get(SIGFOX_EP_SERVER_CONFIG_JSON_KEY_FLUSH_SIZE, SIGFOX_EP_SERVER_WRITE_BUFFER_FLUSH_SIZE))
+    SIGFOX_EP_SERVER_WRITE_BUFFER_MAX_LATENCY_MS = int(_write_buffer_json.get(SIGFOX_EP_SERVER_CONFIG_JSON_KEY_MAX_LATENCY_MS, SIGFOX_EP_SERVER_WRITE_BUFFER_MAX_LATENCY_MS))
+    SIGFOX_EP_SERVER_WRITE_BUFFER_CAPACITY = int(_write_buffer_json.get(SIGFOX_EP_SERVER_CONFIG_JSON_KEY_CAPACITY, SIGFOX_EP_SERVER_WRITE_BUFFER_CAPACITY))
 except Exception as e:
     # Stop server.
     Log.debug_print("[SIGFOX EP SERVER] * ERROR: Failed to load configuration file (" + str(e) + ")")
@@ -0,0 +1,299 @@
+"""
+* downlink_store.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import json
+import os
+import threading
+import time
+
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+from ep.ep import *
+from utils.log import *
+from utils.metrics import *
+from utils.sigfox_cloud import *
+
+### DOWNLINK STORE macros ###
+
+DOWNLINK_STORE_JSON_KEY = "dl_messages_list"
+DOWNLINK_STORE_JSON_KEY_RECORD_TIME = "record_time"
+DOWNLINK_STORE_JSON_KEY_SIGFOX_EP_ID = "sigfox_ep_id"
+DOWNLINK_STORE_JSON_KEY_DL_PAYLOAD = "dl_payload"
+DOWNLINK_STORE_JSON_KEY_PERMANENT = "permanent"
+DOWNLINK_STORE_JSON_KEY_OPERATION = "op"
+
+DOWNLINK_STORE_OPERATION_ADD = "add"
+DOWNLINK_STORE_OPERATION_POP = "pop"
+
+DOWNLINK_STORE_COMPACTION_MIN_OPERATIONS = 1000
+DOWNLINK_STORE_INBOX_WATCH_PERIOD_SECONDS = 2
+# Inbox files being imported (written by the server only).
+DOWNLINK_STORE_INBOX_IMPORTING_SUFFIX = ".importing"
+DOWNLINK_STORE_INBOX_INVALID_SUFFIX = ".invalid"
+
+DOWNLINK_STORE_METRIC_PENDING = "downlink_store_pending"
+DOWNLINK_STORE_METRIC_IMPORTED = "downlink_store_imported"
+DOWNLINK_STORE_METRIC_CONSUMED = "downlink_store_consumed"
+DOWNLINK_STORE_METRIC_COMPACTIONS = "downlink_store_compactions"
+
+### DOWNLINK STORE classes ###
+
+class DownlinkStore:
+
+    def __init__(self, journal_path: str) -> None:
+        # Init context.
+        self._journal_path = journal_path
+        self._lock = threading.Lock()
+        # Per end-point index: one-shot messages in chronological order and current permanent message.
+        self._one_shot: Dict[str, Deque[tuple]] = {}
+        self._permanent: Dict[str, tuple] = {}
+        self._pending_count = 0
+        self._journal_operations = 0
+        self._inbox_watcher = None
+        # Journal lines are written by a background thread so that popping a message never waits for the disk.
+        self._condition = threading.Condition(self._lock)
+        self._journal_lines = []
+        self._running = True
+        # Number of queued journal lines, and number of lines known to be synced to disk.
+        self._appended_count = 0
+        self._synced_count = 0
+        self._sync_requested = False
+        # Replay journal.
+        self._replay()
+        self._journal_file = open(self._journal_path, "a")
+        self._journal_writer = threading.Thread(target=self._write_journal, name="downlink_store_journal", daemon=True)
+        self._journal_writer.start()
+        metrics.register_gauge(DOWNLINK_STORE_METRIC_PENDING, lambda: self._pending_count)
+
+    def _apply(self, operation: Dict[str, Any]) -> Optional[tuple]:
+        # Must be called with lock held.
+        sigfox_ep_id = operation[DOWNLINK_STORE_JSON_KEY_SIGFOX_EP_ID]
+        if (operation[DOWNLINK_STORE_JSON_KEY_OPERATION] == DOWNLINK_STORE_OPERATION_ADD):
+            dl_message = (int(operation[DOWNLINK_STORE_JSON_KEY_RECORD_TIME]), operation[DOWNLINK_STORE_JSON_KEY_DL_PAYLOAD])
+            if (operation[DOWNLINK_STORE_JSON_KEY_PERMANENT] == True):
+                self._permanent[sigfox_ep_id] = dl_message
+            else:
+                self._one_shot.setdefault(sigfox_ep_id, deque()).append(dl_message)
+                self._pending_count += 1
+            return dl_message
+        # Pop operation.
+        dl_messages = self._one_shot.get(sigfox_ep_id)
+        if not dl_messages:
+            return None
+        dl_message = dl_messages.popleft()
+        self._pending_count -= 1
+        if not dl_messages:
+            del self._one_shot[sigfox_ep_id]
+        return dl_message
+
+    def _replay(self) -> None:
+        if not os.path.exists(self._journal_path):
+            return
+        journal_file = open(self._journal_path, "r")
+        for line in journal_file:
+            try:
+                self._apply(json.loads(line))
+                self._journal_operations += 1
+            except Exception:
+                # Partial last line after a crash.
+                Log.debug_print("[DOWNLINK STORE] * ERROR: invalid journal line skipped")
+        journal_file.close()
+        Log.debug_print("[DOWNLINK STORE] * Journal replayed (" + str(self._pending_count) + " one-shot and " + str(len(self._permanent)) + " permanent messages)")
+
+    def _append(self, operation: Dict[str, Any]) -> None:
+        # Must be called with lock held.
+        self._journal_lines.append(json.dumps(operation, separators=(",", ":")) + "\n")
+        self._appended_count += 1
+        self._condition.notify_all()
+
+    def _write_journal(self) -> None:
+        while True:
+            with self._condition:
+                while ((len(self._journal_lines) == 0) and (self._sync_requested == False) and (self._running == True)):
+                    self._condition.wait()
+                if ((len(self._journal_lines) == 0) and (self._sync_requested == False) and (self._running == False)):
+                    return
+                journal_lines = self._journal_lines
+                self._journal_lines = []
+                appended_count = self._appended_count
+                sync = self._sync_requested
+                self._sync_requested = False
+                self._journal_operations += len(journal_lines)
+                snapshot = None
+                # Compact journal when it mostly contains consumed messages (the snapshot already includes the pending lines).
+                if ((self._journal_operations >= DOWNLINK_STORE_COMPACTION_MIN_OPERATIONS) and (self._journal_operations > (2 * (self._pending_count + len(self._permanent))))):
+                    snapshot = self._snapshot()
+            # Write outside of the lock (only this thread accesses the journal file).
+            if snapshot is not None:
+                self._compact(snapshot)
+            else:
+                self._journal_file.write("".join(journal_lines))
+                self._journal_file.flush()
+                if (sync == True):
+                    os.fsync(self._journal_file.fileno())
+            # Wake up callers waiting for the journal to be on disk (the compacted journal is always synced).
+            if ((sync == True) or (snapshot is not None)):
+                with self._condition:
+                    self._synced_count = max(self._synced_count, appended_count)
+                    self._condition.notify_all()
+
+    def _snapshot(self) -> List[str]:
+        # Must be called with lock held: live messages only.
+        snapshot = []
+        for sigfox_ep_id, (record_time, dl_payload) in self._permanent.items():
+            snapshot.append(json.dumps(DownlinkStore._build_add_operation(sigfox_ep_id, record_time, dl_payload, True), separators=(",", ":")) + "\n")
+        for sigfox_ep_id, dl_messages in self._one_shot.items():
+            for record_time, dl_payload in dl_messages:
+                snapshot.append(json.dumps(DownlinkStore._build_add_operation(sigfox_ep_id, record_time, dl_payload, False), separators=(",", ":")) + "\n")
+        return snapshot
+
+    def _compact(self, snapshot: List[str]) -> None:
+        # Write and sync the snapshot without blocking the callbacks.
+        journal_file = open(self._journal_path + ".tmp", "w")
+        journal_file.write("".join(snapshot))
+        journal_file.flush()
+        os.fsync(journal_file.fileno())
+        journal_file.close()
+        # Atomically replace the journal and reopen it.
+        with self._lock:
+            os.replace(self._journal_path + ".tmp", self._journal_path)
+            self._journal_file.close()
+            self._journal_file = open(self._journal_path, "a")
+            # Operations queued after the snapshot are counted when they are written.
+            self._journal_operations = len(snapshot)
+        metrics.increment(DOWNLINK_STORE_METRIC_COMPACTIONS)
+
+    def flush(self) -> None:
+        # Wait until all the operations queued so far are synced to disk.
+        with self._condition:
+            target_count = self._appended_count
+            if (self._synced_count >= target_count):
+                return
+            self._sync_requested = True
+            self._condition.notify_all()
+            while (self._synced_count < target_count):
+                self._condition.wait()
+
+    @staticmethod
+    def _build_add_operation(sigfox_ep_id: str, record_time: int, dl_payload: str, permanent: bool) -> Dict[str, Any]:
+        return {
+            DOWNLINK_STORE_JSON_KEY_OPERATION: DOWNLINK_STORE_OPERATION_ADD,
+            DOWNLINK_STORE_JSON_KEY_SIGFOX_EP_ID: sigfox_ep_id,
+            DOWNLINK_STORE_JSON_KEY_RECORD_TIME: record_time,
+            DOWNLINK_STORE_JSON_KEY_DL_PAYLOAD: dl_payload,
+            DOWNLINK_STORE_JSON_KEY_PERMANENT: permanent
+        }
+
+    def add(self, sigfox_ep_id: str, record_time: int, dl_payload: str, permanent: bool) -> None:
+        operation = DownlinkStore._build_add_operation(Ep.format_sigfox_ep_id(sigfox_ep_id), int(record_time), dl_payload, permanent)
+        with self._lock:
+            self._apply(operation)
+            self._append(operation)
+
+    def pop(self, sigfox_ep_id: str) -> Optional[tuple]:
+        # Oldest one-shot message first, then current permanent message.
+        with self._lock:
+            if sigfox_ep_id in self._one_shot:
+                operation = {DOWNLINK_STORE_JSON_KEY_OPERATION: DOWNLINK_STORE_OPERATION_POP, DOWNLINK_STORE_JSON_KEY_SIGFOX_EP_ID: sigfox_ep_id}
+                dl_message = self._apply(operation)
+                self._append(operation)
+                metrics.increment(DOWNLINK_STORE_METRIC_CONSUMED)
+                return dl_message
+            return self._permanent.get(sigfox_ep_id)
+
+    @staticmethod
+    def _read_file(file_path: str) -> List[Dict[str, Any]]:
+        # Load messages written in the dl_messages_list format (chronological order).
+        dl_messages_file = open(file_path, "r")
+        dl_messages_json = json.load(dl_messages_file)
+        dl_messages_file.close()
+        # Check header.
+        if (DOWNLINK_STORE_JSON_KEY not in dl_messages_json):
+            raise Exception("downlink messages file header not found")
+        dl_messages = dl_messages_json[DOWNLINK_STORE_JSON_KEY]
+        # Check all messages before importing.
+        for dl_message in dl_messages:
+            if ((DOWNLINK_STORE_JSON_KEY_RECORD_TIME not in dl_message) or
+                (DOWNLINK_STORE_JSON_KEY_SIGFOX_EP_ID not in dl_message) or
+                (DOWNLINK_STORE_JSON_KEY_DL_PAYLOAD not in dl_message) or
+                (DOWNLINK_STORE_JSON_KEY_PERMANENT not in dl_message)):
+                raise Exception("missing headers in downlink messages file")
+        return dl_messages
+
+    def import_file(self, file_path: str) -> int:
+        # Local variables.
+        dl_messages = DownlinkStore._read_file(file_path)
+        for dl_message in dl_messages:
+            permanent = (dl_message[DOWNLINK_STORE_JSON_KEY_PERMANENT] != SIGFOX_CLOUD_CALLBACK_JSON_FALSE)
+            self.add(dl_message[DOWNLINK_STORE_JSON_KEY_SIGFOX_EP_ID], dl_message[DOWNLINK_STORE_JSON_KEY_RECORD_TIME], dl_message[DOWNLINK_STORE_JSON_KEY_DL_PAYLOAD], permanent)
+        metrics.increment(DOWNLINK_STORE_METRIC_IMPORTED, len(dl_messages))
+        return len(dl_messages)
+
+    @staticmethod
+    def _create_inbox(inbox_path: str) -> None:
+        # Empty inbox, which never replaces a file created by a writer in the meantime (link fails if the file exists).
+        empty_inbox_path = inbox_path + DOWNLINK_STORE_INBOX_IMPORTING_SUFFIX + ".tmp"
+        inbox_file = open(empty_inbox_path, "w")
+        json.dump({DOWNLINK_STORE_JSON_KEY: []}, inbox_file, indent=4)
+        inbox_file.close()
+        try:
+            os.link(empty_inbox_path, inbox_path)
+        except FileExistsError:
+            pass
+        os.remove(empty_inbox_path)
+
+    def import_inbox(self, inbox_path: str) -> None:
+        # Local variables.
+        importing_path = inbox_path + DOWNLINK_STORE_INBOX_IMPORTING_SUFFIX
+        # Messages of an interrupted import are imported first.
+        if not os.path.isfile(importing_path):
+            # Nothing to import (an invalid inbox is left untouched).
+            if (len(DownlinkStore._read_file(inbox_path)) == 0):
+                return
+            # Take the inbox atomically: messages written from now on go to a new inbox file.
+            os.rename(inbox_path, importing_path)
+            DownlinkStore._create_inbox(inbox_path)
+        try:
+            imported_count = self.import_file(importing_path)
+        except Exception:
+            # Keep the invalid file aside so that the next messages can still be imported.
+            os.replace(importing_path, inbox_path + DOWNLINK_STORE_INBOX_INVALID_SUFFIX)
+            raise
+        # Imported messages must be on disk before the imported file is removed.
+        self.flush()
+        os.remove(importing_path)
+        if not os.path.isfile(inbox_path):
+            DownlinkStore._create_inbox(inbox_path)
+        Log.debug_print("[DOWNLINK STORE] * " + str(imported_count) + " downlink messages imported from " + inbox_path)
+
+    def _watch_inbox(self, inbox_path: str) -> None:
+        # Local variables.
+        last_stat = None
+        while True:
+            try:
+                inbox_stat = os.stat(inbox_path)
+                inbox_stat = (inbox_stat.st_mtime_ns, inbox_stat.st_size)
+                if (inbox_stat != last_stat):
+                    self.import_inbox(inbox_path)
+                    last_stat = inbox_stat
+            except Exception as e:
+                Log.debug_print("[DOWNLINK STORE] * ERROR: failed to import downlink messages (" + str(e) + ")")
+            time.sleep(DOWNLINK_STORE_INBOX_WATCH_PERIOD_SECONDS)
+
+    def start_inbox_watcher(self, inbox_path: str) -> None:
+        # Messages added to the inbox file are imported in background.
+        if self._inbox_watcher is None:
+            self._inbox_watcher = threading.Thread(target=self._watch_inbox, args=(inbox_path,), name="downlink_store_inbox", daemon=True)
+            self._inbox_watcher.start()
+
+    def close(self) -> None:
+        # Write pending journal lines and stop writer.
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        self._journal_writer.join()
+        self._journal_file.close()
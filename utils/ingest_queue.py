@@ -0,0 +1,111 @@
+"""
+* ingest_queue.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import queue
+import threading
+import time
+import zlib
+
+from typing import Any, Callable, List
+from utils.log import *
+from utils.metrics import *
+
+### INGEST QUEUE macros ###
+
+INGEST_QUEUE_OVERFLOW_POLICY_SYNCHRONOUS = "synchronous"
+INGEST_QUEUE_OVERFLOW_POLICY_REJECT = "reject"
+INGEST_QUEUE_OVERFLOW_POLICY_DROP_OLDEST = "drop_oldest"
+
+INGEST_QUEUE_OVERFLOW_POLICY_LIST = [
+    INGEST_QUEUE_OVERFLOW_POLICY_SYNCHRONOUS,
+    INGEST_QUEUE_OVERFLOW_POLICY_REJECT,
+    INGEST_QUEUE_OVERFLOW_POLICY_DROP_OLDEST
+]
+
+INGEST_QUEUE_METRIC_DEPTH = "ingest_queue_depth"
+INGEST_QUEUE_METRIC_ENQUEUED = "ingest_queue_enqueued"
+INGEST_QUEUE_METRIC_PROCESSED = "ingest_queue_processed"
+INGEST_QUEUE_METRIC_OVERFLOW = "ingest_queue_overflow"
+INGEST_QUEUE_METRIC_DROPPED = "ingest_queue_dropped"
+INGEST_QUEUE_METRIC_PROCESSING_TIME = "ingest_queue_processing_time"
+INGEST_QUEUE_METRIC_WAITING_TIME = "ingest_queue_waiting_time"
+
+### INGEST QUEUE classes ###
+
+class IngestQueue:
+
+    def __init__(self, process: Callable[[Any], Any], depth: int, workers: int, overflow_policy: str) -> None:
+        # Init context.
+        self._process = process
+        self._overflow_policy = overflow_policy
+        self._workers_count = max(1, workers)
+        # One queue per worker: items of a given end-point always go to the same worker, which preserves their order.
+        shard_depth = max(1, (depth // self._workers_count))
+        self._queues: List[queue.Queue] = [queue.Queue(maxsize=shard_depth) for _ in range(self._workers_count)]
+        self._threads: List[threading.Thread] = []
+        for idx in range(self._workers_count):
+            thread = threading.Thread(target=self._worker, args=(self._queues[idx],), name=("ingest_queue_" + str(idx)), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        metrics.register_gauge(INGEST_QUEUE_METRIC_DEPTH, self.get_depth)
+
+    def _worker(self, items_queue: queue.Queue) -> None:
+        while True:
+            item = items_queue.get()
+            try:
+                # Stop marker.
+                if item is None:
+                    return
+                enqueue_time, data = item
+                metrics.add_timing(INGEST_QUEUE_METRIC_WAITING_TIME, (time.monotonic() - enqueue_time))
+                start_time = time.monotonic()
+                self._process(data)
+                metrics.add_timing(INGEST_QUEUE_METRIC_PROCESSING_TIME, (time.monotonic() - start_time))
+                metrics.increment(INGEST_QUEUE_METRIC_PROCESSED)
+            except Exception as e:
+                Log.debug_print("[INGEST QUEUE] * ERROR: processing failed (" + str(e) + ")")
+            finally:
+                items_queue.task_done()
+
+    def get_depth(self) -> int:
+        return sum(items_queue.qsize() for items_queue in self._queues)
+
+    def put(self, key: str, data: Any) -> bool:
+        # Select worker.
+        items_queue = self._queues[zlib.crc32(key.encode()) % self._workers_count]
+        item = (time.monotonic(), data)
+        try:
+            items_queue.put_nowait(item)
+            metrics.increment(INGEST_QUEUE_METRIC_ENQUEUED)
+            return True
+        except queue.Full:
+            metrics.increment(INGEST_QUEUE_METRIC_OVERFLOW)
+        # Apply overflow policy.
+        if (self._overflow_policy == INGEST_QUEUE_OVERFLOW_POLICY_DROP_OLDEST):
+            try:
+                items_queue.get_nowait()
+                items_queue.task_done()
+                metrics.increment(INGEST_QUEUE_METRIC_DROPPED)
+                Log.debug_print("[INGEST QUEUE] * Queue full, oldest item dropped")
+            except queue.Empty:
+                pass
+            try:
+                items_queue.put_nowait(item)
+                metrics.increment(INGEST_QUEUE_METRIC_ENQUEUED)
+                return True
+            except queue.Full:
+                # Queue filled again by other producers: the item is handed back to the caller.
+                pass
+        # Caller either processes the item itself (synchronous) or rejects the request.
+        return False
+
+    def stop(self) -> None:
+        # Process remaining items and stop workers.
+        for items_queue in self._queues:
+            items_queue.put(None)
+        for thread in self._threads:
+            thread.join()
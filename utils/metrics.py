@@ -0,0 +1,88 @@
+"""
+* metrics.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import threading
+
+from typing import Any, Callable, Dict
+
+### METRICS macros ###
+
+METRICS_JSON_KEY_COUNTERS = "counters"
+METRICS_JSON_KEY_GAUGES = "gauges"
+METRICS_JSON_KEY_TIMINGS = "timings"
+METRICS_JSON_KEY_COUNT = "count"
+METRICS_JSON_KEY_MEAN = "mean"
+METRICS_JSON_KEY_MAX = "max"
+
+### METRICS classes ###
+
+class Metrics:
+
+    def __init__(self) -> None:
+        # Init context.
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+        self._gauges: Dict[str, Any] = {}
+        self._gauge_callbacks: Dict[str, Callable[[], Any]] = {}
+        self._timings: Dict[str, list] = {}
+
+    def increment(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: Any) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def register_gauge(self, name: str, callback: Callable[[], Any]) -> None:
+        # Gauge evaluated each time a snapshot is taken.
+        with self._lock:
+            self._gauge_callbacks[name] = callback
+
+    def add_timing(self, name: str, duration_seconds: float) -> None:
+        with self._lock:
+            timing = self._timings.setdefault(name, [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += duration_seconds
+            timing[2] = max(timing[2], duration_seconds)
+
+    def add_sample(self, name: str, value: float) -> None:
+        # Distribution of a value (reported with the timings as count, mean and max).
+        self.add_timing(name, value)
+
+    def get_counter(self, name: str) -> int:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def get_snapshot(self) -> Dict[str, Any]:
+        # Local variables.
+        gauges = {}
+        with self._lock:
+            counters = dict(self._counters)
+            gauges.update(self._gauges)
+            gauge_callbacks = dict(self._gauge_callbacks)
+            timings = {
+                name: {
+                    METRICS_JSON_KEY_COUNT: timing[0],
+                    METRICS_JSON_KEY_MEAN: (timing[1] / timing[0]) if (timing[0] > 0) else 0.0,
+                    METRICS_JSON_KEY_MAX: timing[2]
+                } for name, timing in self._timings.items()
+            }
+        # Evaluate dynamic gauges outside of the lock.
+        for name, callback in gauge_callbacks.items():
+            try:
+                gauges[name] = callback()
+            except Exception:
+                gauges[name] = None
+        return {
+            METRICS_JSON_KEY_COUNTERS: counters,
+            METRICS_JSON_KEY_GAUGES: gauges,
+            METRICS_JSON_KEY_TIMINGS: timings
+        }
+
+# Init shared class instance.
+metrics = Metrics()
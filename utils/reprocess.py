@@ -0,0 +1,288 @@
+"""
+* reprocess.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from database.database import *
+from ep.atxfox import *
+from ep.dinfox import *
+from ep.ep import *
+from ep.homefox import *
+from ep.meteofox import *
+from ep.sensit import *
+from ep.smarttag import *
+from ep.trackfox import *
+from typing import Dict, Iterator, List, Optional
+from utils.configuration import *
+from utils.log import *
+from utils.sigfox_cloud import *
+
+### REPROCESS macros ###
+
+REPROCESS_SOURCE_API = "api"
+REPROCESS_SOURCE_FILE = "file"
+
+REPROCESS_CHUNK_SIZE_DEFAULT = 1000
+REPROCESS_WRITE_BATCH_SIZE_DEFAULT = 5000
+# Chunks submitted in advance per worker process.
+REPROCESS_PENDING_CHUNKS_PER_WORKER = 2
+REPROCESS_PENDING_WRITES_MAX = 4
+REPROCESS_PROGRESS_PERIOD_SECONDS = 5
+
+### REPROCESS worker functions ###
+
+# Database client of the worker process.
+_reprocess_database = None
+
+def _reprocess_init_worker() -> None:
+    global _reprocess_database
+    # Some parsers read previous data (e.g. MeteoFox software version), so each worker process has its own client.
+    _reprocess_database = Database()
+
+def _reprocess_parse_message(sigfox_ep_id: str, timestamp: int, message_counter: int, ul_payload: str) -> List[list]:
+    # Local variables.
+    points = []
+    ep_entry = ep.get_entry(sigfox_ep_id)
+    if ((ep_entry is None) or (ep_entry.ep_class is None) or (ep_entry.database is None)):
+        raise Exception("unknown Sigfox EP-ID " + sigfox_ep_id)
+    # Parse UL payload.
+    [data_type, record_list] = ep_entry.ep_class.get_record_list(_reprocess_database, timestamp, sigfox_ep_id, ul_payload)
+    # Check parsing status.
+    if ((data_type == DATABASE_FIELD_DATA_TYPE_UNKNOWN) or (len(record_list) == 0)):
+        raise Exception("invalid UL payload " + ul_payload)
+    # Add common metadata record (same records as the data callbacks of the server).
+    record = Record()
+    record.database = ep_entry.database
+    record.measurement = DATABASE_MEASUREMENT_METADATA
+    record.timestamp = timestamp
+    record.fields = {
+        DATABASE_FIELD_LAST_DATA_TIME: timestamp,
+        DATABASE_FIELD_SIGFOX_UPLINK_MESSAGE_COUNTER: message_counter,
+        DATABASE_FIELD_DATA_TYPE: data_type
+    }
+    record.tags = record_list[0].tags
+    record.limited_retention = False
+    record_list.append(copy.copy(record))
+    # Points are built in the worker so that only plain data is sent back to the main process.
+    for record in record_list:
+        point = Database.build_point(record)
+        if point is not None:
+            points.append(point)
+    # Next messages of the device (parsed by the same worker in chronological order) may depend on these points, which are written by the main process.
+    _reprocess_database.update_last_values(points, insert=True)
+    return points
+
+def _reprocess_parse_chunk(chunk: List[tuple]) -> tuple:
+    # Local variables.
+    points = []
+    errors = []
+    for message in chunk:
+        try:
+            points.extend(_reprocess_parse_message(*message))
+        except Exception as e:
+            # Sigfox EP-ID, timestamp and reason.
+            errors.append((message[0], message[1], str(e)))
+    return len(chunk), errors, points
+
+### REPROCESS classes ###
+
+class Reprocess:
+
+    def __init__(self, workers: int, chunk_size: int, write_batch_size: int, dry_run: bool) -> None:
+        # Init context.
+        self._workers = workers
+        self._chunk_size = chunk_size
+        self._write_batch_size = write_batch_size
+        self._dry_run = dry_run
+        self._database = None if (dry_run == True) else Database()
+        self._lock = threading.Lock()
+        self._start_time = time.monotonic()
+        self._messages_count = 0
+        self._errors_count = 0
+        self._points_count = 0
+        self._write_errors_count = 0
+        self._points = []
+        self._last_progress_time = self._start_time
+
+    @staticmethod
+    def _convert_message(message: Dict, sigfox_ep_id: Optional[str] = None) -> tuple:
+        # Callback format.
+        if (SIGFOX_CLOUD_CALLBACK_JSON_KEY_UL_PAYLOAD in message):
+            return (Ep.format_sigfox_ep_id(message[SIGFOX_CLOUD_CALLBACK_JSON_KEY_EP_ID]),
+                    int(message[SIGFOX_CLOUD_CALLBACK_JSON_KEY_TIME]),
+                    int(message[SIGFOX_CLOUD_CALLBACK_JSON_KEY_MESSAGE_COUNTER]),
+                    str(message[SIGFOX_CLOUD_CALLBACK_JSON_KEY_UL_PAYLOAD]).lower())
+        # Sigfox cloud API format (time in ms).
+        if sigfox_ep_id is None:
+            sigfox_ep_id = Ep.format_sigfox_ep_id(message[SIGFOX_CLOUD_API_JSON_KEY_DEVICE][SIGFOX_CLOUD_API_JSON_KEY_ID])
+        return (sigfox_ep_id,
+                (int(message[SIGFOX_CLOUD_API_JSON_KEY_TIME]) // 1000),
+                int(message[SIGFOX_CLOUD_API_JSON_KEY_MESSAGE_COUNTER]),
+                str(message[SIGFOX_CLOUD_API_JSON_KEY_UL_PAYLOAD]).lower())
+
+    @staticmethod
+    def read_file(file_path: str) -> Iterator[tuple]:
+        # JSON array or JSON lines file of messages (callback or Sigfox cloud API format).
+        messages_file = open(file_path, "r")
+        first_char = messages_file.read(1)
+        messages_file.seek(0)
+        if (first_char == "["):
+            for message in json.load(messages_file):
+                yield Reprocess._convert_message(message)
+        else:
+            for line in messages_file:
+                if line.strip():
+                    yield Reprocess._convert_message(json.loads(line))
+        messages_file.close()
+
+    @staticmethod
+    def read_sigfox_cloud(sigfox_ep_id_list: List[str], parameters: Optional[Dict]) -> Iterator[tuple]:
+        # Devices loop.
+        for sigfox_ep_id in sigfox_ep_id_list:
+            print("[REPROCESS] * Reading all messages of Sigfox EP ID " + sigfox_ep_id)
+            # Pages are returned from the newest message, but parsers need the messages in chronological order.
+            device_messages = []
+            request = SIGFOX_CLOUD_API_REQUEST_DEVICES + sigfox_ep_id + "/" + SIGFOX_CLOUD_API_REQUEST_MESSAGES
+            request_parameters = parameters
+            # Paging loop.
+            while (str(request) != SIGFOX_CLOUD_API_REQUEST_NONE) and (request is not None):
+                response = sigfox_cloud.api_request(request, request_parameters)
+                if ((response == None) or (response.status_code != 200)):
+                    print("[REPROCESS] * ERROR: failed to read messages of Sigfox EP ID " + sigfox_ep_id)
+                    break
+                messages_list_json = json.loads(response.text)
+                messages_list = messages_list_json.get(SIGFOX_CLOUD_API_JSON_KEY_DATA)
+                if (len(messages_list) == 0):
+                    break
+                for message in messages_list:
+                    device_messages.append(Reprocess._convert_message(message, sigfox_ep_id))
+                # Next page request already includes the query parameters.
+                request = messages_list_json.get(SIGFOX_CLOUD_API_JSON_KEY_PAGING, {}).get(SIGFOX_CLOUD_API_JSON_KEY_NEXT_PAGE_REQUEST)
+                request_parameters = None
+            device_messages.sort(key=lambda message: message[1])
+            yield from device_messages
+
+    def _write(self, points: List[list]) -> None:
+        if (self._database.write_points(points) == False):
+            with self._lock:
+                self._write_errors_count += len(points)
+
+    def _print_progress(self) -> None:
+        with self._lock:
+            elapsed_seconds = (time.monotonic() - self._start_time)
+            throughput = (self._messages_count / elapsed_seconds) if (elapsed_seconds > 0) else 0.0
+            print("[REPROCESS] * messages=" + str(self._messages_count) + " errors=" + str(self._errors_count) + " points=" + str(self._points_count) +
+                  " write_errors=" + str(self._write_errors_count) + " throughput=" + str(round(throughput, 1)) + " msg/s")
+
+    def _collect(self, done_futures, write_executor: ThreadPoolExecutor, write_futures: deque) -> None:
+        for future in done_futures:
+            messages_count, errors, chunk_points = future.result()
+            with self._lock:
+                self._messages_count += messages_count
+                self._errors_count += len(errors)
+                self._points_count += len(chunk_points)
+            for sigfox_ep_id, timestamp, reason in errors:
+                print("[REPROCESS] * ERROR: sigfox_ep_id=" + sigfox_ep_id + " timestamp=" + str(timestamp) + " (" + reason + ")")
+            if (self._dry_run == False):
+                self._points.extend(chunk_points)
+        # Write full batches (limit the number of batches waiting for the database).
+        while (len(self._points) >= self._write_batch_size):
+            while (len(write_futures) >= REPROCESS_PENDING_WRITES_MAX):
+                write_futures.popleft().result()
+            write_futures.append(write_executor.submit(self._write, self._points[:self._write_batch_size]))
+            self._points = self._points[self._write_batch_size:]
+        # Progress report.
+        if ((time.monotonic() - self._last_progress_time) >= REPROCESS_PROGRESS_PERIOD_SECONDS):
+            self._print_progress()
+            self._last_progress_time = time.monotonic()
+
+    def run(self, messages: Iterator[tuple]) -> None:
+        # Local variables.
+        chunks = [[] for _ in range(self._workers)]
+        parse_futures = set()
+        write_futures = deque()
+        self._points = []
+        self._start_time = time.monotonic()
+        self._last_progress_time = self._start_time
+        # Each device is always parsed by the same worker process, in the order of the messages source (like the ingest queue workers).
+        parse_executors = [ProcessPoolExecutor(max_workers=1, initializer=_reprocess_init_worker) for _ in range(self._workers)]
+        try:
+            # Write large batches from a single thread.
+            with ThreadPoolExecutor(max_workers=1) as write_executor:
+                for message in messages:
+                    worker_index = zlib.crc32(message[0].encode()) % self._workers
+                    chunks[worker_index].append(message)
+                    if (len(chunks[worker_index]) < self._chunk_size):
+                        continue
+                    # Limit the number of chunks in memory.
+                    while (len(parse_futures) >= (self._workers * REPROCESS_PENDING_CHUNKS_PER_WORKER)):
+                        done_futures, parse_futures = wait(parse_futures, return_when=FIRST_COMPLETED)
+                        self._collect(done_futures, write_executor, write_futures)
+                    parse_futures.add(parse_executors[worker_index].submit(_reprocess_parse_chunk, chunks[worker_index]))
+                    chunks[worker_index] = []
+                # Last chunks.
+                for worker_index in range(self._workers):
+                    if (len(chunks[worker_index]) > 0):
+                        parse_futures.add(parse_executors[worker_index].submit(_reprocess_parse_chunk, chunks[worker_index]))
+                done_futures, _ = wait(parse_futures)
+                self._collect(done_futures, write_executor, write_futures)
+                # Last batch.
+                if (len(self._points) > 0):
+                    write_futures.append(write_executor.submit(self._write, self._points))
+                    self._points = []
+                for future in write_futures:
+                    future.result()
+        finally:
+            for parse_executor in parse_executors:
+                parse_executor.shutdown(wait=True)
+        self._print_progress()
+
+### MAIN PROGRAM ###
+
+if __name__ == "__main__":
+    # Parse arguments.
+    parser = argparse.ArgumentParser(description="Reprocess Sigfox messages without going through the HTTP server")
+    parser.add_argument("--source", choices=[REPROCESS_SOURCE_API, REPROCESS_SOURCE_FILE], required=True, help="Messages source")
+    parser.add_argument("--file", type=str, default=None, help="Messages file (JSON array or JSON lines, callback or Sigfox cloud API format)")
+    parser.add_argument("--sigfox-ep-id", type=str, action="append", default=None, help="Sigfox EP-ID to reprocess (all devices by default)")
+    parser.add_argument("--start", type=int, default=0, help="Retrieve data from (EPOCH ms)")
+    parser.add_argument("--stop", type=int, default=0, help="Retrieve data to (EPOCH ms)")
+    parser.add_argument("--workers", type=int, default=(os.cpu_count() or 1), help="Number of parsing processes")
+    parser.add_argument("--chunk-size", type=int, default=REPROCESS_CHUNK_SIZE_DEFAULT, help="Number of messages per parsing task")
+    parser.add_argument("--batch-size", type=int, default=REPROCESS_WRITE_BATCH_SIZE_DEFAULT, help="Number of points per database write")
+    parser.add_argument("--dry-run", action="store_true", default=False, help="Parse messages without writing the database")
+    parser.add_argument("--debug", action="store_true", default=False, help="Enable debug logs")
+    args = parser.parse_args()
+    if args.debug:
+        Log.enable()
+    # Build messages source.
+    if (args.source == REPROCESS_SOURCE_FILE):
+        if args.file is None:
+            parser.error("--file is required with --source " + REPROCESS_SOURCE_FILE)
+        messages = Reprocess.read_file(args.file)
+    else:
+        sigfox_ep_id_list = [Ep.format_sigfox_ep_id(sigfox_ep_id) for sigfox_ep_id in args.sigfox_ep_id] if args.sigfox_ep_id else ep.get_sigfox_ep_id_list()
+        parameters = None
+        if (args.start != 0) and (args.stop != 0):
+            parameters = {
+                SIGFOX_CLOUD_API_JSON_KEY_START_TIME: args.start,
+                SIGFOX_CLOUD_API_JSON_KEY_STOP_TIME: args.stop
+            }
+        messages = Reprocess.read_sigfox_cloud(sigfox_ep_id_list, parameters)
+    # Reprocess messages.
+    reprocess = Reprocess(args.workers, args.chunk_size, args.batch_size, args.dry_run)
+    reprocess.run(messages)
+    sys.exit()
@@ -0,0 +1,148 @@
+"""
+* response_cache.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import hashlib
+import json
+import threading
+import time
+
+from collections import OrderedDict
+from database.database import *
+from typing import Any, Dict, List, Optional
+from utils.metrics import *
+
+### RESPONSE CACHE macros ###
+
+RESPONSE_CACHE_METRIC_HITS = "response_cache_hits"
+RESPONSE_CACHE_METRIC_MISSES = "response_cache_misses"
+RESPONSE_CACHE_METRIC_NOT_MODIFIED = "response_cache_not_modified"
+RESPONSE_CACHE_METRIC_INVALIDATIONS = "response_cache_invalidations"
+RESPONSE_CACHE_METRIC_SIZE = "response_cache_size"
+
+### RESPONSE CACHE classes ###
+
+class ResponseCache:
+
+    def __init__(self, capacity: int, ttl_seconds: float, negative_ttl_seconds: float) -> None:
+        # Init context.
+        self._capacity = capacity
+        self._ttl_seconds = ttl_seconds
+        self._negative_ttl_seconds = negative_ttl_seconds
+        self._lock = threading.Lock()
+        # Key (database, measurement, field, tags filter) to [HTTP code, JSON, ETag, expiry time].
+        self._entries = OrderedDict()
+        # Keys of each (database, measurement, tags filter), used to invalidate entries when points are written.
+        self._index: Dict[tuple, set] = {}
+        # Tags filters used by the readers for each (database, measurement).
+        self._filters: Dict[tuple, set] = {}
+        # Sequence number of the last write of each (database, measurement, tags filter), so that a response read before a write is not cached.
+        self._write_sequence = 0
+        self._generations = OrderedDict()
+        # Generation of the least recently written entries evicted from the table (newer than any of them).
+        self._generations_floor = 0
+        metrics.register_gauge(RESPONSE_CACHE_METRIC_SIZE, lambda: len(self._entries))
+
+    @staticmethod
+    def build_key(database: str, measurement: str, field: str, tags: Optional[Dict[str, str]]) -> tuple:
+        tags_filter = tuple(sorted((str(name), str(value)) for name, value in tags.items())) if tags else ()
+        return (database, measurement, field, tags_filter)
+
+    @staticmethod
+    def is_not_modified(etag: Optional[str], if_none_match: Optional[str]) -> bool:
+        # Weak comparison of the If-None-Match header entity tags.
+        if (etag is None) or (not if_none_match):
+            return False
+        for request_etag in if_none_match.split(","):
+            request_etag = request_etag.strip()
+            if (request_etag == "*") or (request_etag.removeprefix("W/") == etag):
+                return True
+        return False
+
+    @staticmethod
+    def _get_index_key(key: tuple) -> tuple:
+        return (key[0], key[1], key[3])
+
+    def _get_generation(self, index_key: tuple) -> int:
+        # Must be called with lock held.
+        return self._generations.get(index_key, self._generations_floor)
+
+    def _increment_generation(self, index_key: tuple) -> None:
+        # Must be called with lock held.
+        self._write_sequence += 1
+        self._generations[index_key] = self._write_sequence
+        self._generations.move_to_end(index_key)
+        # Evicted generations are replaced by the floor: a read started before the eviction is never cached.
+        while (len(self._generations) > self._capacity):
+            _, generation = self._generations.popitem(last=False)
+            self._generations_floor = max(self._generations_floor, generation)
+
+    def _remove(self, key: tuple) -> None:
+        # Must be called with lock held.
+        del self._entries[key]
+        index_key = ResponseCache._get_index_key(key)
+        keys = self._index.get(index_key)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._index[index_key]
+
+    def get(self, key: tuple) -> Optional[tuple]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if (entry[3] > time.monotonic()):
+                    self._entries.move_to_end(key)
+                    metrics.increment(RESPONSE_CACHE_METRIC_HITS)
+                    return entry[0], entry[1], entry[2]
+                self._remove(key)
+        metrics.increment(RESPONSE_CACHE_METRIC_MISSES)
+        return None
+
+    def get_generation(self, key: tuple) -> int:
+        with self._lock:
+            # Register the tags filter before the read, so that the writes done in the meantime are detected.
+            self._filters.setdefault(key[:2], set()).add(tuple(name for name, _ in key[3]))
+            return self._get_generation(ResponseCache._get_index_key(key))
+
+    def put(self, key: tuple, http_return_code: int, json_out: Any, generation: int) -> Optional[str]:
+        # Only successful responses have an ETag, not found responses are cached for a shorter time.
+        etag = None
+        ttl_seconds = self._negative_ttl_seconds
+        if (http_return_code == 200):
+            etag = "\"" + hashlib.sha1(json.dumps(json_out, sort_keys=True).encode()).hexdigest()[:20] + "\""
+            ttl_seconds = self._ttl_seconds
+        with self._lock:
+            if (self._get_generation(ResponseCache._get_index_key(key)) != generation):
+                return etag
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = [http_return_code, json_out, etag, (time.monotonic() + ttl_seconds)]
+            self._index.setdefault(ResponseCache._get_index_key(key), set()).add(key)
+            # Evict least recently used entries.
+            while (len(self._entries) > self._capacity):
+                self._remove(next(iter(self._entries)))
+        return etag
+
+    def invalidate(self, batch: List[list]) -> None:
+        # Remove the responses which may have been changed by the written points.
+        with self._lock:
+            for database, _, point in batch:
+                filters = self._filters.get((database, point[DATABASE_JSON_KEY_MEASUREMENT]))
+                if not filters:
+                    continue
+                tags = point.get(DATABASE_JSON_KEY_TAGS) or {}
+                fields = point[DATABASE_JSON_KEY_FIELDS]
+                for tags_names in filters:
+                    # Readers filter on a subset of the point tags.
+                    if any((name not in tags) for name in tags_names):
+                        continue
+                    index_key = (database, point[DATABASE_JSON_KEY_MEASUREMENT], tuple((name, str(tags[name])) for name in tags_names))
+                    self._increment_generation(index_key)
+                    for key in list(self._index.get(index_key, ())):
+                        if (key[2] in fields):
+                            self._remove(key)
+                            metrics.increment(RESPONSE_CACHE_METRIC_INVALIDATIONS)
@@ -5,14 +5,39 @@
 *      Author: Ludo
 """
 
+import email.utils
 import json
+import random
 import requests
+import threading
 import time
+
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
 from utils.configuration import *
+from utils.log import *
+from utils.metrics import *
 
 ### SIGFOX CLOUD MACROS ###
 
 SIGFOX_CLOUD_API_REQUEST_TIMEOUT_SECONDS = 10
+SIGFOX_CLOUD_API_POOL_SIZE = 16
+# Sigfox API quota (requests per second and burst).
+SIGFOX_CLOUD_API_RATE_LIMIT_REQUESTS_PER_SECOND = 1.0
+SIGFOX_CLOUD_API_RATE_LIMIT_BURST = 3
+SIGFOX_CLOUD_API_RETRY_MAX_COUNT = 5
+SIGFOX_CLOUD_API_RETRY_DELAY_MIN_SECONDS = 1.0
+SIGFOX_CLOUD_API_RETRY_DELAY_MAX_SECONDS = 60.0
+SIGFOX_CLOUD_API_HTTP_STATUS_TOO_MANY_REQUESTS = 429
+SIGFOX_CLOUD_API_HTTP_HEADER_RETRY_AFTER = "Retry-After"
+
+SIGFOX_CLOUD_METRIC_PREFIX = "sigfox_cloud_"
+SIGFOX_CLOUD_METRIC_REQUESTS = "_requests"
+SIGFOX_CLOUD_METRIC_ERRORS = "_errors"
+SIGFOX_CLOUD_METRIC_RATE_LIMITED = "_rate_limited"
+SIGFOX_CLOUD_METRIC_LATENCY = "_latency"
+SIGFOX_CLOUD_METRIC_LIMITER_WAIT = "sigfox_cloud_limiter_wait"
 
 SIGFOX_CLOUD_API_ADDRESS = "https://api.sigfox.com/v2/"
 
@@ -22,6 +47,7 @@ SIGFOX_CLOUD_API_REQUEST_CONTRACT_INFOS = "contract-infos/"
 SIGFOX_CLOUD_API_REQUEST_NONE = "None"
 
 SIGFOX_CLOUD_API_JSON_KEY_TIME = "time"
+SIGFOX_CLOUD_API_JSON_KEY_DEVICE = "device"
 SIGFOX_CLOUD_API_JSON_KEY_DATA = "data"
 SIGFOX_CLOUD_API_JSON_KEY_START_TIME = "since"
 SIGFOX_CLOUD_API_JSON_KEY_STOP_TIME = "before"
@@ -76,27 +102,120 @@ SIGFOX_CLOUD_CALLBACK_DOWNLINK_TIMESTAMP_DELTA = 32
 
 ### SIGFOX CLOUD classes ###
 
+class TokenBucket:
+
+    def __init__(self, rate_per_second: float, burst: int) -> None:
+        # Init context.
+        self._rate_per_second = rate_per_second
+        self._burst = burst
+        self._tokens = float(burst)
+        self._timestamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def pause(self, delay_seconds: float) -> None:
+        # Empty the bucket so that no request is sent before the delay (server side rate limiting).
+        with self._lock:
+            self._tokens = min(self._tokens, (1.0 - (delay_seconds * self._rate_per_second)))
+
+    def acquire(self, max_wait_seconds: Optional[float] = None) -> Optional[float]:
+        # Local variables.
+        wait_seconds = 0.0
+        with self._lock:
+            # Refill bucket.
+            timestamp_now = time.monotonic()
+            self._tokens = min(float(self._burst), self._tokens + ((timestamp_now - self._timestamp) * self._rate_per_second))
+            self._timestamp = timestamp_now
+            # Give up without reserving a token if the wait would be too long.
+            if (self._tokens < 1.0):
+                wait_seconds = ((1.0 - self._tokens) / self._rate_per_second)
+                if (max_wait_seconds is not None) and (wait_seconds > max_wait_seconds):
+                    return None
+            # Reserve token (waiting for it outside of the lock).
+            self._tokens -= 1.0
+        if (wait_seconds > 0.0):
+            time.sleep(wait_seconds)
+        return wait_seconds
+
 class SigfoxCloud:
     
     def __init__(self) -> None:
         # Init context.
         self._user = SIGFOX_CLOUD_USER
         self._password = SIGFOX_CLOUD_PASSWORD
-    
-    def api_request(self, request: str, parameters: str, delay_seconds: int) -> str:
+        # Persistent session to reuse TCP and TLS connections.
+        self._session = requests.Session()
+        self._session.auth = (self._user, self._password)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=SIGFOX_CLOUD_API_POOL_SIZE, max_retries=0)
+        self._session.mount("https://", adapter)
+        # Rate limiter shared by all users of the client.
+        self._limiter = TokenBucket(SIGFOX_CLOUD_API_RATE_LIMIT_REQUESTS_PER_SECOND, SIGFOX_CLOUD_API_RATE_LIMIT_BURST)
+
+    @staticmethod
+    def _get_endpoint(request: str) -> str:
+        # Build metric name from the request path without identifiers (e.g. devices/<id>/messages -> devices_messages).
+        endpoints = [SIGFOX_CLOUD_API_REQUEST_DEVICES, SIGFOX_CLOUD_API_REQUEST_MESSAGES, SIGFOX_CLOUD_API_REQUEST_CONTRACT_INFOS]
+        path_items = [item for item in urlparse(request).path.split("/") if ((item + "/") in endpoints)]
+        return "_".join(path_items).replace("-", "_") if path_items else "other"
+
+    @staticmethod
+    def _get_retry_after(response) -> Optional[float]:
+        # Retry-After header is either a number of seconds or a HTTP date.
+        retry_after = response.headers.get(SIGFOX_CLOUD_API_HTTP_HEADER_RETRY_AFTER)
+        if retry_after is None:
+            return None
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except Exception:
+            return None
+
+    def api_request(self, request: str, parameters: Optional[Dict[str, Any]], max_retries: int = SIGFOX_CLOUD_API_RETRY_MAX_COUNT, max_wait_seconds: Optional[float] = None) -> Optional[requests.Response]:
         # Local variables.
         response = None
-        # Optional delay for rate limiting.
-        if (delay_seconds > 0):
-            time.sleep(delay_seconds)
-        # Perform request.
-        try:
-            # Add the cloud address if required.
-            if (SIGFOX_CLOUD_API_ADDRESS not in request):
-                request = (SIGFOX_CLOUD_API_ADDRESS + request)
-            response = requests.get(request, auth=(self._user, self._password), params=parameters, timeout=SIGFOX_CLOUD_API_REQUEST_TIMEOUT_SECONDS)
-        except:
-            return response
+        retry_delay = SIGFOX_CLOUD_API_RETRY_DELAY_MIN_SECONDS
+        # Add the cloud address if required.
+        if (SIGFOX_CLOUD_API_ADDRESS not in request):
+            request = (SIGFOX_CLOUD_API_ADDRESS + request)
+        metric_prefix = SIGFOX_CLOUD_METRIC_PREFIX + SigfoxCloud._get_endpoint(request)
+        for retry_count in range(max_retries + 1):
+            # Wait for rate limiter (latency sensitive callers give up if the wait is too long).
+            wait_seconds = self._limiter.acquire(max_wait_seconds)
+            if wait_seconds is None:
+                metrics.increment(metric_prefix + SIGFOX_CLOUD_METRIC_RATE_LIMITED)
+                Log.debug_print("[SIGFOX CLOUD] * ERROR: rate limiter wait exceeds " + str(max_wait_seconds) + "s")
+                return None
+            metrics.add_timing(SIGFOX_CLOUD_METRIC_LIMITER_WAIT, wait_seconds)
+            # Perform request.
+            metrics.increment(metric_prefix + SIGFOX_CLOUD_METRIC_REQUESTS)
+            start_time = time.monotonic()
+            try:
+                response = self._session.get(request, params=parameters, timeout=SIGFOX_CLOUD_API_REQUEST_TIMEOUT_SECONDS)
+            except Exception as e:
+                metrics.increment(metric_prefix + SIGFOX_CLOUD_METRIC_ERRORS)
+                Log.debug_print("[SIGFOX CLOUD] * ERROR: request failed (" + str(e) + ")")
+                return None
+            metrics.add_timing(metric_prefix + SIGFOX_CLOUD_METRIC_LATENCY, (time.monotonic() - start_time))
+            # Retry later if the request has been rate limited by the server.
+            if (response.status_code == SIGFOX_CLOUD_API_HTTP_STATUS_TOO_MANY_REQUESTS):
+                metrics.increment(metric_prefix + SIGFOX_CLOUD_METRIC_RATE_LIMITED)
+                # The other requests sharing the limiter are only paused when the request is retried.
+                if (retry_count >= max_retries):
+                    break
+                retry_after = SigfoxCloud._get_retry_after(response)
+                # Jittered exponential backoff when the server does not specify the delay.
+                delay_seconds = retry_after if (retry_after is not None) else retry_delay
+                delay_seconds = (min(SIGFOX_CLOUD_API_RETRY_DELAY_MAX_SECONDS, delay_seconds) * random.uniform(1.0, 1.5))
+                retry_delay = min(SIGFOX_CLOUD_API_RETRY_DELAY_MAX_SECONDS, (retry_delay * 2.0))
+                Log.debug_print("[SIGFOX CLOUD] * Rate limited, retrying in " + str(round(delay_seconds, 1)) + "s")
+                # Pause all requests sharing the limiter.
+                self._limiter.pause(delay_seconds)
+                continue
+            break
+        if (response.status_code != 200):
+            metrics.increment(metric_prefix + SIGFOX_CLOUD_METRIC_ERRORS)
         return response
     
 # Init shared class instance.
@@ -0,0 +1,142 @@
+"""
+* ttl_cache.py
+*
+*  Created on: 18 oct. 2026
+*      Author: Ludo
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+from database.single_flight import *
+from typing import Any, Callable, Dict, Optional
+from utils.log import *
+from utils.metrics import *
+
+### TTL CACHE macros ###
+
+TTL_CACHE_JSON_KEY_VALUE = "value"
+TTL_CACHE_JSON_KEY_EXPIRY = "expiry"
+TTL_CACHE_JSON_KEY_NEGATIVE = "negative"
+
+TTL_CACHE_METRIC_HITS = "_cache_hits"
+TTL_CACHE_METRIC_MISSES = "_cache_misses"
+TTL_CACHE_METRIC_NEGATIVE_HITS = "_cache_negative_hits"
+TTL_CACHE_METRIC_REFRESHES = "_cache_refreshes"
+TTL_CACHE_METRIC_SIZE = "_cache_size"
+
+### TTL CACHE classes ###
+
+class TtlCache:
+
+    def __init__(self, name: str, loader: Callable[[str], Any], ttl_seconds: float, negative_ttl_seconds: float, refresh_ahead_seconds: float, file_path: Optional[str] = None) -> None:
+        # Init context.
+        self._name = name
+        self._loader = loader
+        self._ttl_seconds = ttl_seconds
+        self._negative_ttl_seconds = negative_ttl_seconds
+        self._refresh_ahead_seconds = refresh_ahead_seconds
+        self._file_path = file_path
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        # Concurrent misses of the same key share a single loader call.
+        self._single_flight = SingleFlight(name + "_cache")
+        # Key to [value, expiry time, negative flag].
+        self._entries: Dict[str, list] = {}
+        # Keys being refreshed in background.
+        self._refreshing = set()
+        self._refresh_queue = queue.Queue()
+        self._load_file()
+        threading.Thread(target=self._refresh_worker, name=(name + "_cache_refresh"), daemon=True).start()
+        metrics.register_gauge(self._name + TTL_CACHE_METRIC_SIZE, lambda: len(self._entries))
+
+    def _load_file(self) -> None:
+        # Local variables.
+        timestamp_now = time.time()
+        if (self._file_path is None) or (not os.path.exists(self._file_path)):
+            return
+        try:
+            cache_file = open(self._file_path, "r")
+            cache_json = json.load(cache_file)
+            cache_file.close()
+            for key, entry in cache_json.items():
+                # Skip expired entries.
+                if (float(entry[TTL_CACHE_JSON_KEY_EXPIRY]) > timestamp_now):
+                    self._entries[key] = [entry[TTL_CACHE_JSON_KEY_VALUE], float(entry[TTL_CACHE_JSON_KEY_EXPIRY]), bool(entry[TTL_CACHE_JSON_KEY_NEGATIVE])]
+            Log.debug_print("[TTL CACHE] * " + self._name + ": " + str(len(self._entries)) + " entries loaded from " + self._file_path)
+        except Exception as e:
+            Log.debug_print("[TTL CACHE] * ERROR: failed to load " + self._file_path + " (" + str(e) + ")")
+
+    def _save_file(self) -> None:
+        # Local variables.
+        timestamp_now = time.time()
+        if self._file_path is None:
+            return
+        try:
+            # Saves are serialized so that they never write the temporary file at the same time.
+            with self._file_lock:
+                with self._lock:
+                    # Expired entries are removed from the file.
+                    cache_json = {
+                        key: {
+                            TTL_CACHE_JSON_KEY_VALUE: entry[0],
+                            TTL_CACHE_JSON_KEY_EXPIRY: entry[1],
+                            TTL_CACHE_JSON_KEY_NEGATIVE: entry[2]
+                        } for key, entry in self._entries.items() if (entry[1] > timestamp_now)
+                    }
+                # Atomic update of the file.
+                cache_file = open(self._file_path + ".tmp", "w")
+                json.dump(cache_json, cache_file)
+                cache_file.close()
+                os.replace(self._file_path + ".tmp", self._file_path)
+        except Exception as e:
+            Log.debug_print("[TTL CACHE] * ERROR: failed to save " + self._file_path + " (" + str(e) + ")")
+
+    def _load(self, key: str, refresh: bool = False) -> list:
+        # Call loader and store result (failures are cached for a shorter time).
+        try:
+            value = self._loader(key)
+            entry = [value, (time.time() + self._ttl_seconds), False]
+        except Exception as e:
+            Log.debug_print("[TTL CACHE] * " + self._name + ": failed to load " + key + " (" + str(e) + ")")
+            entry = [None, (time.time() + self._negative_ttl_seconds), True]
+        with self._lock:
+            previous_entry = self._entries.get(key)
+            # A failed refresh keeps the previous value until it expires.
+            if ((refresh == True) and (entry[2] == True) and (previous_entry is not None) and (previous_entry[2] == False)):
+                return previous_entry
+            self._entries[key] = entry
+            # File is only written when an entry is added, changed or replaces an expired one (not when a value is refreshed).
+            save = ((previous_entry is None) or (previous_entry[1] <= time.time()) or (previous_entry[0] != entry[0]) or (previous_entry[2] != entry[2]))
+        if (save == True):
+            self._save_file()
+        return entry
+
+    def _refresh_worker(self) -> None:
+        while True:
+            key = self._refresh_queue.get()
+            try:
+                self._load(key, refresh=True)
+                metrics.increment(self._name + TTL_CACHE_METRIC_REFRESHES)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+    def get(self, key: str) -> Any:
+        # Local variables.
+        timestamp_now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if (entry is not None) and (entry[1] > timestamp_now):
+                # Refresh positive entries in background before they expire.
+                if ((entry[2] == False) and ((entry[1] - timestamp_now) < self._refresh_ahead_seconds) and (key not in self._refreshing)):
+                    self._refreshing.add(key)
+                    self._refresh_queue.put(key)
+                metrics.increment(self._name + (TTL_CACHE_METRIC_NEGATIVE_HITS if entry[2] else TTL_CACHE_METRIC_HITS))
+                return entry[0]
+        # Cache miss: load synchronously (once for all the concurrent misses of the key).
+        metrics.increment(self._name + TTL_CACHE_METRIC_MISSES)
+        return self._single_flight.do(key, lambda: self._load(key))[0]